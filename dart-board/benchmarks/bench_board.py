@@ -0,0 +1,38 @@
+"""Point classification throughput: exact polar classify vs the lookup raster.
+
+Run: ``python -m benchmarks.bench_board``.
+"""
+from __future__ import annotations
+
+import time
+
+import numpy as np
+
+from src.dart_board.board import classify, code_raster, lookup
+
+SIZES = (10_000, 1_000_000, 10_000_000)
+
+
+def _rate(count: int, fn) -> float:
+    fn()
+    start = time.perf_counter()
+    fn()
+    return count / (time.perf_counter() - start)
+
+
+def main() -> None:
+    start = time.perf_counter()
+    code_raster()
+    print(f"raster build: {(time.perf_counter() - start) * 1000:.0f} ms")
+    rng = np.random.default_rng(0)
+    print(f"{'points':>10} {'classify Mpt/s':>15} {'lookup Mpt/s':>13} {'agreement':>10}")
+    for n in SIZES:
+        x, y = rng.random(n), rng.random(n)
+        exact = _rate(n, lambda: classify(x, y))
+        fast = _rate(n, lambda: lookup(x, y))
+        agreement = (classify(x, y) == lookup(x, y)).mean()
+        print(f"{n:>10} {exact / 1e6:>15.1f} {fast / 1e6:>13.1f} {agreement:>10.4f}")
+
+
+if __name__ == "__main__":
+    main()
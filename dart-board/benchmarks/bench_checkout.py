@@ -0,0 +1,40 @@
+"""Compare checkout lookup latency: brute force vs precomputed tables.
+
+Run from the project root: ``python -m benchmarks.bench_checkout``.
+"""
+from __future__ import annotations
+
+import time
+
+from src.dart_board.checkout import suggest_checkout
+from src.dart_board.checkout_table import CheckoutTable
+
+SCORES = range(2, 171)
+
+
+def _per_lookup_us(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for score in SCORES:
+            fn(score)
+    return (time.perf_counter() - start) / (repeat * len(SCORES)) * 1e6
+
+
+def main() -> None:
+    start = time.perf_counter()
+    table = CheckoutTable.build()
+    build_s = time.perf_counter() - start
+    print(f"table build: {build_s * 1000:.1f} ms")
+
+    suggest_checkout.cache_clear()
+    cold = _per_lookup_us(lambda s: suggest_checkout(s, 3), repeat=1)
+    warm = _per_lookup_us(lambda s: suggest_checkout(s, 3), repeat=50)
+    lookup = _per_lookup_us(lambda s: table.suggest(s, 3), repeat=50)
+    print(f"brute force (cache miss): {cold:10.2f} us/lookup")
+    print(f"brute force (lru hit):    {warm:10.2f} us/lookup")
+    print(f"table lookup:             {lookup:10.2f} us/lookup")
+    print(f"speedup vs cache miss:    {cold / lookup:10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
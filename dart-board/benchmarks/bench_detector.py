@@ -0,0 +1,57 @@
+"""Per-frame LiveImpactDetector latency on synthetic 720p and 1080p frames.
+
+Compares the allocating path with buffer reuse at full resolution and downscaled.
+
+Run: ``python -m benchmarks.bench_detector``.
+"""
+from __future__ import annotations
+
+import time
+
+import cv2
+import numpy as np
+
+from src.dart_board.cv import LiveImpactDetector
+
+SHAPES = {"720p": (720, 1280), "1080p": (1080, 1920)}
+MODES = (
+    ("allocating", {}),
+    ("reuse", {"reuse_buffers": True}),
+    ("scale 0.5", {"scale": 0.5}),
+    ("reuse scale 0.5", {"scale": 0.5, "reuse_buffers": True}),
+    ("scale 0.25", {"scale": 0.25}),
+)
+FRAMES = 200
+
+
+def _frames(shape: tuple[int, int]) -> list[np.ndarray]:
+    rng = np.random.default_rng(0)
+    base = np.full((*shape, 3), 120, dtype=np.uint8) + rng.integers(0, 6, (*shape, 3), dtype=np.uint8)
+    frames = []
+    for i in range(8):
+        frame = base.copy()
+        if i % 2:
+            center = (int(rng.integers(50, shape[1] - 50)), int(rng.integers(50, shape[0] - 50)))
+            cv2.circle(frame, center, 20, (20, 20, 20), -1)
+        frames.append(frame)
+    return frames
+
+
+def main() -> None:
+    print(f"{'frame':>6} {'mode':>18} {'mean ms':>8} {'p95 ms':>8}")
+    for label, shape in SHAPES.items():
+        frames = _frames(shape)
+        for mode, kwargs in MODES:
+            detector = LiveImpactDetector(cooldown_s=0, **kwargs)
+            for frame in frames:
+                detector.detect_hit(frame)
+            samples = []
+            for i in range(FRAMES):
+                start = time.perf_counter()
+                detector.detect_hit(frames[i % len(frames)])
+                samples.append((time.perf_counter() - start) * 1000)
+            print(f"{label:>6} {mode:>18} {np.mean(samples):>8.2f} {np.percentile(samples, 95):>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
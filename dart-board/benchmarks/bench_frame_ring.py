@@ -0,0 +1,87 @@
+"""Frames/s delivered through the shared-memory ring to 1, 2 and 4 reader processes.
+
+A writer publishes 720p frames at camera rate; each reader is a separate
+interpreter (like an API worker) that takes a zero-copy view of every new frame,
+JPEG-encodes it (what a stream viewer costs a worker) and counts the frames it
+delivered intact versus those the writer overwrote mid-encode.
+
+Run: ``python -m benchmarks.bench_frame_ring``.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from src.dart_board.framering import FrameRing
+
+DURATION_S = 3.0
+READERS = (1, 2, 4)
+SHAPE = (720, 1280, 3)
+WRITE_FPS = 60
+
+
+def _read(name: str, duration_s: float) -> None:
+    ring = FrameRing.attach(name)
+    seq = delivered = torn = 0
+    deadline = time.monotonic() + duration_s
+    while time.monotonic() < deadline:
+        latest = ring.latest_seq()
+        if latest == seq:
+            time.sleep(0.0005)
+            continue
+        seq = latest
+        view = ring.view(seq)
+        if view is None:
+            torn += 1
+            continue
+        cv2.imencode(".jpg", view, [cv2.IMWRITE_JPEG_QUALITY, 80])
+        if ring.is_valid(seq):
+            delivered += 1
+        else:
+            torn += 1
+        del view
+    ring.release()
+    print(delivered, torn)
+
+
+def main() -> None:
+    frames = [np.random.default_rng(i).integers(0, 255, SHAPE, dtype=np.uint8) for i in range(4)]
+    print(f"{'readers':>8} {'write fps':>10} {'fps/reader':>11} {'torn':>6}")
+    for readers in READERS:
+        ring = FrameRing.create(name=f"dartboard-bench-{os.getpid()}", height=SHAPE[0], width=SHAPE[1])
+        procs = [
+            subprocess.Popen(
+                [sys.executable, "-m", "benchmarks.bench_frame_ring", "--read", ring.name, str(DURATION_S)],
+                stdout=subprocess.PIPE,
+                text=True,
+            )
+            for _ in range(readers)
+        ]
+        time.sleep(0.5)  # let the readers import and attach
+        start = time.perf_counter()
+        written = 0
+        while time.perf_counter() - start < DURATION_S:
+            ring.publish(frames[written % len(frames)])
+            written += 1
+            time.sleep(max(0.0, start + written / WRITE_FPS - time.perf_counter()))
+        counts = [tuple(map(int, proc.communicate()[0].split())) for proc in procs]
+        ring.release()
+        delivered = sum(c[0] for c in counts) / readers
+        torn = sum(c[1] for c in counts)
+        print(f"{readers:>8} {written / DURATION_S:>10.0f} {delivered / DURATION_S:>11.1f} {torn:>6}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--read", nargs=2, metavar=("RING", "SECONDS"))
+    args = parser.parse_args()
+    if args.read:
+        _read(args.read[0], float(args.read[1]))
+    else:
+        main()
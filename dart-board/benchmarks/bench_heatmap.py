@@ -0,0 +1,52 @@
+"""Heatmap render time: per-point cv2.circle loop vs vectorized density binning.
+
+Run from the project root: ``python -m benchmarks.bench_heatmap``.
+"""
+from __future__ import annotations
+
+import time
+
+import cv2
+import numpy as np
+
+from src.dart_board.heatmap import draw_dartboard, render_heatmap
+
+SIZE = 640
+COUNTS = (1_000, 100_000, 1_000_000)
+
+
+def legacy_render(points: np.ndarray, size: int = SIZE) -> bytes:
+    """The pre-vectorization renderer, kept here as the baseline."""
+    base = draw_dartboard(size)
+    acc = np.zeros((size, size), dtype=np.float32)
+    for x_norm, y_norm in points:
+        x = int(np.clip(x_norm, 0.0, 1.0) * (size - 1))
+        y = int(np.clip(y_norm, 0.0, 1.0) * (size - 1))
+        cv2.circle(acc, (x, y), int(size * 0.03), 1.0, thickness=-1)
+    acc = cv2.GaussianBlur(acc, (0, 0), sigmaX=size * 0.02, sigmaY=size * 0.02)
+    acc = acc / np.max(acc)
+    heat = cv2.applyColorMap((acc * 255).astype(np.uint8), cv2.COLORMAP_JET)
+    overlay = cv2.addWeighted(base, 0.55, heat, 0.45, 0)
+    return cv2.imencode(".png", overlay)[1].tobytes()
+
+
+def _timed_ms(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return (time.perf_counter() - start) * 1000
+
+
+def main() -> None:
+    rng = np.random.default_rng(0)
+    print(f"{'throws':>10} {'legacy ms':>12} {'vectorized ms':>14} {'weighted ms':>12}")
+    for count in COUNTS:
+        points = np.clip(rng.normal(0.5, 0.12, size=(count, 2)), 0.0, 1.0)
+        weights = rng.uniform(0.2, 1.0, size=count)
+        legacy = _timed_ms(lambda: legacy_render(points))
+        vectorized = _timed_ms(lambda: render_heatmap(points, SIZE))
+        weighted = _timed_ms(lambda: render_heatmap(points, SIZE, weights=weights))
+        print(f"{count:>10} {legacy:>12.1f} {vectorized:>14.1f} {weighted:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
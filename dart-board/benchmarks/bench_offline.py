@@ -0,0 +1,53 @@
+"""Offline video ingestion throughput with 1, 2 and 4 pool workers.
+
+Writes a synthetic 720p MJPG recording with a dart landing every two seconds and
+reports frames detected per second and the realtime factor (seconds of video per
+second of processing) for each worker count.
+
+Run: ``python -m benchmarks.bench_offline``.
+"""
+from __future__ import annotations
+
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from src.dart_board.offline import detect_video
+
+FPS = 30
+SECONDS = 60
+SIZE = (1280, 720)
+WORKERS = (1, 2, 4)
+
+
+def _write_video(path: Path) -> None:
+    rng = np.random.default_rng(0)
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"MJPG"), FPS, SIZE)
+    board = np.full((SIZE[1], SIZE[0], 3), 120, dtype=np.uint8)
+    for index in range(FPS * SECONDS):
+        if index % (2 * FPS) == FPS:
+            center = (int(rng.integers(400, 880)), int(rng.integers(150, 570)))
+            cv2.circle(board, center, 25, (20, 20, 20), -1)
+        writer.write(board)
+    writer.release()
+
+
+def main() -> None:
+    print(f"cpus: {os.cpu_count()}, video: {SECONDS}s {SIZE[0]}x{SIZE[1]} @ {FPS} fps")
+    print(f"{'workers':>7} {'chunks':>6} {'hits':>5} {'fps':>8} {'realtime x':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "session.avi"
+        _write_video(path)
+        for workers in WORKERS:
+            start = time.perf_counter()
+            hits, info, _, decoded, chunks = detect_video(path, workers=workers)
+            elapsed = time.perf_counter() - start
+            print(f"{workers:>7} {chunks:>6} {len(hits):>5} {decoded / elapsed:>8.1f} {info.duration_s / elapsed:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
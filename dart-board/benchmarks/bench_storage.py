@@ -0,0 +1,111 @@
+"""Store throughput before/after persistent WAL connections, plus bulk inserts.
+
+"legacy" reproduces the old access pattern: a fresh rollback-journal connection per
+call, every call serialized on one lock. Run: ``python -m benchmarks.bench_storage``.
+"""
+from __future__ import annotations
+
+import sqlite3
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from src.dart_board.board import code_raster
+from src.dart_board.storage import DartBoardStore, ThrowInput
+
+INSERTS = 2000
+QUERIES = 500
+SEED_THROWS = 2000
+BULK_THROWS = 100_000
+
+
+class LegacyStore:
+    def __init__(self, db_path: Path) -> None:
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        DartBoardStore(str(db_path)).close()
+        with sqlite3.connect(db_path) as conn:
+            conn.execute("PRAGMA journal_mode=DELETE")
+
+    def add_throw(self, user_id: str, session_id: str, x: float, y: float, c: float) -> None:
+        with self._lock, sqlite3.connect(self.db_path) as conn:
+            conn.execute(
+                "INSERT INTO throws (user_id, session_id, ts, x_norm, y_norm, confidence) VALUES (?, ?, ?, ?, ?, ?)",
+                (user_id, session_id, "2024-01-01T00:00:00+00:00", x, y, c),
+            )
+
+    def get_user(self, user_id: str) -> object:
+        with self._lock, sqlite3.connect(self.db_path) as conn:
+            return conn.execute("SELECT * FROM users WHERE id = ?", (user_id,)).fetchone()
+
+    def list_throw_points(self, user_id: str) -> list:
+        with self._lock, sqlite3.connect(self.db_path) as conn:
+            return conn.execute(
+                "SELECT id, x_norm, y_norm, confidence FROM throws WHERE user_id = ? ORDER BY id", (user_id,)
+            ).fetchall()
+
+
+def _seed(store) -> None:
+    for i in range(SEED_THROWS):
+        store.add_throw("u1", "s1", (i % 100) / 100, 0.5, 0.9)
+
+
+def _rate(count: int, fn) -> float:
+    start = time.perf_counter()
+    for _ in range(count):
+        fn()
+    return count / (time.perf_counter() - start)
+
+
+def _concurrent(store) -> tuple[float, float]:
+    """Insert and query rates while a writer and a reader thread run together."""
+    stop = threading.Event()
+    counts = {"reads": 0}
+
+    def reader() -> None:
+        while not stop.is_set():
+            store.list_throw_points("u1")
+            counts["reads"] += 1
+
+    thread = threading.Thread(target=reader)
+    start = time.perf_counter()
+    thread.start()
+    for _ in range(INSERTS):
+        store.add_throw("u1", "s1", 0.5, 0.5, 0.9)
+    stop.set()
+    thread.join()
+    elapsed = time.perf_counter() - start
+    return INSERTS / elapsed, counts["reads"] / elapsed
+
+
+def main() -> None:
+    code_raster()  # built once per process on first insert; keep it out of the timings
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy = LegacyStore(Path(tmp) / "legacy.db")
+        pooled = DartBoardStore(str(Path(tmp) / "pooled.db"))
+        pooled.create_user("u1", "bench")
+        pooled.create_session("s1", "u1", None)
+
+        print(
+            f"{'':>10} {'insert/s':>10} {'lookup/s':>10} {'scan/s':>8} {'mixed insert/s':>15} {'mixed scan/s':>13}"
+        )
+        for name, store in (("legacy", legacy), ("pooled", pooled)):
+            inserts = _rate(INSERTS, lambda: store.add_throw("u1", "s1", 0.5, 0.5, 0.9))
+            _seed(store)
+            lookups = _rate(QUERIES * 10, lambda: store.get_user("u1"))
+            scans = _rate(QUERIES, lambda: store.list_throw_points("u1"))
+            mixed_inserts, mixed_scans = _concurrent(store)
+            print(
+                f"{name:>10} {inserts:>10.0f} {lookups:>10.0f} {scans:>8.0f} {mixed_inserts:>15.0f} {mixed_scans:>13.0f}"
+            )
+
+        rows = [ThrowInput("u1", "s1", (i % 100) / 100, 0.5, 0.9) for i in range(BULK_THROWS)]
+        start = time.perf_counter()
+        pooled.add_throws(rows)
+        print(f"{'bulk':>10} {BULK_THROWS / (time.perf_counter() - start):>10.0f}")
+        pooled.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""LiveImpactDetector speed and accuracy on synthetic board video, plus the capture loop.
+
+Each scenario renders a seeded 720p clip with known dart impacts (see
+:mod:`src.dart_board.synthetic`) and runs the detector over it at full and half
+resolution, reporting frames/sec, per-frame latency percentiles and hit
+precision/recall against the ground truth. The capture section plays a clip
+through the full capture pipeline from a file source and reports its stage timings.
+
+Run: ``python -m benchmarks.bench_synthetic``. With ``--check`` the run fails when
+accuracy on the default scenario drops below the thresholds or, if given, the
+full-resolution p95 latency exceeds ``--max-p95-ms``.
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from src.dart_board.ingest import USBCaptureManager
+from src.dart_board.storage import DartBoardStore
+from src.dart_board.synthetic import DetectorRun, SceneConfig, SyntheticBoardVideo, evaluate_detector
+
+SCENARIOS = {
+    "clean": SceneConfig(noise_sigma=0, lighting_drift=0, lighting_steps=0),
+    "default": SceneConfig(),
+    "harsh light": SceneConfig(noise_sigma=6, lighting_drift=0.2, lighting_steps=4, lighting_step=0.25),
+}
+MODES = (("full", {}), ("scale 0.5", {"scale": 0.5}))
+CAPTURE_SECONDS = 10
+# The detector reports one false positive per visit, when the darts are pulled.
+MIN_RECALL = 0.8
+MIN_PRECISION = 0.6
+
+
+def bench_detector() -> dict[tuple[str, str], DetectorRun]:
+    print(f"{'scenario':>12} {'mode':>10} {'fps':>7} {'p50 ms':>7} {'p95 ms':>7} {'p99 ms':>7} "
+          f"{'throws':>6} {'hits':>5} {'prec':>5} {'recall':>6} {'err':>6}")
+    runs = {}
+    for scenario, config in SCENARIOS.items():
+        video = SyntheticBoardVideo(config)
+        for mode, options in MODES:
+            run = runs[scenario, mode] = evaluate_detector(video, **options)
+            acc = run.accuracy
+            print(f"{scenario:>12} {mode:>10} {run.fps:>7.0f} {run.percentile_ms(50):>7.2f} "
+                  f"{run.percentile_ms(95):>7.2f} {run.percentile_ms(99):>7.2f} {acc.throws:>6} "
+                  f"{acc.detections:>5} {acc.precision:>5.2f} {acc.recall:>6.2f} {acc.mean_error:>6.3f}")
+    return runs
+
+
+def bench_capture() -> None:
+    video = SyntheticBoardVideo(SceneConfig(seconds=CAPTURE_SECONDS))
+    with tempfile.TemporaryDirectory() as tmp:
+        path = video.write(Path(tmp) / "synthetic.avi")
+        store = DartBoardStore(str(Path(tmp) / "bench.db"))
+        store.create_user("bench", "Bench")
+        store.create_session("bench", "bench", str(path))
+        manager = USBCaptureManager(store)
+        manager.start_capture("bench", "bench", fps=30, source=str(path))
+        while manager.status()["running"]:
+            time.sleep(0.1)
+        status = manager.stop_capture()
+        manager.close()
+        store.close()
+    print(f"\ncapture loop, {CAPTURE_SECONDS}s file source at 30 fps: "
+          f"{status['frames_processed']} frames detected, {status['throws_detected']} hits "
+          f"({len(video.throws)} thrown), {status['cpu_percent']}% of a core")
+    print(f"{'stage':>8} {'frames':>7} {'avg ms':>7} {'max ms':>7} {'dropped':>7}")
+    for stage in status["stages"]:
+        print(f"{stage['name']:>8} {stage['processed']:>7} {stage['avg_ms']:>7.2f} "
+              f"{stage['max_ms']:>7.2f} {stage['dropped']:>7}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--check", action="store_true", help="exit non-zero on an accuracy or latency regression")
+    parser.add_argument("--max-p95-ms", type=float, help="p95 detector latency limit for --check (machine dependent)")
+    parser.add_argument("--no-capture", action="store_true", help="skip the real-time capture loop run")
+    args = parser.parse_args()
+
+    runs = bench_detector()
+    if not args.no_capture:
+        bench_capture()
+    if not args.check:
+        return
+
+    run = runs["default", "full"]
+    failures = []
+    if run.accuracy.recall < MIN_RECALL:
+        failures.append(f"recall {run.accuracy.recall:.2f} < {MIN_RECALL}")
+    if run.accuracy.precision < MIN_PRECISION:
+        failures.append(f"precision {run.accuracy.precision:.2f} < {MIN_PRECISION}")
+    if args.max_p95_ms is not None and run.percentile_ms(95) > args.max_p95_ms:
+        failures.append(f"p95 {run.percentile_ms(95):.2f} ms > {args.max_p95_ms} ms")
+    if failures:
+        print("\nregression: " + "; ".join(failures))
+        sys.exit(1)
+    print("\ncheck passed")
+
+
+if __name__ == "__main__":
+    main()
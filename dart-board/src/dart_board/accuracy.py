@@ -0,0 +1,219 @@
+"""Per-player accuracy models built from stored throws.
+
+A player's dispersion is modelled as a 2D Gaussian around the point they aim at.
+Stored throws carry no intended target, so the covariance is estimated from the
+confidence-weighted scatter of all their throws around their mean position and
+shrunk toward a prior for players with little history. The model keeps only
+running sums, so each new throw updates it in O(1).
+
+Hit probabilities are estimated by shifting a fixed low-discrepancy cloud of
+Gaussian samples onto every aim point and classifying the whole
+``(targets, samples)`` array at once.
+"""
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from .board import MISS, THROW_LABELS, aim_points, classify
+from .checkout_table import MAX_SUGGESTIONS, PAD, CheckoutTable, OutRule
+from .storage import DartBoardStore, ThrowRecord
+
+PRIOR_SIGMA = 0.06  # normalized units, roughly a casual player's spread
+PRIOR_WEIGHT = 20.0  # prior counts as this many throws
+SAMPLE_COUNT = 2048
+# Outcome matrices are reused until the covariance moves by more than this fraction.
+REFRESH_TOLERANCE = 0.01
+# Combinations whose finish probabilities round to the same value prefer fewer darts.
+PROBABILITY_DECIMALS = 2
+
+
+def _unit_samples(n: int) -> np.ndarray:
+    """Standard normal samples from a Fibonacci lattice pushed through Box-Muller."""
+    i = np.arange(n)
+    u = (i + 0.5) / n
+    v = (i * (np.sqrt(5.0) - 1.0) / 2.0) % 1.0
+    r = np.sqrt(-2.0 * np.log(1.0 - u))
+    return np.column_stack((r * np.cos(2 * np.pi * v), r * np.sin(2 * np.pi * v)))
+
+
+_AIM_POINTS = aim_points()
+_UNIT_SAMPLES = _unit_samples(SAMPLE_COUNT)
+
+
+@dataclass
+class ThrowStats:
+    """Confidence-weighted running sums of throw positions."""
+
+    count: int = 0
+    weight: float = 0.0
+    sum_x: float = 0.0
+    sum_y: float = 0.0
+    sum_xx: float = 0.0
+    sum_xy: float = 0.0
+    sum_yy: float = 0.0
+    last_id: int = 0
+
+    def add(self, ids: np.ndarray, x: np.ndarray, y: np.ndarray, w: np.ndarray) -> None:
+        if len(ids) == 0:
+            return
+        self.count += len(ids)
+        self.weight += float(w.sum())
+        self.sum_x += float((w * x).sum())
+        self.sum_y += float((w * y).sum())
+        self.sum_xx += float((w * x * x).sum())
+        self.sum_xy += float((w * x * y).sum())
+        self.sum_yy += float((w * y * y).sum())
+        self.last_id = max(self.last_id, int(ids.max()))
+
+    def covariance(self) -> np.ndarray:
+        prior = np.eye(2) * PRIOR_SIGMA**2
+        if self.weight <= 0:
+            return prior
+        mx, my = self.sum_x / self.weight, self.sum_y / self.weight
+        observed = np.array(
+            [
+                [self.sum_xx / self.weight - mx * mx, self.sum_xy / self.weight - mx * my],
+                [self.sum_xy / self.weight - mx * my, self.sum_yy / self.weight - my * my],
+            ]
+        )
+        observed = (observed + observed.T) / 2
+        return (observed * self.weight + prior * PRIOR_WEIGHT) / (self.weight + PRIOR_WEIGHT)
+
+
+def outcome_matrix(covariance: np.ndarray) -> np.ndarray:
+    """``P[aim, outcome]`` for every aim code and every outcome code including ``MISS``."""
+    chol = np.linalg.cholesky(covariance + np.eye(2) * 1e-12)
+    offsets = _UNIT_SAMPLES @ chol.T
+    landed = _AIM_POINTS[:, None, :] + offsets[None, :, :]
+    codes = classify(landed[..., 0], landed[..., 1]).astype(np.intp)
+    aims = len(THROW_LABELS)
+    flat = np.arange(aims)[:, None] * (MISS + 1) + codes
+    counts = np.bincount(flat.ravel(), minlength=aims * (MISS + 1))
+    return counts.reshape(aims, MISS + 1) / float(SAMPLE_COUNT)
+
+
+@dataclass
+class PlayerModel:
+    stats: ThrowStats = field(default_factory=ThrowStats)
+    # Highest id covered by the database load; listener updates are checked against it.
+    loaded_through: int = 0
+    # Ids above loaded_through already added by listeners, skipped by the next catch-up.
+    applied: set[int] = field(default_factory=set)
+    _matrix: np.ndarray | None = None
+    _matrix_cov: np.ndarray | None = None
+
+    def outcome_matrix(self) -> np.ndarray:
+        cov = self.stats.covariance()
+        if self._matrix is None or not np.allclose(cov, self._matrix_cov, rtol=REFRESH_TOLERANCE, atol=0):
+            self._matrix = outcome_matrix(cov)
+            self._matrix_cov = cov
+        return self._matrix
+
+    def hit_probabilities(self) -> np.ndarray:
+        """Probability of hitting each throw code when aiming at it."""
+        matrix = self.outcome_matrix()
+        idx = np.arange(len(THROW_LABELS))
+        return matrix[idx, idx]
+
+    def rank_checkouts(
+        self, table: CheckoutTable, score: int, darts: int = 3, out_rule: OutRule = "double"
+    ) -> tuple[list[list[str]], list[float]]:
+        """Finishing combinations ordered by estimated probability of hitting them all."""
+        codes = table.combination_codes(score, darts, out_rule)
+        if len(codes) == 0:
+            return [], []
+        probs = np.append(self.hit_probabilities(), 1.0)
+        finish = probs[np.where(codes == PAD, len(probs) - 1, codes)].prod(axis=1)
+        darts_used = (codes != PAD).sum(axis=1)
+        order = np.lexsort((darts_used, -np.round(finish, PROBABILITY_DECIMALS)))[:MAX_SUGGESTIONS]
+        combos = [[THROW_LABELS[c] for c in row if c != PAD] for row in codes[order].tolist()]
+        return combos, [float(p) for p in finish[order]]
+
+
+class PlayerModelCache:
+    """LRU cache of player models kept current through store listener callbacks.
+
+    Throws stored or cleared by another process are noticed on the next ``get`` by
+    comparing the model with the store's id/count watermark.
+    """
+
+    def __init__(self, store: DartBoardStore, max_users: int = 1024) -> None:
+        self.store = store
+        self.max_users = max_users
+        self._lock = threading.Lock()
+        self._models: OrderedDict[str, PlayerModel] = OrderedDict()
+
+    def get(self, user_id: str) -> PlayerModel:
+        watermark = self.store.throw_watermark(user_id)
+        with self._lock:
+            model = self._models.get(user_id)
+            if model is not None:
+                self._models.move_to_end(user_id)
+                if (model.stats.last_id, model.stats.count) == watermark:
+                    # Every stored id up to last_id is counted, so listener ids need no tracking.
+                    model.loaded_through = model.stats.last_id
+                    model.applied.clear()
+                    return model
+                self._catch_up_locked(user_id, model)
+
+        if model is None:
+            model = self._load(user_id)
+        if (model.stats.last_id, model.stats.count) != self.store.throw_watermark(user_id):
+            # Still off after catching up, so throws were deleted: start over.
+            model = self._load(user_id, replace=True)
+        return model
+
+    def _load(self, user_id: str, replace: bool = False) -> PlayerModel:
+        # Bulk load outside the lock, then catch up under it so a throw committed in
+        # between is either in the catch-up rows or delivered to throws_added later.
+        rows = self.store.list_throw_points(user_id)
+        with self._lock:
+            existing = self._models.get(user_id)
+            if existing is not None and not replace:
+                return existing
+            model = PlayerModel()
+            self._add_rows(model, rows)
+            model.loaded_through = model.stats.last_id
+            self._catch_up_locked(user_id, model)
+            self._models[user_id] = model
+            self._models.move_to_end(user_id)
+            while len(self._models) > self.max_users:
+                self._models.popitem(last=False)
+            return model
+
+    def _catch_up_locked(self, user_id: str, model: PlayerModel) -> None:
+        rows = self.store.list_throw_points(user_id, after_id=model.loaded_through)
+        if not rows:
+            return
+        self._add_rows(model, [row for row in rows if row[0] not in model.applied])
+        model.loaded_through = rows[-1][0]
+        model.applied = {throw_id for throw_id in model.applied if throw_id > model.loaded_through}
+
+    @staticmethod
+    def _add_rows(model: PlayerModel, rows: list[tuple[int, float, float, float]]) -> None:
+        if not rows:
+            return
+        arr = np.asarray(rows, dtype=np.float64)
+        model.stats.add(arr[:, 0].astype(np.int64), arr[:, 1], arr[:, 2], arr[:, 3])
+
+    def throws_added(self, throws: list[ThrowRecord]) -> None:
+        with self._lock:
+            for throw in throws:
+                model = self._models.get(throw.user_id)
+                if model is None or throw.id <= model.loaded_through or throw.id in model.applied:
+                    continue
+                model.applied.add(throw.id)
+                model.stats.add(
+                    np.array([throw.id]),
+                    np.array([throw.x_norm]),
+                    np.array([throw.y_norm]),
+                    np.array([throw.confidence]),
+                )
+
+    def throws_cleared(self, user_id: str) -> None:
+        with self._lock:
+            self._models.pop(user_id, None)
@@ -1,30 +1,119 @@
+import hashlib
+import json
 import os
-import time
-
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import HTMLResponse, Response, StreamingResponse
-
-from .checkout import suggest_checkout
-from .heatmap import render_heatmap
-from .ingest import USBCaptureManager
+from collections.abc import AsyncIterator, Iterator
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import asdict
+from datetime import date, datetime, timedelta, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from pathlib import Path
+
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import HTMLResponse, JSONResponse, Response, StreamingResponse
+from pydantic import ValidationError
+from starlette.convertors import Convertor, register_url_convertor
+
+from .accuracy import PlayerModelCache
+from .calibration import BoardCalibration
+from .capture_daemon import CaptureClient, CaptureUnavailable, DisabledCaptureManager
+from .checkout_table import MAX_DARTS, OutRule, get_checkout_table
+from .density import DensityGridCache
+from .heatmap import DEFAULT_SIZE, MAX_SIZE, MEDIA_TYPES, MIN_SIZE, ImageFormat, ThemeName, render_density
+from .imagecache import EncodedImageCache
+from .ingest import DEFAULT_BOARD, BoardCaptureManager, CapturePipeline
 from .models import (
+    AimAdviceOut,
+    BulkThrowsOut,
+    CalibrationCreate,
+    CalibrationOut,
     CaptureStartRequest,
     CaptureStatusOut,
     CheckoutSuggestion,
+    DailyThrowsOut,
     FinishAdviceOut,
+    PlayerStatsOut,
     PreviewStartRequest,
+    SegmentStatsOut,
     SessionCreate,
     SessionOut,
+    ThrowBatchOut,
     ThrowCreate,
+    ThrowImport,
     ThrowOut,
+    ThrowRowError,
     UserCreate,
     UserOut,
+    VideoIngestJobOut,
+    VideoIngestRequest,
 )
-from .storage import DartBoardStore
-
-app = FastAPI(title="Dart Board MVP", version="0.3.0")
-store = DartBoardStore(db_path=os.getenv("DARTBOARD_DB_PATH", "dartboard.db"))
-capture_manager = USBCaptureManager(store=store)
+from .offline import OfflineIngestJobs
+from .pipeline import RatePolicy
+from .sources import resolve_video_file, source_kind
+from .stats import summarize_hits
+from .storage import CalibrationRecord, DartBoardStore, ThrowInput, ThrowRecord
+from .streaming import DEFAULT_QUALITY, MJPEG_BOUNDARY, StreamVariant, mjpeg_stream
+from .strategy import DARTS_PER_VISIT, StrategyCache
+
+DB_PATH = os.getenv("DARTBOARD_DB_PATH", "dartboard.db")
+CAPTURE_ENABLED = os.getenv("DARTBOARD_CAPTURE_ENABLED", "true").strip().lower() not in {"0", "false", "no", "off"}
+# When set, capture runs in a separate capture_daemon process shared by all workers.
+CAPTURE_SOCKET = os.getenv("DARTBOARD_CAPTURE_SOCKET")
+# DARTBOARD_CAPTURE_IDLE_FPS on a still board; DARTBOARD_CAPTURE_CPU_BUDGET caps pipeline CPU (percent of one core).
+CAPTURE_RATE_POLICY = RatePolicy.from_env()
+# Session videos for POST /sessions/{session_id}/ingest are resolved inside this directory.
+VIDEO_DIR = os.getenv("DARTBOARD_VIDEO_DIR", ".")
+# Rows per store transaction for POST /throws/bulk.
+BULK_CHUNK_SIZE = 500
+# Largest page for GET /heatmap/{user_id}, and rows per fetchmany when streaming it.
+MAX_PAGE_SIZE = 10_000
+STREAM_BATCH_SIZE = 1000
+# Dirty heatmap density grids are written this often, so a crash loses little catch-up work.
+GRID_FLUSH_INTERVAL_S = 30.0
+MIN_STREAM_WIDTH = 64
+MAX_STREAM_WIDTH = 1920
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    yield
+    capture_boards.close()
+    density_grids.close()
+    strategies.shutdown()
+
+
+app = FastAPI(title="Dart Board MVP", version="0.3.0", lifespan=lifespan)
+store = DartBoardStore(db_path=DB_PATH)
+
+
+def _external_pipeline(board_id: str) -> CapturePipeline:
+    """Capture pipeline for a board when it does not run in this process."""
+    if not CAPTURE_ENABLED:
+        return DisabledCaptureManager()
+    if "{board_id}" in CAPTURE_SOCKET:
+        return CaptureClient(CAPTURE_SOCKET.format(board_id=board_id), store=store)
+    if board_id != DEFAULT_BOARD:
+        raise CaptureUnavailable("DARTBOARD_CAPTURE_SOCKET has no {board_id}; only the default board is available")
+    return CaptureClient(CAPTURE_SOCKET, store=store)
+
+
+capture_boards = BoardCaptureManager(
+    store,
+    factory=_external_pipeline if CAPTURE_SOCKET or not CAPTURE_ENABLED else None,
+    rate_policy=CAPTURE_RATE_POLICY,
+)
+checkout_table = get_checkout_table()
+player_models = PlayerModelCache(store=store)
+store.add_listener(player_models)
+strategies = StrategyCache(player_models, policy_dir=os.getenv("DARTBOARD_POLICY_DIR"))
+density_grids = DensityGridCache(
+    store,
+    grid_dir=os.getenv("DARTBOARD_GRID_DIR", str(Path(DB_PATH).with_name(Path(DB_PATH).stem + "-grids"))),
+    flush_interval_s=GRID_FLUSH_INTERVAL_S,
+)
+store.add_listener(density_grids)
+heatmap_images = EncodedImageCache()
+offline_jobs = OfflineIngestJobs(store, video_dir=VIDEO_DIR)
 
 
 @app.get("/", response_class=HTMLResponse)
@@ -172,15 +261,26 @@ def ui_home() -> str:
     }
 
     let autoRefreshInterval = null;
+    let heatmapEtag = null;
+    let heatmapObjectUrl = null;
+
+    async function refreshHeatmap() {
+      // Revalidate with the server's ETag; unchanged heatmaps come back as 304.
+      const r = await fetch(`/heatmap/${ids().user_id}.png`, { cache: "no-cache" });
+      if (!r.ok) return;
+      const etag = r.headers.get("ETag");
+      if (etag && etag === heatmapEtag) return;
+      heatmapEtag = etag;
+      const url = URL.createObjectURL(await r.blob());
+      document.getElementById("heatmap").src = url;
+      document.getElementById("heatmapOverlay").src = url;
+      if (heatmapObjectUrl) URL.revokeObjectURL(heatmapObjectUrl);
+      heatmapObjectUrl = url;
+    }
 
     function startAutoRefresh() {
       if (autoRefreshInterval) return;
-      autoRefreshInterval = setInterval(() => {
-        const u = ids().user_id;
-        const heatmapUrl = `/heatmap/${u}.png?t=${Date.now()}`;
-        document.getElementById("heatmap").src = heatmapUrl;
-        document.getElementById("heatmapOverlay").src = heatmapUrl;
-      }, 1000); // Update heatmap every second
+      autoRefreshInterval = setInterval(() => { refreshHeatmap().catch(() => {}); }, 1000); // Update heatmap every second
     }
 
     function stopAutoRefresh() {
@@ -212,10 +312,8 @@ def ui_home() -> str:
     async function refresh() {
       const st = await api("/capture/status");
       document.getElementById("status").textContent = JSON.stringify(st, null, 2);
-      const u = ids().user_id;
-      const heatmapUrl = `/heatmap/${u}.png?t=${Date.now()}`;
-      document.getElementById("heatmap").src = heatmapUrl;
-      document.getElementById("heatmapOverlay").src = heatmapUrl;
+      heatmapEtag = null;
+      await refreshHeatmap();
 
       // Update mode badge
       const badge = document.getElementById("modeBadge");
@@ -251,7 +349,7 @@ def ui_home() -> str:
 
 @app.get("/health")
 def health() -> dict[str, str]:
-    return {"status": "ok"}
+    return {"status": "ok", "capture_enabled": "true" if CAPTURE_ENABLED else "false"}
 
 
 @app.post("/users", response_model=UserOut)
@@ -283,6 +381,33 @@ def create_session(payload: SessionCreate) -> SessionOut:
     )
 
 
+@app.post("/sessions/{session_id}/ingest", response_model=VideoIngestJobOut, status_code=202)
+def ingest_session_video(session_id: str, payload: VideoIngestRequest | None = None) -> VideoIngestJobOut:
+    """Detect throws in a recorded video of the session in the background; poll GET /ingest/{job_id}."""
+    payload = payload or VideoIngestRequest()
+    session = store.get_session(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="session not found")
+    source_ref = payload.path or session.source_ref
+    if not source_ref:
+        raise HTTPException(status_code=400, detail="session has no source_ref; pass a path")
+    if payload.camera_index is not None and store.get_calibration(payload.camera_index) is None:
+        raise HTTPException(status_code=400, detail=f"camera {payload.camera_index} is not calibrated")
+    try:
+        job = offline_jobs.start(session_id, source_ref, workers=payload.workers, camera_index=payload.camera_index)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return VideoIngestJobOut(**job)
+
+
+@app.get("/ingest/{job_id}", response_model=VideoIngestJobOut)
+def get_ingest_job(job_id: str) -> VideoIngestJobOut:
+    job = offline_jobs.status(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="ingest job not found")
+    return VideoIngestJobOut(**job)
+
+
 @app.post("/throws", response_model=ThrowOut)
 def create_throw(payload: ThrowCreate) -> ThrowOut:
     if store.get_user(payload.user_id) is None:
@@ -311,6 +436,98 @@ def create_throw(payload: ThrowCreate) -> ThrowOut:
     )
 
 
+async def _bulk_rows(request: Request) -> AsyncIterator[tuple[int, object]]:
+    """Yield ``(index, decoded row)`` from a JSON array or a streamed NDJSON body.
+
+    Undecodable NDJSON lines are yielded as ``None`` so they are rejected individually.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    if content_type in ("application/x-ndjson", "application/jsonl"):
+        index = 0
+        buffer = b""
+
+        def decode(line: bytes) -> object:
+            try:
+                return json.loads(line)
+            except ValueError:
+                return None
+
+        async for chunk in request.stream():
+            buffer += chunk
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                if line.strip():
+                    yield index, decode(line)
+                    index += 1
+        if buffer.strip():
+            yield index, decode(buffer)
+        return
+
+    try:
+        rows = json.loads(await request.body())
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail="body must be a JSON array or NDJSON") from exc
+    if not isinstance(rows, list):
+        raise HTTPException(status_code=400, detail="body must be a JSON array or NDJSON")
+    for index, row in enumerate(rows):
+        yield index, row
+
+
+def _store_batch(rows: list[tuple[int, ThrowImport]], invalid: list[ThrowRowError]) -> ThrowBatchOut:
+    results = store.add_throws(
+        [
+            ThrowInput(
+                user_id=row.user_id,
+                session_id=row.session_id,
+                x_norm=row.x_norm,
+                y_norm=row.y_norm,
+                confidence=row.confidence,
+                ts=row.ts,
+            )
+            for _, row in rows
+        ],
+        chunk_size=max(len(rows), 1),
+    )
+    errors = list(invalid)
+    for result in results:
+        errors.extend(ThrowRowError(index=rows[i][0], detail=detail) for i, detail in result.errors)
+    errors.sort(key=lambda err: err.index)
+    accepted = sum(result.accepted for result in results)
+    return ThrowBatchOut(accepted=accepted, rejected=len(errors), errors=errors)
+
+
+@app.post("/throws/bulk", response_model=BulkThrowsOut)
+async def create_throws_bulk(request: Request) -> BulkThrowsOut:
+    """Insert many throws from a JSON array or ``application/x-ndjson`` stream.
+
+    Rows are committed in batches of ``BULK_CHUNK_SIZE`` as they arrive; invalid rows
+    are rejected individually and reported by their position in the body.
+    """
+    batches: list[ThrowBatchOut] = []
+    rows: list[tuple[int, ThrowImport]] = []
+    invalid: list[ThrowRowError] = []
+    async for index, raw in _bulk_rows(request):
+        if raw is None:
+            invalid.append(ThrowRowError(index=index, detail="invalid JSON"))
+        else:
+            try:
+                rows.append((index, ThrowImport.model_validate(raw)))
+            except ValidationError as exc:
+                err = exc.errors()[0]
+                field = ".".join(str(part) for part in err["loc"])
+                invalid.append(ThrowRowError(index=index, detail=f"{field}: {err['msg']}" if field else err["msg"]))
+        if len(rows) + len(invalid) >= BULK_CHUNK_SIZE:
+            batches.append(await run_in_threadpool(_store_batch, rows, invalid))
+            rows, invalid = [], []
+    if rows or invalid:
+        batches.append(await run_in_threadpool(_store_batch, rows, invalid))
+    return BulkThrowsOut(
+        accepted=sum(batch.accepted for batch in batches),
+        rejected=sum(batch.rejected for batch in batches),
+        batches=batches,
+    )
+
+
 @app.delete("/throws/{user_id}")
 def clear_throws(user_id: str) -> dict[str, object]:
     """Clear all throws for a user (resets their heatmap)."""
@@ -320,8 +537,46 @@ def clear_throws(user_id: str) -> dict[str, object]:
     return {"user_id": user_id, "deleted": deleted}
 
 
+@contextmanager
+def _capture_errors() -> Iterator[None]:
+    try:
+        yield
+    except CaptureUnavailable as exc:
+        raise HTTPException(status_code=503, detail=str(exc)) from exc
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    except RuntimeError as exc:
+        raise HTTPException(status_code=409, detail=str(exc)) from exc
+
+
+def _capture_source(source: str | None) -> str | None:
+    """A requested capture source; files must be inside DARTBOARD_VIDEO_DIR."""
+    if source is None:
+        return None
+    with _capture_errors():
+        if source_kind(source) != "file":
+            return source
+        return str(resolve_video_file(VIDEO_DIR, source))
+
+
+def _existing_board(board_id: str):
+    """Pipeline of a board that has been started before (the default board always exists)."""
+    with _capture_errors():
+        pipeline = capture_boards.board(board_id) if board_id == DEFAULT_BOARD else capture_boards.get(board_id)
+    if pipeline is None:
+        raise HTTPException(status_code=404, detail="board not found")
+    return pipeline
+
+
+@app.get("/boards", response_model=list[CaptureStatusOut])
+def list_boards() -> list[CaptureStatusOut]:
+    """Capture status of every board that has been started, including CPU use per pipeline."""
+    return [CaptureStatusOut(**capture_boards.status(board_id)) for board_id in capture_boards.board_ids()]
+
+
 @app.post("/capture/start", response_model=CaptureStatusOut)
-def start_capture(payload: CaptureStartRequest) -> CaptureStatusOut:
+@app.post("/boards/{board_id}/capture/start", response_model=CaptureStatusOut)
+def start_capture(payload: CaptureStartRequest, board_id: str = DEFAULT_BOARD) -> CaptureStatusOut:
     if store.get_user(payload.user_id) is None:
         raise HTTPException(status_code=404, detail="user not found")
 
@@ -331,123 +586,357 @@ def start_capture(payload: CaptureStartRequest) -> CaptureStatusOut:
     if sess.user_id != payload.user_id:
         raise HTTPException(status_code=400, detail="session does not belong to user")
 
-    try:
-        status = capture_manager.start_capture(
+    with _capture_errors():
+        status = capture_boards.start_capture(
+            board_id,
             user_id=payload.user_id,
             session_id=payload.session_id,
             camera_index=payload.camera_index,
             fps=payload.fps,
+            source=_capture_source(payload.source),
         )
-    except RuntimeError as exc:
-        raise HTTPException(status_code=409, detail=str(exc)) from exc
-
-    return CaptureStatusOut(**status)
+    return CaptureStatusOut(**{**status, "board_id": board_id})
 
 
 @app.post("/capture/stop", response_model=CaptureStatusOut)
-def stop_capture() -> CaptureStatusOut:
-    status = capture_manager.stop_capture()
-    return CaptureStatusOut(**status)
+@app.post("/boards/{board_id}/capture/stop", response_model=CaptureStatusOut)
+def stop_capture(board_id: str = DEFAULT_BOARD) -> CaptureStatusOut:
+    pipeline = _existing_board(board_id)
+    with _capture_errors():
+        status = pipeline.stop_capture()
+    return CaptureStatusOut(**{**status, "board_id": board_id})
 
 
 @app.post("/capture/preview", response_model=CaptureStatusOut)
-def start_preview(payload: PreviewStartRequest) -> CaptureStatusOut:
+@app.post("/boards/{board_id}/capture/preview", response_model=CaptureStatusOut)
+def start_preview(payload: PreviewStartRequest, board_id: str = DEFAULT_BOARD) -> CaptureStatusOut:
     """Start camera preview without recording data (for alignment)."""
-    try:
-        status = capture_manager.start_preview(
+    with _capture_errors():
+        status = capture_boards.start_preview(
+            board_id,
             camera_index=payload.camera_index,
             fps=payload.fps,
+            source=_capture_source(payload.source),
         )
-    except RuntimeError as exc:
-        raise HTTPException(status_code=409, detail=str(exc)) from exc
-    return CaptureStatusOut(**status)
+    return CaptureStatusOut(**{**status, "board_id": board_id})
+
+
+@app.delete("/boards/{board_id}")
+def delete_board(board_id: str) -> dict[str, object]:
+    """Stop a board's capture and forget the board."""
+    _existing_board(board_id)
+    with _capture_errors():
+        capture_boards.remove(board_id)
+    return {"board_id": board_id, "deleted": True}
 
 
 @app.get("/capture/status", response_model=CaptureStatusOut)
-def capture_status() -> CaptureStatusOut:
-    status = capture_manager.status()
-    return CaptureStatusOut(**status)
-
-
-def _generate_mjpeg_stream():
-    """Generator that yields MJPEG frames for live streaming."""
-    while True:
-        frame = capture_manager.get_latest_frame()
-        if frame is not None:
-            yield (
-                b"--frame\r\n"
-                b"Content-Type: image/jpeg\r\n\r\n" + frame + b"\r\n"
-            )
-        else:
-            # No frame available, send a small delay
-            time.sleep(0.1)
-        # Small delay to avoid overwhelming the client
-        time.sleep(0.03)
+@app.get("/boards/{board_id}/capture/status", response_model=CaptureStatusOut)
+def capture_status(board_id: str = DEFAULT_BOARD) -> CaptureStatusOut:
+    _existing_board(board_id)
+    return CaptureStatusOut(**capture_boards.status(board_id))
+
+
+def _calibration_out(record: CalibrationRecord) -> CalibrationOut:
+    calibration = BoardCalibration.from_record(record)
+    return CalibrationOut(**asdict(record), roi=calibration.roi)
+
+
+@app.put("/calibration/{camera_index}", response_model=CalibrationOut)
+def save_calibration(camera_index: int, payload: CalibrationCreate) -> CalibrationOut:
+    """Fit and store the camera-to-board homography used by the next capture on this camera."""
+    try:
+        calibration = BoardCalibration.fit(
+            [(p.image_x, p.image_y) for p in payload.points],
+            [(p.board_x, p.board_y) for p in payload.points],
+            (payload.frame_width, payload.frame_height),
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    record = store.save_calibration(
+        camera_index,
+        calibration.homography.ravel().tolist(),
+        payload.frame_width,
+        payload.frame_height,
+        calibration.reprojection_error,
+    )
+    return _calibration_out(record)
+
+
+@app.get("/calibration/{camera_index}", response_model=CalibrationOut)
+def get_calibration(camera_index: int) -> CalibrationOut:
+    record = store.get_calibration(camera_index)
+    if record is None:
+        raise HTTPException(status_code=404, detail="camera not calibrated")
+    return _calibration_out(record)
 
 
 @app.get("/capture/stream")
-def capture_stream():
-    """MJPEG live video stream from the capture camera."""
-    status = capture_manager.status()
+@app.get("/boards/{board_id}/capture/stream")
+async def capture_stream(
+    fps: float | None = Query(default=None, gt=0, le=60),
+    width: int | None = Query(default=None, ge=MIN_STREAM_WIDTH, le=MAX_STREAM_WIDTH),
+    quality: int = Query(default=DEFAULT_QUALITY, ge=10, le=95),
+    board_id: str = DEFAULT_BOARD,
+):
+    """MJPEG live video stream from the capture camera.
+
+    ``fps``, ``width`` and ``quality`` lower the rate, resolution or JPEG quality for
+    this viewer; viewers asking for the same width and quality share one encode.
+    """
+    pipeline = _existing_board(board_id)
+    status = pipeline.status()
     if not status.get("running"):
         raise HTTPException(status_code=404, detail="Capture not running")
     return StreamingResponse(
-        _generate_mjpeg_stream(),
-        media_type="multipart/x-mixed-replace; boundary=frame",
+        mjpeg_stream(pipeline.frames, StreamVariant(width=width, quality=quality), fps),
+        media_type=f"multipart/x-mixed-replace; boundary={MJPEG_BOUNDARY}",
     )
 
 
 @app.get("/checkout/{score}", response_model=CheckoutSuggestion)
-def checkout(score: int) -> CheckoutSuggestion:
-    combos = suggest_checkout(score)
+def checkout(
+    score: int,
+    darts: int = Query(default=MAX_DARTS, ge=1, le=MAX_DARTS),
+    out_rule: OutRule = "double",
+) -> CheckoutSuggestion:
+    combos = checkout_table.suggest(score, darts=darts, out_rule=out_rule)
     if not combos:
         raise HTTPException(status_code=404, detail="No checkout combinations for score")
-    return CheckoutSuggestion(score=score, combinations=combos)
+    return CheckoutSuggestion(score=score, darts=darts, out_rule=out_rule, combinations=combos)
 
 
 @app.get("/advice/{user_id}/{current_score}", response_model=FinishAdviceOut)
-def finish_advice(user_id: str, current_score: int) -> FinishAdviceOut:
+def finish_advice(
+    user_id: str,
+    current_score: int,
+    darts: int = Query(default=MAX_DARTS, ge=1, le=MAX_DARTS),
+    out_rule: OutRule = "double",
+) -> FinishAdviceOut:
     if store.get_user(user_id) is None:
         raise HTTPException(status_code=404, detail="user not found")
-    combos = suggest_checkout(current_score)
+    model = player_models.get(user_id)
+    combos, probabilities = model.rank_checkouts(checkout_table, current_score, darts=darts, out_rule=out_rule)
     return FinishAdviceOut(
         user_id=user_id,
         current_score=current_score,
+        darts=darts,
+        out_rule=out_rule,
         can_finish=bool(combos),
         combinations=combos,
+        finish_probabilities=probabilities,
+    )
+
+
+_EPOCH_DAY = date(1970, 1, 1)
+
+
+@app.get("/stats/{user_id}", response_model=PlayerStatsOut)
+def player_stats(
+    user_id: str,
+    session_id: str | None = None,
+    since: date | None = None,
+    until: date | None = None,
+) -> PlayerStatsOut:
+    """Hit rates and per-segment shares from the rollup tables (``until`` is exclusive).
+
+    Date filters read the daily rollup and also return per-day throw counts.
+    """
+    if store.get_user(user_id) is None:
+        raise HTTPException(status_code=404, detail="user not found")
+    dated = since is not None or until is not None
+    if dated and session_id is not None:
+        raise HTTPException(status_code=422, detail="session_id cannot be combined with since/until")
+    since_day = (since - _EPOCH_DAY).days if since is not None else None
+    until_day = (until - _EPOCH_DAY).days if until is not None else None
+
+    summary = summarize_hits(store.segment_hits(user_id, session_id, since_day, until_day))
+    days = []
+    if dated:
+        days = [
+            DailyThrowsOut(day=(_EPOCH_DAY + timedelta(days=day)).isoformat(), throws=throws)
+            for day, throws in store.daily_throw_counts(user_id, since_day, until_day)
+        ]
+    return PlayerStatsOut(
+        user_id=user_id,
+        session_id=session_id,
+        since=since.isoformat() if since is not None else None,
+        until=until.isoformat() if until is not None else None,
+        throw_count=summary.throw_count,
+        average_score=summary.average_score,
+        double_rate=summary.double_rate,
+        treble_rate=summary.treble_rate,
+        bull_rate=summary.bull_rate,
+        miss_rate=summary.miss_rate,
+        segments=[SegmentStatsOut(label=s.label, hits=s.hits, share=s.share) for s in summary.segments],
+        days=days,
     )
 
 
-@app.get("/heatmap/{user_id}.png")
-def user_heatmap_png(user_id: str) -> Response:
+@app.get("/strategy/{user_id}/{score}", response_model=AimAdviceOut)
+def aim_advice(
+    user_id: str,
+    score: int,
+    darts_left: int = Query(default=DARTS_PER_VISIT, ge=1, le=DARTS_PER_VISIT),
+    scored_this_visit: int = Query(default=0, ge=0),
+    out_rule: OutRule = "double",
+) -> AimAdviceOut:
+    """Where to aim the next dart, from the player's solved whole-game policy."""
     if store.get_user(user_id) is None:
         raise HTTPException(status_code=404, detail="user not found")
+    policy, personalised = strategies.get(user_id, out_rule)
+    if policy is None:
+        raise HTTPException(
+            status_code=503,
+            detail="strategy is being solved, retry shortly",
+            headers={"Retry-After": "1"},
+        )
+    try:
+        aim, expected = policy.advise(score, darts_left=darts_left, scored_this_visit=scored_this_visit)
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc)) from exc
+    return AimAdviceOut(
+        user_id=user_id,
+        score=score,
+        darts_left=darts_left,
+        scored_this_visit=scored_this_visit,
+        out_rule=out_rule,
+        aim=aim,
+        expected_darts=expected,
+        personalised=personalised,
+    )
+
 
-    throws = store.list_throws_for_user(user_id)
-    points = [(t.x_norm, t.y_norm) for t in throws]
-    image = render_heatmap(points)
-    return Response(content=image, media_type="image/png")
+class _ImageFormatConvertor(Convertor):
+    regex = "|".join(MEDIA_TYPES)
+
+    def convert(self, value: str) -> str:
+        return value
+
+    def to_string(self, value: str) -> str:
+        return value
+
+
+# Only known extensions route to the image endpoint, so ids containing dots still
+# reach the JSON /heatmap/{user_id} route.
+register_url_convertor("image_format", _ImageFormatConvertor())
+
+
+def _not_modified(request: Request, etag: str, last_modified: datetime | None) -> bool:
+    """Evaluate If-None-Match, falling back to If-Modified-Since (RFC 9110 13.2.2)."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [tag.strip() for tag in if_none_match.split(",")]
+        return "*" in tags or etag in tags or f"W/{etag}" in tags
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is None or last_modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    return last_modified.replace(microsecond=0) <= since
+
+
+@app.get("/heatmap/{user_id}.{image_format:image_format}")
+def user_heatmap_image(
+    request: Request,
+    user_id: str,
+    image_format: ImageFormat,
+    session_id: str | None = None,
+    weighted: bool = False,
+    size: int = Query(default=DEFAULT_SIZE, ge=MIN_SIZE, le=MAX_SIZE),
+    theme: ThemeName = "classic",
+) -> Response:
+    """Heatmap image (png/jpg/webp); ``weighted`` scales each throw by its detection confidence.
+
+    Responses carry an ETag derived from the stored throws' highest id and count, so
+    polling clients get 304 until a throw lands or is cleared (by any worker), and
+    encoded images are shared across requests.
+    """
+    if store.get_user(user_id) is None:
+        raise HTTPException(status_code=404, detail="user not found")
+    if session_id is not None:
+        sess = store.get_session(session_id)
+        if sess is None or sess.user_id != user_id:
+            raise HTTPException(status_code=404, detail="session not found")
+
+    watermark = store.throw_watermark(user_id, session_id)
+    key = (user_id, session_id, *watermark, size, theme, weighted, image_format)
+    etag = '"' + hashlib.sha1(repr(key).encode("utf-8")).hexdigest()[:24] + '"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    latest = store.latest_throw(user_id, session_id)
+    last_modified = None
+    if latest is not None:
+        last_modified = datetime.fromisoformat(latest.ts).astimezone(timezone.utc)
+        headers["Last-Modified"] = format_datetime(last_modified, usegmt=True)
+
+    if _not_modified(request, etag, last_modified):
+        return Response(status_code=304, headers=headers)
+
+    grid = density_grids.get(user_id, session_id, watermark)
+    image = heatmap_images.get_or_render(
+        key,
+        lambda: render_density(grid.weighted if weighted else grid.counts, size, theme, image_format),
+    )
+    return Response(content=image, media_type=MEDIA_TYPES[image_format], headers=headers)
+
+
+def _point(throw: ThrowRecord) -> dict[str, object]:
+    return {
+        "id": throw.id,
+        "x_norm": throw.x_norm,
+        "y_norm": throw.y_norm,
+        "confidence": throw.confidence,
+        "session_id": throw.session_id,
+        "ts": throw.ts,
+    }
+
+
+def _utc_iso(value: datetime | None) -> str | None:
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).isoformat()
 
 
 @app.get("/heatmap/{user_id}")
-def user_heatmap(user_id: str) -> dict[str, object]:
+def user_heatmap(
+    user_id: str,
+    request: Request,
+    session_id: str | None = None,
+    after_id: int = Query(default=0, ge=0),
+    limit: int = Query(default=MAX_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    since: datetime | None = None,
+    until: datetime | None = None,
+    stream: bool = False,
+) -> Response:
+    """Throw points for a user, oldest first.
+
+    Pages are keyset-paginated and hold at most ``limit`` points (``MAX_PAGE_SIZE``
+    by default): pass the returned ``next_after_id`` as ``after_id``. With ``stream=true`` (or ``Accept: application/x-ndjson``) every matching point is
+    streamed as NDJSON, read from the database in fixed-size batches.
+    """
     if store.get_user(user_id) is None:
         raise HTTPException(status_code=404, detail="user not found")
+    filters = {"session_id": session_id, "since": _utc_iso(since), "until": _utc_iso(until)}
 
-    throws = store.list_throws_for_user(user_id)
-    points = [
+    if stream or "application/x-ndjson" in request.headers.get("accept", ""):
+        def lines():
+            for batch in store.iter_throw_batches(user_id, after_id=after_id, batch_size=STREAM_BATCH_SIZE, **filters):
+                yield "".join(json.dumps(_point(t)) + "\n" for t in batch).encode("utf-8")
+
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    throws = store.list_throws(user_id, after_id=after_id, limit=limit, **filters)
+    points = [_point(t) for t in throws]
+    return JSONResponse(
         {
-            "x_norm": t.x_norm,
-            "y_norm": t.y_norm,
-            "confidence": t.confidence,
-            "session_id": t.session_id,
-            "ts": t.ts,
+            "user_id": user_id,
+            "throw_count": len(points),
+            "points": points,
+            "next_after_id": throws[-1].id if len(throws) == limit else None,
+            "heatmap_png": f"/heatmap/{user_id}.png",
         }
-        for t in throws
-    ]
-    return {
-        "user_id": user_id,
-        "throw_count": len(points),
-        "points": points,
-        "heatmap_png": f"/heatmap/{user_id}.png",
-    }
+    )
@@ -0,0 +1,141 @@
+"""Dartboard geometry in normalized image coordinates.
+
+Board positions use the same frame as stored throws and the heatmap: ``(0, 0)`` is the
+top-left corner, the board is centred at ``(0.5, 0.5)`` with its double ring at
+``BOARD_RADIUS``. Throw codes index into :data:`THROW_LABELS` (the checkout encoding);
+anything outside the doubles is :data:`MISS`.
+
+:func:`classify` is the exact polar reference. :func:`lookup` answers from a
+precomputed ``RASTER_SIZE`` square raster of codes, which turns classification into
+one index computation and one gather per point (no trigonometry), for bulk work
+such as stats over a whole throw history.
+"""
+from __future__ import annotations
+
+from functools import lru_cache
+
+import numpy as np
+
+from .checkout import ALL_THROWS
+
+# Dartboard ring radii as fraction of board radius
+DOUBLE_OUTER = 1.0
+DOUBLE_INNER = 0.935
+TRIPLE_OUTER = 0.63
+TRIPLE_INNER = 0.565
+OUTER_BULL = 0.16
+INNER_BULL = 0.065
+
+BOARD_CENTER = 0.5
+BOARD_RADIUS = 0.48
+
+# Segment order (clockwise from top), angles in image space (y down, degrees).
+SEGMENTS = (20, 1, 18, 4, 13, 6, 10, 15, 2, 17, 3, 19, 7, 16, 8, 11, 14, 9, 12, 5)
+SEGMENT_ANGLE = 360 / 20
+START_ANGLE = -99  # Offset so 20 is at top
+
+THROW_LABELS: tuple[str, ...] = tuple(ALL_THROWS)
+MISS = len(THROW_LABELS)
+SINGLE_BASE, DOUBLE_BASE, TRIPLE_BASE = 0, 20, 40
+SINGLE_BULL, DOUBLE_BULL = THROW_LABELS.index("SB"), THROW_LABELS.index("DB")
+
+# Score of every code, MISS included; labels as an array for vectorized lookups.
+THROW_SCORES = np.array([ALL_THROWS[label] for label in THROW_LABELS] + [0], dtype=np.int16)
+CODE_LABELS = np.array([*THROW_LABELS, "MISS"])
+
+# Lookup raster resolution: one cell is 1/RASTER_SIZE of the image side (about
+# 0.17 mm on a regulation board), far below the width of a dart tip. int8 codes
+# keep the raster at 4 MiB.
+RASTER_SIZE = 2048
+
+_SEGMENT_NUMBERS = np.array(SEGMENTS, dtype=np.int16)
+
+
+def classify(x_norm: np.ndarray, y_norm: np.ndarray) -> np.ndarray:
+    """Map arrays of normalized coordinates to throw codes (``MISS`` off the board)."""
+    dx = (np.asarray(x_norm, dtype=np.float64) - BOARD_CENTER) / BOARD_RADIUS
+    dy = (np.asarray(y_norm, dtype=np.float64) - BOARD_CENTER) / BOARD_RADIUS
+    r = np.hypot(dx, dy)
+    angle = (np.degrees(np.arctan2(dy, dx)) - START_ANGLE) % 360.0
+    number = _SEGMENT_NUMBERS[(angle // SEGMENT_ANGLE).astype(np.intp) % 20] - 1
+
+    codes = np.full(r.shape, MISS, dtype=np.int16)
+    codes = np.where(r <= DOUBLE_OUTER, DOUBLE_BASE + number, codes)
+    codes = np.where(r < DOUBLE_INNER, SINGLE_BASE + number, codes)
+    codes = np.where(r <= TRIPLE_OUTER, TRIPLE_BASE + number, codes)
+    codes = np.where(r < TRIPLE_INNER, SINGLE_BASE + number, codes)
+    codes = np.where(r <= OUTER_BULL, SINGLE_BULL, codes)
+    codes = np.where(r <= INNER_BULL, DOUBLE_BULL, codes)
+    return codes.astype(np.int16)
+
+
+def code_raster(size: int = RASTER_SIZE) -> np.ndarray:
+    """Read-only ``(size, size)`` int8 raster of :func:`classify` at cell centres, indexed ``[y, x]``."""
+    return _code_raster(size)
+
+
+@lru_cache(maxsize=4)
+def _code_raster(size: int) -> np.ndarray:
+    centres = (np.arange(size, dtype=np.float64) + 0.5) / size
+    raster = np.empty((size, size), dtype=np.int8)
+    for row, y in enumerate(centres):
+        raster[row] = classify(centres, np.full(size, y))
+    raster.flags.writeable = False
+    return raster
+
+
+def lookup(x_norm: np.ndarray, y_norm: np.ndarray, size: int = RASTER_SIZE) -> np.ndarray:
+    """Throw codes for arrays of normalized coordinates via :func:`code_raster`.
+
+    Agrees with :func:`classify` except within half a raster cell of a wire.
+    """
+    flat = code_raster(size).ravel()
+    shape = np.shape(x_norm)
+    col = np.array(x_norm, dtype=np.float64, ndmin=1) * size
+    row = np.array(y_norm, dtype=np.float64, ndmin=1) * size
+    np.clip(col, 0, size - 1, out=col)
+    np.clip(row, 0, size - 1, out=row)
+    index = row.astype(np.intp)
+    index *= size
+    index += col.astype(np.intp)
+    return flat.take(index).reshape(shape)
+
+
+def code_at(x_norm: float, y_norm: float, size: int = RASTER_SIZE) -> int:
+    """Scalar :func:`lookup` for single throws, without array setup."""
+    col = min(max(int(x_norm * size), 0), size - 1)
+    row = min(max(int(y_norm * size), 0), size - 1)
+    return int(_code_raster(size)[row, col])
+
+
+def labels(codes: np.ndarray) -> np.ndarray:
+    """Segment labels (``"T20"``, ``"S5"``, ``"MISS"``) for an array of codes."""
+    return CODE_LABELS[np.asarray(codes, dtype=np.intp)]
+
+
+def scores(codes: np.ndarray) -> np.ndarray:
+    """Points scored for an array of codes (``MISS`` scores 0)."""
+    return THROW_SCORES[np.asarray(codes, dtype=np.intp)]
+
+
+def aim_points() -> np.ndarray:
+    """Nominal aim point for every throw code as a ``(len(THROW_LABELS), 2)`` array.
+
+    Singles aim at the middle of the larger outer single bed, doubles and trebles at
+    the middle of their ring, the outer bull just above centre and the inner bull at it.
+    """
+    points = np.full((len(THROW_LABELS), 2), BOARD_CENTER, dtype=np.float64)
+    rings = (
+        (SINGLE_BASE, (TRIPLE_OUTER + DOUBLE_INNER) / 2),
+        (DOUBLE_BASE, (DOUBLE_INNER + DOUBLE_OUTER) / 2),
+        (TRIPLE_BASE, (TRIPLE_INNER + TRIPLE_OUTER) / 2),
+    )
+    for idx, number in enumerate(SEGMENTS):
+        theta = np.radians(START_ANGLE + (idx + 0.5) * SEGMENT_ANGLE)
+        for base, ring in rings:
+            points[base + number - 1] = (
+                BOARD_CENTER + BOARD_RADIUS * ring * np.cos(theta),
+                BOARD_CENTER + BOARD_RADIUS * ring * np.sin(theta),
+            )
+    points[SINGLE_BULL, 1] -= BOARD_RADIUS * (INNER_BULL + OUTER_BULL) / 2
+    return points
@@ -0,0 +1,154 @@
+"""Camera-to-board calibration.
+
+A calibration is a homography from camera-frame pixels (the square-cropped frames
+the capture pipeline publishes, as shown by ``/capture/stream``) to the normalized
+board coordinates of :mod:`board`. It is fitted from four or more reference points
+whose board position is known, e.g. the outer edge of the double ring in the
+middle of segments 20, 6, 3 and 11 (:data:`REFERENCE_POINTS`).
+
+:class:`BoardCalibration` precomputes, once, the ``cv2.remap`` maps that warp a
+camera frame into a ``size`` x ``size`` image of the board square alone. Detection
+runs on that rectified image, so the wall and the thrower are never processed (only
+the board's bounding box is even converted to grayscale) and every rectified pixel
+maps to board coordinates without further transforms. Pixel thresholds meant for
+camera frames, like the detector's minimum motion area, are converted with
+:meth:`BoardCalibration.rectified_area`.
+"""
+from __future__ import annotations
+
+from collections.abc import Sequence
+
+import cv2
+import numpy as np
+
+from .board import BOARD_CENTER, BOARD_RADIUS
+from .storage import CalibrationRecord
+
+# Side of the rectified board image. About 0.7 mm per pixel on a regulation board.
+RECTIFIED_SIZE = 512
+
+# Outer double edge in the middle of the top, right, bottom and left segments.
+REFERENCE_POINTS: dict[str, tuple[float, float]] = {
+    "20": (BOARD_CENTER, BOARD_CENTER - BOARD_RADIUS),
+    "6": (BOARD_CENTER + BOARD_RADIUS, BOARD_CENTER),
+    "3": (BOARD_CENTER, BOARD_CENTER + BOARD_RADIUS),
+    "11": (BOARD_CENTER - BOARD_RADIUS, BOARD_CENTER),
+}
+
+
+def fit_homography(
+    image_points: Sequence[tuple[float, float]],
+    board_points: Sequence[tuple[float, float]],
+) -> tuple[np.ndarray, float]:
+    """Homography from image pixels to board coordinates and its RMS reprojection error.
+
+    The error is in normalized board units. Raises ValueError for fewer than four
+    point pairs or a degenerate (e.g. collinear) set.
+    """
+    src = np.asarray(image_points, dtype=np.float64).reshape(-1, 2)
+    dst = np.asarray(board_points, dtype=np.float64).reshape(-1, 2)
+    if len(src) != len(dst):
+        raise ValueError("image and board point counts differ")
+    if len(src) < 4:
+        raise ValueError("at least four reference points are required")
+    homography, _ = cv2.findHomography(src, dst, 0)
+    if homography is None or not np.isfinite(homography).all() or abs(np.linalg.det(homography)) < 1e-12:
+        raise ValueError("reference points are degenerate")
+    projected = cv2.perspectiveTransform(src.reshape(-1, 1, 2), homography).reshape(-1, 2)
+    error = float(np.sqrt(((projected - dst) ** 2).sum(axis=1).mean()))
+    return homography, error
+
+
+class BoardCalibration:
+    def __init__(
+        self,
+        homography: np.ndarray,
+        frame_size: tuple[int, int],
+        reprojection_error: float = 0.0,
+        size: int = RECTIFIED_SIZE,
+    ) -> None:
+        self.homography = np.asarray(homography, dtype=np.float64).reshape(3, 3)
+        self.frame_size = frame_size  # (width, height) of the frames it was fitted on
+        self.reprojection_error = reprojection_error
+        self.size = size
+        to_image = np.linalg.inv(self.homography)
+
+        corners = cv2.perspectiveTransform(np.array([[[0, 0]], [[1, 0]], [[1, 1]], [[0, 1]]], np.float64), to_image)
+        # The tolerance keeps corners that land on a pixel edge from widening the box.
+        x0, y0 = np.floor(corners.reshape(-1, 2).min(axis=0) + 1e-3).astype(int)
+        x1, y1 = np.ceil(corners.reshape(-1, 2).max(axis=0) - 1e-3).astype(int)
+        width, height = frame_size
+        x0, y0 = max(0, x0), max(0, y0)
+        x1, y1 = min(width, x1), min(height, y1)
+        if x1 <= x0 or y1 <= y0:
+            raise ValueError("the board is outside the calibrated frame")
+        # Bounding box of the board square in the frame: the only pixels rectify reads.
+        self.roi = (int(x0), int(y0), int(x1 - x0), int(y1 - y0))
+        # Camera pixels the board square covers, which the rectified image spreads over size * size.
+        self._board_area = max(1.0, cv2.contourArea(corners.astype(np.float32)))
+
+        # Board coordinates of every rectified pixel centre, projected into the ROI.
+        centres = (np.arange(size, dtype=np.float64) + 0.5) / size
+        grid = np.stack(np.meshgrid(centres, centres), axis=-1).reshape(-1, 1, 2)
+        image = cv2.perspectiveTransform(grid, to_image).reshape(size, size, 2) - (x0, y0)
+        image = image.astype(np.float32)
+        # Nearest-neighbour fixed-point maps are several times faster than bilinear
+        # ones, and the detector blurs the result anyway.
+        self._map, _ = cv2.convertMaps(image[..., 0], image[..., 1], cv2.CV_16SC2, nninterpolation=True)
+        self._gray: np.ndarray | None = None
+
+    @classmethod
+    def fit(
+        cls,
+        image_points: Sequence[tuple[float, float]],
+        board_points: Sequence[tuple[float, float]],
+        frame_size: tuple[int, int],
+        size: int = RECTIFIED_SIZE,
+    ) -> BoardCalibration:
+        homography, error = fit_homography(image_points, board_points)
+        return cls(homography, frame_size, error, size)
+
+    @classmethod
+    def from_record(cls, record: CalibrationRecord, size: int = RECTIFIED_SIZE) -> BoardCalibration:
+        return cls(
+            np.array(record.homography),
+            (record.frame_width, record.frame_height),
+            record.reprojection_error,
+            size,
+        )
+
+    def rectify(self, frame: np.ndarray, dst: np.ndarray | None = None) -> np.ndarray:
+        """Grayscale ``size`` x ``size`` board image of a BGR ``frame``, into ``dst`` if given.
+
+        Only the ROI is converted to grayscale, into a buffer kept between calls, so
+        one calibration must not rectify from several threads at once.
+        """
+        height, width = frame.shape[:2]
+        if (width, height) != self.frame_size:
+            raise ValueError(
+                f"calibrated for {self.frame_size[0]}x{self.frame_size[1]} frames, got {width}x{height}"
+            )
+        x, y, w, h = self.roi
+        roi = frame[y:y + h, x:x + w]
+        if roi.ndim == 3:
+            self._gray = roi = cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY, dst=self._gray)
+        return cv2.remap(roi, self._map, None, cv2.INTER_NEAREST, dst=dst, borderMode=cv2.BORDER_CONSTANT)
+
+    def rectified_area(self, area_px: float) -> int:
+        """Rectified-image pixels covered by something that covers ``area_px`` camera pixels on the board."""
+        return max(1, round(area_px * self.size * self.size / self._board_area))
+
+    def to_board(self, x_px: float, y_px: float) -> tuple[float, float]:
+        """Board coordinates of a camera-frame pixel."""
+        point = cv2.perspectiveTransform(np.array([[[x_px, y_px]]], np.float64), self.homography)
+        return float(point[0, 0, 0]), float(point[0, 0, 1])
+
+    def rectified_to_board(self, x_norm: float, y_norm: float) -> tuple[float, float]:
+        """Board coordinates of a detector result on the rectified image.
+
+        The detector normalizes pixel positions by ``size - 1``; rectified pixel ``u``
+        covers board ``(u + 0.5) / size``.
+        """
+        scale = (self.size - 1) / self.size
+        offset = 0.5 / self.size
+        return x_norm * scale + offset, y_norm * scale + offset
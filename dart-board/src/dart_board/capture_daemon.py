@@ -0,0 +1,422 @@
+"""Capture in its own process, shared by any number of API workers.
+
+The daemon owns the camera, the capture pipeline and a :class:`FrameRing`. API
+workers connect to it over a Unix socket with :class:`CaptureClient`, which has the
+same interface as :class:`USBCaptureManager`, so ``api.py`` uses either one.
+
+The protocol is one JSON object per line. A request carries ``cmd`` (``status``,
+``start_capture``, ``start_preview``, ``stop`` or ``subscribe``) plus arguments. The
+reply is ``{"ok": true, "status": {...}, "ring": name}`` or ``{"ok": false,
+"error": message}``. A ``subscribe`` connection stays open and receives
+``throws_added`` events for every hit the daemon stores, so each worker's caches
+stay current. Events are queued per subscriber and written by that subscriber's
+own connection thread, never by the store's commit path; a subscriber whose queue
+fills up is disconnected and reconnects.
+
+Run with ``python -m src.dart_board.capture_daemon --socket /tmp/dartboard-capture.sock``.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import queue
+import signal
+import socket
+import socketserver
+import threading
+from dataclasses import asdict, replace
+from pathlib import Path
+
+from .framering import MAX_FRAME_SIDE, RING_SLOTS, FrameRing
+from .ingest import DETECT_SCALE, CaptureState, USBCaptureManager
+from .pipeline import RatePolicy
+from .storage import DartBoardStore, ThrowRecord
+from .streaming import FrameHub
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SOCKET = "/tmp/dartboard-capture.sock"
+REQUEST_TIMEOUT_S = 5.0
+# Ring polling interval in API workers: well under one frame at 60 fps.
+FRAME_POLL_S = 0.004
+_RECONNECT_DELAY_S = 1.0
+# Events queued for one subscriber before it counts as stuck and is disconnected.
+SUBSCRIBER_OUTBOX = 256
+
+
+class CaptureUnavailable(RuntimeError):
+    """Capture cannot be controlled from this process (disabled or daemon unreachable)."""
+
+
+def _encode(payload: dict[str, object]) -> bytes:
+    return json.dumps(payload).encode("utf-8") + b"\n"
+
+
+def _send(wfile, payload: dict[str, object]) -> None:
+    wfile.write(_encode(payload))
+    wfile.flush()
+
+
+def _optional_str(value: object) -> str | None:
+    return None if value is None else str(value)
+
+
+class CaptureDaemon:
+    def __init__(
+        self,
+        socket_path: str,
+        db_path: str,
+        ring: FrameRing,
+        detect_scale: float = DETECT_SCALE,
+        rate_policy: RatePolicy | None = None,
+    ) -> None:
+        self.socket_path = socket_path
+        self.ring = ring
+        self.store = DartBoardStore(db_path)
+        self.store.add_listener(self)
+        self.manager = USBCaptureManager(self.store, frames=ring, detect_scale=detect_scale, rate_policy=rate_policy)
+        self._subscribers: dict[socketserver.StreamRequestHandler, queue.Queue[bytes | None]] = {}
+        self._subscribers_lock = threading.Lock()
+        daemon = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self) -> None:
+                for line in self.rfile:
+                    if not line.strip():
+                        continue
+                    try:
+                        request = json.loads(line)
+                    except ValueError:
+                        _send(self.wfile, {"ok": False, "error": "invalid JSON"})
+                        continue
+                    if request.get("cmd") == "subscribe":
+                        daemon._subscribe(self)
+                        return
+                    _send(self.wfile, daemon.dispatch(request))
+
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        self.server = socketserver.ThreadingUnixStreamServer(socket_path, Handler)
+        self.server.daemon_threads = True
+
+    def dispatch(self, request: dict[str, object]) -> dict[str, object]:
+        cmd = request.get("cmd")
+        try:
+            if cmd == "status":
+                status = self.manager.status()
+            elif cmd == "start_capture":
+                status = self.manager.start_capture(
+                    user_id=str(request["user_id"]),
+                    session_id=str(request["session_id"]),
+                    camera_index=int(request.get("camera_index", 0)),
+                    fps=int(request.get("fps", 10)),
+                    source=_optional_str(request.get("source")),
+                )
+            elif cmd == "start_preview":
+                status = self.manager.start_preview(
+                    camera_index=int(request.get("camera_index", 0)),
+                    fps=int(request.get("fps", 10)),
+                    source=_optional_str(request.get("source")),
+                )
+            elif cmd == "stop":
+                status = self.manager.stop_capture()
+            else:
+                return {"ok": False, "error": f"unknown command {cmd!r}"}
+        except (RuntimeError, KeyError, TypeError, ValueError) as exc:
+            return {"ok": False, "error": str(exc)}
+        return {"ok": True, "status": status, "ring": self.ring.name}
+
+    def _subscribe(self, handler: socketserver.StreamRequestHandler) -> None:
+        """Write queued events to one worker from its connection thread until it goes away."""
+        outbox: queue.Queue[bytes | None] = queue.Queue(SUBSCRIBER_OUTBOX)
+        with self._subscribers_lock:
+            self._subscribers[handler] = outbox
+
+        def watch_disconnect() -> None:
+            try:
+                while handler.rfile.readline():
+                    pass
+            except OSError:
+                pass
+            self._unsubscribe(handler)
+
+        try:
+            _send(handler.wfile, {"ok": True, "ring": self.ring.name})
+            threading.Thread(target=watch_disconnect, name="subscriber-watch", daemon=True).start()
+            while (data := outbox.get()) is not None:
+                handler.wfile.write(data)
+                handler.wfile.flush()
+        except OSError:
+            pass
+        finally:
+            self._unsubscribe(handler)
+
+    def _unsubscribe(self, handler: socketserver.StreamRequestHandler) -> None:
+        with self._subscribers_lock:
+            outbox = self._subscribers.pop(handler, None)
+        if outbox is None:
+            return
+        # Wakes the writer whether it waits on the outbox or on a full socket.
+        try:
+            outbox.put_nowait(None)
+        except queue.Full:
+            pass
+        try:
+            handler.connection.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+    def _broadcast(self, event: dict[str, object]) -> None:
+        """Queue ``event`` for every subscriber; runs on the store's commit path, so never blocks."""
+        data = _encode(event)
+        with self._subscribers_lock:
+            subscribers = list(self._subscribers.items())
+        for handler, outbox in subscribers:
+            try:
+                outbox.put_nowait(data)
+            except queue.Full:
+                logger.warning("capture subscriber fell %d events behind; disconnecting it", SUBSCRIBER_OUTBOX)
+                self._unsubscribe(handler)
+
+    def throws_added(self, throws: list[ThrowRecord]) -> None:
+        self._broadcast({"event": "throws_added", "throws": [asdict(t) for t in throws]})
+
+    def throws_cleared(self, user_id: str) -> None:
+        self._broadcast({"event": "throws_cleared", "user_id": user_id})
+
+    def serve_forever(self) -> None:
+        self.server.serve_forever()
+
+    def close(self) -> None:
+        """Release everything once :meth:`serve_forever` has returned."""
+        self.server.server_close()
+        self.manager.close()
+        self.store.close()
+        self.ring.release()
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+
+class CaptureClient:
+    """Controls a :class:`CaptureDaemon` and re-broadcasts its frames in this worker.
+
+    A poller thread watches the shared ring and, only while this worker has stream
+    viewers, publishes the newest frame to a local :class:`FrameHub` as a zero-copy
+    view. A subscriber thread forwards the daemon's stored hits to this worker's
+    store listeners.
+    """
+
+    def __init__(self, socket_path: str, store: DartBoardStore) -> None:
+        self.socket_path = socket_path
+        self.store = store
+        self.frames = FrameHub()
+        self._ring: FrameRing | None = None
+        self._ring_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._threads = [
+            threading.Thread(target=self._poll_frames, name="capture-frames", daemon=True),
+            threading.Thread(target=self._follow_hits, name="capture-hits", daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def _request(self, payload: dict[str, object]) -> dict[str, object]:
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                sock.settimeout(REQUEST_TIMEOUT_S)
+                sock.connect(self.socket_path)
+                with sock.makefile("rwb") as stream:
+                    _send(stream, payload)
+                    line = stream.readline()
+        except OSError as exc:
+            raise CaptureUnavailable(f"capture daemon unavailable: {exc}") from exc
+        if not line:
+            raise CaptureUnavailable("capture daemon closed the connection")
+        reply = json.loads(line)
+        if not reply.get("ok"):
+            raise RuntimeError(str(reply.get("error")))
+        self._attach(str(reply["ring"]))
+        return dict(reply["status"])
+
+    def _attach(self, name: str) -> FrameRing | None:
+        with self._ring_lock:
+            if self._ring is not None and self._ring.name.lstrip("/") != name.lstrip("/"):
+                self._ring.release()  # daemon restarted with a new ring
+                self._ring = None
+            if self._ring is None:
+                try:
+                    self._ring = FrameRing.attach(name)
+                except (FileNotFoundError, ValueError):
+                    logger.warning("cannot attach frame ring %s", name)
+            return self._ring
+
+    def status(self) -> dict[str, object]:
+        try:
+            return self._request({"cmd": "status"})
+        except CaptureUnavailable as exc:
+            return {**asdict(CaptureState()), "last_error": str(exc)}
+
+    def start_preview(self, camera_index: int = 0, fps: int = 10, source: str | None = None) -> dict[str, object]:
+        return self._request({"cmd": "start_preview", "camera_index": camera_index, "fps": fps, "source": source})
+
+    def start_capture(
+        self, user_id: str, session_id: str, camera_index: int = 0, fps: int = 10, source: str | None = None
+    ) -> dict[str, object]:
+        return self._request(
+            {
+                "cmd": "start_capture",
+                "user_id": user_id,
+                "session_id": session_id,
+                "camera_index": camera_index,
+                "fps": fps,
+                "source": source,
+            }
+        )
+
+    def stop_capture(self) -> dict[str, object]:
+        return self._request({"cmd": "stop"})
+
+    def get_latest_frame(self) -> bytes | None:
+        with self._ring_lock:
+            ring = self._ring
+        return ring.snapshot() if ring is not None else None
+
+    def close(self) -> None:
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout=2.0)
+        with self._ring_lock:
+            if self._ring is not None:
+                self._ring.release()
+                self._ring = None
+
+    def _poll_frames(self) -> None:
+        seq = 0
+        hub_open = False
+        while not self._stop.wait(FRAME_POLL_S):
+            with self._ring_lock:
+                ring = self._ring
+                if ring is None:
+                    continue
+                if ring.is_open != hub_open:
+                    hub_open = ring.is_open
+                    if hub_open:
+                        self.frames.open()
+                    else:
+                        self.frames.close()
+                if not hub_open:
+                    continue
+                latest = ring.latest_seq()
+                if latest == seq or self.frames.subscriber_count == 0:
+                    continue
+                seq = latest
+                view = ring.view(seq)
+                if view is not None:
+                    self.frames.publish(view, still_valid=lambda: ring.is_valid(seq))
+
+    def _follow_hits(self) -> None:
+        while not self._stop.is_set():
+            try:
+                with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                    sock.connect(self.socket_path)
+                    with sock.makefile("rwb") as stream:
+                        _send(stream, {"cmd": "subscribe"})
+                        hello = json.loads(stream.readline() or b"{}")
+                        if hello.get("ring"):
+                            self._attach(str(hello["ring"]))
+                        sock.settimeout(0.5)
+                        while not self._stop.is_set():
+                            try:
+                                line = stream.readline()
+                            except TimeoutError:
+                                continue
+                            if not line:
+                                break
+                            self._dispatch_event(json.loads(line))
+            except (OSError, ValueError):
+                pass
+            self._stop.wait(_RECONNECT_DELAY_S)
+
+    def _dispatch_event(self, event: dict[str, object]) -> None:
+        if event.get("event") == "throws_added":
+            self.store.notify_throws_added([ThrowRecord(**t) for t in event["throws"]])
+        elif event.get("event") == "throws_cleared":
+            self.store.notify_throws_cleared(str(event["user_id"]))
+
+
+class DisabledCaptureManager:
+    """Stand-in used when ``DARTBOARD_CAPTURE_ENABLED`` is false (e.g. cloud deployments)."""
+
+    message = "capture disabled in current deployment"
+
+    def __init__(self) -> None:
+        self.frames = FrameHub()
+
+    def status(self) -> dict[str, object]:
+        return {**asdict(CaptureState()), "last_error": self.message}
+
+    def start_preview(self, camera_index: int = 0, fps: int = 10, source: str | None = None) -> dict[str, object]:
+        raise CaptureUnavailable(self.message)
+
+    def start_capture(
+        self, user_id: str, session_id: str, camera_index: int = 0, fps: int = 10, source: str | None = None
+    ) -> dict[str, object]:
+        raise CaptureUnavailable(self.message)
+
+    def stop_capture(self) -> dict[str, object]:
+        return self.status()
+
+    def get_latest_frame(self) -> bytes | None:
+        return None
+
+    def close(self) -> None:
+        pass
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Dart board capture daemon")
+    parser.add_argument("--socket", default=os.getenv("DARTBOARD_CAPTURE_SOCKET", DEFAULT_SOCKET))
+    parser.add_argument("--db", default=os.getenv("DARTBOARD_DB_PATH", "dartboard.db"))
+    parser.add_argument("--slots", type=int, default=RING_SLOTS)
+    parser.add_argument("--max-side", type=int, default=MAX_FRAME_SIDE)
+    parser.add_argument("--detect-scale", type=float, default=DETECT_SCALE)
+    rate_policy = RatePolicy.from_env()
+    parser.add_argument("--idle-fps", type=int, default=rate_policy.idle_fps)
+    parser.add_argument(
+        "--cpu-budget",
+        type=float,
+        default=rate_policy.cpu_budget_percent,
+        help="percent of one core the capture pipeline may use",
+    )
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    ring = FrameRing.create(
+        name=f"dartboard-{Path(args.socket).stem}-{os.getpid()}",
+        slots=args.slots,
+        height=args.max_side,
+        width=args.max_side,
+    )
+    daemon = CaptureDaemon(
+        args.socket,
+        args.db,
+        ring,
+        detect_scale=args.detect_scale,
+        rate_policy=replace(rate_policy, idle_fps=args.idle_fps, cpu_budget_percent=args.cpu_budget),
+    )
+    # server.shutdown() blocks until serve_forever returns, so it cannot run on the
+    # thread that is serving.
+    signal.signal(signal.SIGTERM, lambda *_: threading.Thread(target=daemon.server.shutdown).start())
+    logger.info("capture daemon listening on %s (ring %s)", args.socket, ring.name)
+    try:
+        daemon.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        daemon.close()
+
+
+if __name__ == "__main__":
+    main()
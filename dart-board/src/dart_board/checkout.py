@@ -25,6 +25,11 @@ def _rank_throw(label: str) -> tuple[int, int, str]:
 
 @lru_cache(maxsize=256)
 def suggest_checkout(score: int, max_darts: int = 3) -> list[list[str]]:
+    """Brute-force double-out suggestions.
+
+    Kept as the reference implementation; request paths use the precomputed
+    tables in :mod:`checkout_table`, which return identical results.
+    """
     if score < 2 or score > 170 or max_darts < 1:
         return []
 
@@ -0,0 +1,182 @@
+"""Precomputed checkout tables.
+
+Every finishing combination for every score, darts-remaining count and out-rule is
+enumerated once and stored as small integer arrays, so lookups are O(1) slices
+instead of a 62x62x21 brute force per request.
+"""
+from __future__ import annotations
+
+import os
+import threading
+from pathlib import Path
+from typing import Literal
+
+import numpy as np
+
+from .checkout import ALL_THROWS, DOUBLES, TRIPLES, _rank_throw
+
+OutRule = Literal["double", "master", "straight"]
+
+OUT_RULES: tuple[OutRule, ...] = ("double", "master", "straight")
+MAX_DARTS = 3
+MAX_SCORE = 180
+MAX_SUGGESTIONS = 20
+
+# Throw codes index into this tuple; -1 pads combinations shorter than MAX_DARTS.
+LABELS: tuple[str, ...] = tuple(ALL_THROWS)
+VALUES = np.array([ALL_THROWS[label] for label in LABELS], dtype=np.int16)
+PAD = -1
+
+TABLE_FORMAT_VERSION = 1
+
+
+def finishing_throws(out_rule: OutRule) -> list[str]:
+    """Labels that may legally land the final dart under an out-rule."""
+    if out_rule == "double":
+        labels = list(DOUBLES) + ["DB"]
+    elif out_rule == "master":
+        labels = list(DOUBLES) + list(TRIPLES) + ["DB"]
+    elif out_rule == "straight":
+        labels = list(ALL_THROWS)
+    else:
+        raise ValueError(f"unknown out rule: {out_rule}")
+    return sorted(labels, key=_rank_throw)
+
+
+def _enumerate(out_rule: OutRule) -> tuple[np.ndarray, np.ndarray]:
+    """Enumerate all combinations for one rule.
+
+    Returns ``(codes, offsets)`` where ``codes`` is a ``(K, 3)`` int16 array ordered
+    by score, then dart count, then the same deterministic preference order used by
+    :func:`checkout.suggest_checkout`. ``offsets[score, n]`` marks where the
+    ``n``-dart finishes for ``score`` start; ``offsets[score, n + 1]`` where they end.
+    """
+    code_of = {label: i for i, label in enumerate(LABELS)}
+    prethrows = [code_of[label] for label in sorted(LABELS, key=_rank_throw)]
+    finishers = [code_of[label] for label in finishing_throws(out_rule)]
+    finisher_values = {code: int(VALUES[code]) for code in finishers}
+
+    buckets: list[list[list[tuple[int, int, int]]]] = [
+        [[] for _ in range(MAX_DARTS)] for _ in range(MAX_SCORE + 1)
+    ]
+    for last in finishers:
+        buckets[finisher_values[last]][0].append((last, PAD, PAD))
+    for first in prethrows:
+        first_value = int(VALUES[first])
+        for last in finishers:
+            buckets[first_value + finisher_values[last]][1].append((first, last, PAD))
+    for first in prethrows:
+        first_value = int(VALUES[first])
+        for second in prethrows:
+            setup = first_value + int(VALUES[second])
+            for last in finishers:
+                buckets[setup + finisher_values[last]][2].append((first, second, last))
+
+    rows: list[tuple[int, int, int]] = []
+    offsets = np.zeros((MAX_SCORE + 1, MAX_DARTS + 1), dtype=np.int32)
+    for score in range(MAX_SCORE + 1):
+        for n in range(MAX_DARTS):
+            offsets[score, n] = len(rows)
+            rows.extend(buckets[score][n])
+        offsets[score, MAX_DARTS] = len(rows)
+
+    return np.array(rows, dtype=np.int16).reshape(-1, MAX_DARTS), offsets
+
+
+class CheckoutTable:
+    """All checkout combinations for scores 0-180, 1-3 darts and each out-rule."""
+
+    def __init__(self, codes: dict[str, np.ndarray], offsets: dict[str, np.ndarray]) -> None:
+        self._codes = codes
+        self._offsets = offsets
+        self._suggestions: dict[str, list[list[list[list[str]]]]] = {
+            rule: self._materialize(rule) for rule in OUT_RULES
+        }
+
+    @classmethod
+    def build(cls) -> CheckoutTable:
+        codes: dict[str, np.ndarray] = {}
+        offsets: dict[str, np.ndarray] = {}
+        for rule in OUT_RULES:
+            codes[rule], offsets[rule] = _enumerate(rule)
+        return cls(codes, offsets)
+
+    @classmethod
+    def load(cls, path: str | Path) -> CheckoutTable:
+        with np.load(path) as packed:
+            if int(packed["version"]) != TABLE_FORMAT_VERSION:
+                raise ValueError(f"unsupported checkout table version in {path}")
+            if tuple(str(label) for label in packed["labels"]) != LABELS:
+                raise ValueError(f"checkout table {path} uses a different throw encoding")
+            codes = {rule: packed[f"{rule}_codes"] for rule in OUT_RULES}
+            offsets = {rule: packed[f"{rule}_offsets"] for rule in OUT_RULES}
+        return cls(codes, offsets)
+
+    def save(self, path: str | Path) -> None:
+        arrays: dict[str, np.ndarray] = {
+            "version": np.array(TABLE_FORMAT_VERSION),
+            "labels": np.array(LABELS),
+        }
+        for rule in OUT_RULES:
+            arrays[f"{rule}_codes"] = self._codes[rule]
+            arrays[f"{rule}_offsets"] = self._offsets[rule]
+        with open(path, "wb") as fh:
+            np.savez_compressed(fh, **arrays)
+
+    def _materialize(self, rule: str) -> list[list[list[list[str]]]]:
+        """Precompute the top suggestions for every (darts, score) pair."""
+        codes = self._codes[rule]
+        offsets = self._offsets[rule]
+        table: list[list[list[list[str]]]] = [[] for _ in range(MAX_DARTS + 1)]
+        for darts in range(1, MAX_DARTS + 1):
+            for score in range(MAX_SCORE + 1):
+                start, end = offsets[score, 0], offsets[score, darts]
+                end = min(end, start + MAX_SUGGESTIONS)
+                table[darts].append(
+                    [[LABELS[c] for c in row if c != PAD] for row in codes[start:end].tolist()]
+                )
+        return table
+
+    def suggest(self, score: int, darts: int = MAX_DARTS, out_rule: OutRule = "double") -> list[list[str]]:
+        """Top suggestions in the same order as the brute-force engine."""
+        if out_rule not in self._suggestions:
+            raise ValueError(f"unknown out rule: {out_rule}")
+        if score < 0 or score > MAX_SCORE or darts < 1:
+            return []
+        return [list(combo) for combo in self._suggestions[out_rule][min(darts, MAX_DARTS)][score]]
+
+    def combination_codes(self, score: int, darts: int = MAX_DARTS, out_rule: OutRule = "double") -> np.ndarray:
+        """Every finishing combination as a ``(K, 3)`` code array (view, do not mutate)."""
+        if out_rule not in self._codes:
+            raise ValueError(f"unknown out rule: {out_rule}")
+        if score < 0 or score > MAX_SCORE or darts < 1:
+            return self._codes[out_rule][:0]
+        offsets = self._offsets[out_rule]
+        return self._codes[out_rule][offsets[score, 0]:offsets[score, min(darts, MAX_DARTS)]]
+
+    def can_finish(self, score: int, darts: int = MAX_DARTS, out_rule: OutRule = "double") -> bool:
+        return len(self.combination_codes(score, darts, out_rule)) > 0
+
+
+_table: CheckoutTable | None = None
+_table_lock = threading.Lock()
+
+
+def get_checkout_table() -> CheckoutTable:
+    """Return the process-wide table.
+
+    If ``DARTBOARD_CHECKOUT_TABLE`` points at a packed file it is loaded (and written
+    on first build), otherwise the table is built in memory.
+    """
+    global _table
+    if _table is None:
+        with _table_lock:
+            if _table is None:
+                path = os.getenv("DARTBOARD_CHECKOUT_TABLE")
+                if path and Path(path).exists():
+                    _table = CheckoutTable.load(path)
+                else:
+                    _table = CheckoutTable.build()
+                    if path:
+                        _table.save(path)
+    return _table
@@ -4,6 +4,7 @@ import time
 from dataclasses import dataclass
 
 import cv2
+import numpy as np
 
 
 @dataclass
@@ -13,42 +14,124 @@ class HitPoint:
     confidence: float
 
 
+# Smallest changed area, in frame pixels, that counts as a hit.
+MIN_MOTION_AREA = 1200
+
+
 class LiveImpactDetector:
     """Lightweight motion-based hit detector for MVP live capture.
 
     This is a placeholder until board-calibrated dart-impact detection is implemented.
+
+    ``scale`` below 1 runs detection on a downscaled copy of each frame; position,
+    area and confidence are mapped back to the full frame. At 0.5 positions match
+    full-resolution detection to within about a pixel and confidence to a few
+    percent; below that the dilation can no longer shrink with the image and
+    small blobs read larger. With ``reuse_buffers`` every
+    intermediate image is written into arrays allocated once per frame size; it is
+    off by default because it measured no faster than allocating at 720p or 1080p
+    (``benchmarks/bench_detector.py``).
+
+    ``motion`` is the share of pixels that changed in the last frame, the signal the
+    capture loop uses to idle on a still board.
     """
 
-    def __init__(self, min_motion_area: int = 1200, cooldown_s: float = 0.35) -> None:
+    def __init__(
+        self,
+        min_motion_area: int = MIN_MOTION_AREA,
+        cooldown_s: float = 0.35,
+        scale: float = 1.0,
+        reuse_buffers: bool = False,
+    ) -> None:
+        if not 0 < scale <= 1:
+            raise ValueError("scale must be in (0, 1]")
         self.min_motion_area = min_motion_area
         self.cooldown_s = cooldown_s
+        self.scale = scale
+        self.reuse_buffers = reuse_buffers
+        # The original 9x9 blur, shrunk with the image so it covers the same area.
+        ksize = max(3, round(9 * scale) | 1)
+        self._ksize = (ksize, ksize)
+        # Likewise the two dilation passes (at least one, to keep joining fragments).
+        self._dilate_iterations = max(1, round(2 * scale))
         self._prev_gray = None
-        self._last_hit_ts = 0.0
-
-    def detect_hit(self, frame) -> HitPoint | None:
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        gray = cv2.GaussianBlur(gray, (9, 9), 0)
-
-        if self._prev_gray is None:
-            self._prev_gray = gray
+        self.motion = 0.0
+        self._last_hit_ts = float("-inf")
+        self._frame_shape: tuple[int, ...] | None = None
+        self._steps: list[tuple[int, int]] = []
+        self._gray_full = self._diff = self._mask = None
+        self._work: list[np.ndarray | None] = []
+        self._blurred: list[np.ndarray | None] = [None, None]
+        self._current = 0
+
+    def _prepare(self, frame: np.ndarray) -> None:
+        """Size the working images for ``frame``; reallocated only when its shape changes."""
+        if frame.shape == self._frame_shape:
+            return
+        self._frame_shape = frame.shape
+        self._prev_gray = None
+        h, w = frame.shape[:2]
+        target = (max(1, round(w * self.scale)), max(1, round(h * self.scale)))
+        # INTER_AREA is several times faster for an exact halving than for other
+        # ratios, so shrink by halves first and finish with one smaller resize.
+        self._steps = []
+        step = (w, h)
+        while step[0] // 2 >= target[0] and step[1] // 2 >= target[1]:
+            step = (step[0] // 2, step[1] // 2)
+            self._steps.append(step)
+        if step != target:
+            self._steps.append(target)
+        self._work = [None] * max(1, len(self._steps))
+        if self.reuse_buffers:
+            small = (target[1], target[0])
+            self._gray_full = np.empty((h, w), np.uint8) if self._steps else None
+            self._work = [np.empty((sh, sw), np.uint8) for sw, sh in self._steps] or [np.empty(small, np.uint8)]
+            self._blurred = [np.empty(small, np.uint8), np.empty(small, np.uint8)]
+            self._diff = np.empty(small, np.uint8)
+            self._mask = np.empty(small, np.uint8)
+
+    def detect_hit(self, frame, ts: float | None = None) -> HitPoint | None:
+        """Check a BGR (or already grayscale) frame against the previous one.
+
+        ``ts`` is the frame time in seconds for the cooldown; live capture leaves it
+        to the monotonic clock, offline video passes the frame's position.
+        """
+        self._prepare(frame)
+        if frame.ndim == 2:
+            gray = frame  # already grayscale, e.g. a rectified board image
+        else:
+            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=self._gray_full if self._steps else self._work[0])
+        for size, dst in zip(self._steps, self._work):
+            gray = cv2.resize(gray, size, dst=dst, interpolation=cv2.INTER_AREA)
+        # Alternate between two blur buffers so the previous frame survives this one.
+        gray = cv2.GaussianBlur(gray, self._ksize, 0, dst=self._blurred[self._current])
+        self._current ^= 1
+        prev_gray, self._prev_gray = self._prev_gray, gray
+
+        if prev_gray is None:
+            self.motion = 0.0
             return None
 
-        diff = cv2.absdiff(self._prev_gray, gray)
-        _, thresh = cv2.threshold(diff, 28, 255, cv2.THRESH_BINARY)
-        thresh = cv2.dilate(thresh, None, iterations=2)
+        diff = cv2.absdiff(prev_gray, gray, dst=self._diff)
+        cv2.threshold(diff, 28, 255, cv2.THRESH_BINARY, dst=diff)
+        self.motion = cv2.countNonZero(diff) / diff.size
+        thresh = cv2.dilate(diff, None, dst=self._mask, iterations=self._dilate_iterations)
 
         contours, _ = cv2.findContours(thresh, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-        self._prev_gray = gray
-
         if not contours:
             return None
 
-        contour = max(contours, key=cv2.contourArea)
-        area = cv2.contourArea(contour)
+        areas = [cv2.contourArea(c) for c in contours]
+        best = max(range(len(areas)), key=areas.__getitem__)
+        contour = contours[best]
+        h, w = gray.shape
+        full_h, full_w = frame.shape[:2]
+        sx, sy = w / full_w, h / full_h
+        area = areas[best] / (sx * sy)
         if area < self.min_motion_area:
             return None
 
-        now = time.monotonic()
+        now = time.monotonic() if ts is None else ts
         if now - self._last_hit_ts < self.cooldown_s:
             return None
 
@@ -58,11 +141,14 @@ class LiveImpactDetector:
 
         cx = moments["m10"] / moments["m00"]
         cy = moments["m01"] / moments["m00"]
+        if self._steps:
+            # Pixel centres of the downscaled image back to full-frame pixels.
+            cx = (cx + 0.5) / sx - 0.5
+            cy = (cy + 0.5) / sy - 0.5
 
-        h, w = gray.shape
-        x_norm = max(0.0, min(1.0, cx / max(w - 1, 1)))
-        y_norm = max(0.0, min(1.0, cy / max(h - 1, 1)))
+        x_norm = max(0.0, min(1.0, cx / max(full_w - 1, 1)))
+        y_norm = max(0.0, min(1.0, cy / max(full_h - 1, 1)))
 
-        confidence = min(1.0, area / float(max(1, w * h * 0.02)))
+        confidence = min(1.0, area / float(max(1, full_w * full_h * 0.02)))
         self._last_hit_ts = now
         return HitPoint(x_norm=x_norm, y_norm=y_norm, confidence=confidence)
@@ -0,0 +1,290 @@
+"""Incrementally maintained heatmap density grids.
+
+Each user has one grid for all throws plus one per session. Grids are updated in
+O(1) per throw through the store listener hooks, so rendering a heatmap never
+rescans history. Grids are written to ``grid_dir`` when evicted, flushed or (with
+``flush_interval_s``) periodically, and caught up from their ``last_id`` when
+loaded again, so a restart (or a crash between flushes) costs only the throws
+stored since the last write. Each read is
+checked against the store's id/count watermark, so throws written or cleared by
+another process (another API worker) are picked up too.
+"""
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import numpy as np
+
+from .heatmap import DEFAULT_SIZE, DENSITY_DOWNSCALE
+from .storage import DartBoardStore, ThrowRecord
+
+logger = logging.getLogger(__name__)
+
+GRID_SIZE = DEFAULT_SIZE // DENSITY_DOWNSCALE
+GRID_FORMAT_VERSION = 1
+
+GridKey = tuple[str, str | None]
+
+
+@dataclass
+class DensityGrid:
+    """Count and confidence-weighted grids for one user or session."""
+
+    counts: np.ndarray
+    weighted: np.ndarray
+    last_id: int = 0
+    throw_count: int = 0
+    dirty: bool = False
+    # Highest id covered by the database load; later ids arrive only via listeners,
+    # possibly out of order, so they are checked against this rather than last_id.
+    loaded_through: int = 0
+    # Ids above loaded_through already added by listeners, skipped by the next catch-up.
+    applied: set[int] = field(default_factory=set)
+
+    @classmethod
+    def empty(cls, grid_size: int = GRID_SIZE) -> DensityGrid:
+        shape = (grid_size, grid_size)
+        return cls(counts=np.zeros(shape, dtype=np.float32), weighted=np.zeros(shape, dtype=np.float32))
+
+    @property
+    def grid_size(self) -> int:
+        return self.counts.shape[0]
+
+    def _cell(self, x_norm: float, y_norm: float) -> tuple[int, int]:
+        scale = self.grid_size - 1
+        return (
+            int(min(max(y_norm, 0.0), 1.0) * scale),
+            int(min(max(x_norm, 0.0), 1.0) * scale),
+        )
+
+    def add(self, throw_id: int, x_norm: float, y_norm: float, confidence: float) -> None:
+        row, col = self._cell(x_norm, y_norm)
+        self.counts[row, col] += 1.0
+        self.weighted[row, col] += confidence
+        self.last_id = max(self.last_id, throw_id)
+        self.throw_count += 1
+        self.dirty = True
+
+    def add_rows(self, rows: list[tuple[int, float, float, float]]) -> None:
+        if not rows:
+            return
+        arr = np.asarray(rows, dtype=np.float64)
+        idx = (np.clip(arr[:, 1:3], 0.0, 1.0) * (self.grid_size - 1)).astype(np.intp)
+        flat = idx[:, 1] * self.grid_size + idx[:, 0]
+        cells = self.grid_size * self.grid_size
+        self.counts += np.bincount(flat, minlength=cells).reshape(self.counts.shape).astype(np.float32)
+        self.weighted += np.bincount(flat, weights=arr[:, 3], minlength=cells).reshape(self.counts.shape).astype(
+            np.float32
+        )
+        self.last_id = max(self.last_id, int(arr[:, 0].max()))
+        self.throw_count += len(rows)
+        self.dirty = True
+
+    def snapshot(self) -> DensityGrid:
+        return DensityGrid(
+            counts=self.counts.copy(),
+            weighted=self.weighted.copy(),
+            last_id=self.last_id,
+            throw_count=self.throw_count,
+        )
+
+    def save(self, path: Path) -> None:
+        tmp = path.with_suffix(".tmp")
+        with open(tmp, "wb") as fh:
+            np.savez_compressed(
+                fh,
+                version=np.array(GRID_FORMAT_VERSION),
+                counts=self.counts,
+                weighted=self.weighted,
+                last_id=np.array(self.last_id),
+                throw_count=np.array(self.throw_count),
+            )
+        os.replace(tmp, path)
+        self.dirty = False
+
+    @classmethod
+    def load(cls, path: Path) -> DensityGrid:
+        with np.load(path) as packed:
+            if int(packed["version"]) != GRID_FORMAT_VERSION:
+                raise ValueError(f"unsupported density grid version in {path}")
+            return cls(
+                counts=packed["counts"],
+                weighted=packed["weighted"],
+                last_id=int(packed["last_id"]),
+                throw_count=int(packed["throw_count"]),
+            )
+
+
+class DensityGridCache:
+    """LRU of per-user and per-session grids, kept current as throws are stored."""
+
+    def __init__(
+        self,
+        store: DartBoardStore,
+        grid_dir: str | Path | None = None,
+        grid_size: int = GRID_SIZE,
+        max_grids: int = 256,
+        flush_interval_s: float | None = None,
+    ) -> None:
+        self.store = store
+        self.grid_dir = Path(grid_dir) if grid_dir else None
+        if self.grid_dir is not None:
+            self.grid_dir.mkdir(parents=True, exist_ok=True)
+        self.grid_size = grid_size
+        self.max_grids = max_grids
+        self._lock = threading.Lock()
+        self._grids: OrderedDict[GridKey, DensityGrid] = OrderedDict()
+        self._stop_event = threading.Event()
+        self._thread: threading.Thread | None = None
+        if self.grid_dir is not None and flush_interval_s:
+            self._thread = threading.Thread(
+                target=self._run, args=(flush_interval_s,), name="density-grid-flush", daemon=True
+            )
+            self._thread.start()
+
+    @staticmethod
+    def _digest(value: str) -> str:
+        return hashlib.sha1(value.encode("utf-8")).hexdigest()[:16]
+
+    def _path(self, key: GridKey) -> Path | None:
+        if self.grid_dir is None:
+            return None
+        user_id, session_id = key
+        suffix = self._digest(session_id) if session_id is not None else "all"
+        return self.grid_dir / f"{self._digest(user_id)}-{suffix}.npz"
+
+    def _load_persisted(self, key: GridKey) -> DensityGrid:
+        path = self._path(key)
+        if path is not None and path.exists():
+            try:
+                grid = DensityGrid.load(path)
+                if grid.grid_size == self.grid_size:
+                    return grid
+            except (OSError, ValueError, KeyError):
+                logger.warning("ignoring unreadable density grid %s", path)
+        return DensityGrid.empty(self.grid_size)
+
+    def get(
+        self, user_id: str, session_id: str | None = None, watermark: tuple[int, int] | None = None
+    ) -> DensityGrid:
+        """Return a snapshot of the grid, caught up with the database.
+
+        ``watermark`` is the store's ``(highest id, count)`` for the grid's throws and is
+        read when not given. A cached grid that does not match it missed throws stored
+        by another process and is caught up, or rebuilt if they were cleared there.
+        """
+        key = (user_id, session_id)
+        if watermark is None:
+            watermark = self.store.throw_watermark(user_id, session_id)
+        with self._lock:
+            grid = self._grids.get(key)
+            if grid is not None:
+                self._grids.move_to_end(key)
+                if (grid.last_id, grid.throw_count) == watermark:
+                    # Every stored id up to last_id is counted, so listener ids need no tracking.
+                    grid.loaded_through = grid.last_id
+                    grid.applied.clear()
+                    return grid.snapshot()
+                self._catch_up_locked(key, grid)
+
+        if grid is None:
+            grid = self._load(key, self._load_persisted(key))
+        if (grid.last_id, grid.throw_count) != self.store.throw_watermark(user_id, session_id):
+            # Still off after catching up, so throws were deleted: counts cannot be
+            # subtracted per throw, start over from the database.
+            grid = self._load(key, DensityGrid.empty(self.grid_size), replace=True)
+        with self._lock:
+            return grid.snapshot()
+
+    def _load(self, key: GridKey, grid: DensityGrid, replace: bool = False) -> DensityGrid:
+        # Bulk load outside the lock, then catch up under it so a throw committed in
+        # between is either in the catch-up rows or delivered to throws_added later.
+        user_id, session_id = key
+        rows = self.store.list_throw_points(user_id, after_id=grid.last_id, session_id=session_id)
+        with self._lock:
+            existing = self._grids.get(key)
+            if existing is not None and not replace:
+                return existing
+            grid.add_rows(rows)
+            grid.loaded_through = grid.last_id
+            self._catch_up_locked(key, grid)
+            if replace:
+                grid.dirty = True
+            self._grids[key] = grid
+            self._grids.move_to_end(key)
+            evicted = self._evict_locked()
+        self._persist(evicted)
+        return grid
+
+    def _catch_up_locked(self, key: GridKey, grid: DensityGrid) -> None:
+        user_id, session_id = key
+        rows = self.store.list_throw_points(user_id, after_id=grid.loaded_through, session_id=session_id)
+        if not rows:
+            return
+        grid.add_rows([row for row in rows if row[0] not in grid.applied])
+        grid.loaded_through = rows[-1][0]
+        grid.applied = {throw_id for throw_id in grid.applied if throw_id > grid.loaded_through}
+
+    def _evict_locked(self) -> list[tuple[GridKey, DensityGrid]]:
+        evicted = []
+        while len(self._grids) > self.max_grids:
+            evicted.append(self._grids.popitem(last=False))
+        return evicted
+
+    def _persist(self, items: list[tuple[GridKey, DensityGrid]]) -> None:
+        for key, grid in items:
+            path = self._path(key)
+            if path is not None and grid.dirty:
+                grid.save(path)
+
+    def flush(self) -> None:
+        """Write every dirty grid to ``grid_dir``.
+
+        Dirty grids are copied under the lock and written outside it, so listener
+        updates on the store's write path never wait for the disk.
+        """
+        if self.grid_dir is None:
+            return
+        with self._lock:
+            dirty = [(key, grid.snapshot()) for key, grid in self._grids.items() if grid.dirty]
+            for key, _ in dirty:
+                self._grids[key].dirty = False
+        for key, snapshot in dirty:
+            snapshot.save(self._path(key))
+
+    def _run(self, interval_s: float) -> None:
+        while not self._stop_event.wait(interval_s):
+            try:
+                self.flush()
+            except OSError:
+                logger.exception("density grid flush failed")
+
+    def close(self) -> None:
+        """Stop periodic flushing and write every dirty grid."""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.flush()
+
+    def throws_added(self, throws: list[ThrowRecord]) -> None:
+        with self._lock:
+            for throw in throws:
+                for key in ((throw.user_id, None), (throw.user_id, throw.session_id)):
+                    grid = self._grids.get(key)
+                    if grid is not None and throw.id > grid.loaded_through and throw.id not in grid.applied:
+                        grid.add(throw.id, throw.x_norm, throw.y_norm, throw.confidence)
+                        grid.applied.add(throw.id)
+
+    def throws_cleared(self, user_id: str) -> None:
+        with self._lock:
+            for key in [k for k in self._grids if k[0] == user_id]:
+                del self._grids[key]
+            if self.grid_dir is not None:
+                for path in self.grid_dir.glob(f"{self._digest(user_id)}-*.npz"):
+                    path.unlink(missing_ok=True)
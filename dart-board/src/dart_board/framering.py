@@ -0,0 +1,150 @@
+"""Shared-memory ring of raw frames between the capture daemon and API workers.
+
+The daemon (the only writer) copies each frame into the next of ``slots`` fixed-size
+slots in a :class:`multiprocessing.shared_memory.SharedMemory` block and then
+advances ``latest_seq`` in the header. Readers in any process map the same block
+and get NumPy views straight into it, without copying.
+
+Each slot carries the sequence number of the frame it holds; the writer negates it
+while the slot is being overwritten. A reader takes a view of ``seq``, uses it, and
+checks :meth:`FrameRing.is_valid` afterwards; if the writer lapped the ring in the
+meantime the result is discarded (a seqlock). With a few slots at camera rates a
+reader has several frame intervals before that can happen.
+"""
+from __future__ import annotations
+
+from multiprocessing import resource_tracker, shared_memory
+
+import cv2
+import numpy as np
+
+MAGIC = 0x44415254  # "DART"
+RING_SLOTS = 4
+MAX_FRAME_SIDE = 1280
+
+# Header: magic, slots, height, width, channels, latest_seq, open flag, reserved.
+_HEADER_FIELDS = 8
+_MAGIC, _SLOTS, _HEIGHT, _WIDTH, _CHANNELS, _LATEST, _OPEN = range(7)
+# Per slot: seq (negative while being written), frame height, frame width, reserved.
+_SLOT_FIELDS = 4
+_ALIGN = 64
+
+
+def _data_offset(slots: int) -> int:
+    meta_end = (_HEADER_FIELDS + slots * _SLOT_FIELDS) * 8
+    return -(-meta_end // _ALIGN) * _ALIGN
+
+
+class FrameRing:
+    def __init__(self, shm: shared_memory.SharedMemory, owner: bool) -> None:
+        self._shm = shm
+        self.owner = owner
+        self._header = np.ndarray((_HEADER_FIELDS,), dtype=np.int64, buffer=shm.buf)
+        if int(self._header[_MAGIC]) != MAGIC:
+            raise ValueError(f"shared memory {shm.name} is not a frame ring")
+        self.slots, self.height, self.width, self.channels = (int(v) for v in self._header[_SLOTS:_CHANNELS + 1])
+        self._meta = np.ndarray(
+            (self.slots, _SLOT_FIELDS), dtype=np.int64, buffer=shm.buf, offset=_HEADER_FIELDS * 8
+        )
+        self._data = np.ndarray(
+            (self.slots, self.height, self.width, self.channels),
+            dtype=np.uint8,
+            buffer=shm.buf,
+            offset=_data_offset(self.slots),
+        )
+        self._seq = int(self._header[_LATEST])
+
+    @classmethod
+    def create(
+        cls,
+        name: str | None = None,
+        slots: int = RING_SLOTS,
+        height: int = MAX_FRAME_SIDE,
+        width: int = MAX_FRAME_SIDE,
+        channels: int = 3,
+    ) -> FrameRing:
+        size = _data_offset(slots) + slots * height * width * channels
+        shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        header = np.ndarray((_HEADER_FIELDS,), dtype=np.int64, buffer=shm.buf)
+        header[:] = (MAGIC, slots, height, width, channels, 0, 0, 0)
+        del header
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name: str) -> FrameRing:
+        shm = shared_memory.SharedMemory(name=name)
+        # Before Python 3.13 attaching registers the block with this process's
+        # resource tracker, which would unlink it when the reader exits.
+        resource_tracker.unregister(shm._name, "shared_memory")  # noqa: SLF001
+        return cls(shm, owner=False)
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    # Writer side; the same interface as FrameHub so the capture manager can feed either.
+
+    def open(self) -> None:
+        self._header[_OPEN] = 1
+
+    def close(self) -> None:
+        self._header[_OPEN] = 0
+
+    def publish(self, frame: np.ndarray) -> None:
+        h, w = frame.shape[:2]
+        if h > self.height or w > self.width:
+            scale = min(self.height / h, self.width / w)
+            frame = cv2.resize(frame, (int(w * scale), int(h * scale)), interpolation=cv2.INTER_AREA)
+            h, w = frame.shape[:2]
+        seq = self._seq + 1
+        slot = seq % self.slots
+        meta = self._meta[slot]
+        meta[0] = -seq
+        self._data[slot, :h, :w] = frame.reshape(h, w, self.channels)
+        meta[1], meta[2] = h, w
+        meta[0] = seq
+        self._header[_LATEST] = seq
+        self._seq = seq
+
+    def snapshot(self) -> bytes | None:
+        seq = self.latest_seq()
+        view = self.view(seq)
+        if view is None:
+            return None
+        ok, jpeg = cv2.imencode(".jpg", view)
+        return jpeg.tobytes() if ok and self.is_valid(seq) else None
+
+    # Reader side.
+
+    @property
+    def is_open(self) -> bool:
+        return bool(self._header[_OPEN])
+
+    def latest_seq(self) -> int:
+        return int(self._header[_LATEST])
+
+    def view(self, seq: int) -> np.ndarray | None:
+        """Zero-copy view of frame ``seq``, or None if it is gone (check :meth:`is_valid` after use)."""
+        if seq <= 0:
+            return None
+        meta = self._meta[seq % self.slots]
+        h, w = int(meta[1]), int(meta[2])
+        if int(meta[0]) != seq:
+            return None
+        return self._data[seq % self.slots, :h, :w]
+
+    def is_valid(self, seq: int) -> bool:
+        return seq > 0 and int(self._meta[seq % self.slots, 0]) == seq
+
+    def release(self) -> None:
+        """Unmap the block (and unlink it when this process created it).
+
+        Views handed out by :meth:`view` must no longer be in use.
+        """
+        self._header = self._meta = self._data = None
+        try:
+            self._shm.close()
+        except BufferError:  # a caller still holds a view; the mapping dies with the process
+            pass
+        if self.owner:
+            self._shm.unlink()
@@ -2,10 +2,26 @@ from __future__ import annotations
 
 import io
 import math
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Literal
 
 import cv2
 import numpy as np
 
+from .board import (
+    BOARD_RADIUS,
+    DOUBLE_INNER,
+    DOUBLE_OUTER,
+    INNER_BULL,
+    OUTER_BULL,
+    SEGMENT_ANGLE,
+    SEGMENTS,
+    START_ANGLE,
+    TRIPLE_INNER,
+    TRIPLE_OUTER,
+)
 
 # Standard dartboard colors
 BLACK = (30, 30, 30)
@@ -14,41 +30,73 @@ RED = (40, 45, 180)
 GREEN = (50, 100, 45)
 WIRE = (120, 120, 120)
 
-# Dartboard ring radii as fraction of board radius
-DOUBLE_OUTER = 1.0
-DOUBLE_INNER = 0.935
-TRIPLE_OUTER = 0.63
-TRIPLE_INNER = 0.565
-OUTER_BULL = 0.16
-INNER_BULL = 0.065
 
+@dataclass(frozen=True)
+class BoardTheme:
+    background: int
+    black: tuple[int, int, int]
+    white: tuple[int, int, int]
+    red: tuple[int, int, int]
+    green: tuple[int, int, int]
+    wire: tuple[int, int, int]
+    text: tuple[int, int, int]
+    colormap: int
 
-def _draw_dartboard(size: int) -> np.ndarray:
+
+ThemeName = Literal["classic", "mono"]
+ImageFormat = Literal["png", "jpg", "webp"]
+
+MEDIA_TYPES: dict[str, str] = {"png": "image/png", "jpg": "image/jpeg", "webp": "image/webp"}
+
+THEMES: dict[str, BoardTheme] = {
+    "classic": BoardTheme(30, BLACK, WHITE, RED, GREEN, WIRE, WHITE, cv2.COLORMAP_JET),
+    "mono": BoardTheme(
+        20, (35, 35, 35), (170, 170, 170), (90, 90, 90), (60, 60, 60), (110, 110, 110), (200, 200, 200),
+        cv2.COLORMAP_INFERNO,
+    ),
+}
+
+DEFAULT_SIZE = 640
+MIN_SIZE = 64
+MAX_SIZE = 2048
+
+# Overlay blend: base * BASE_WEIGHT + heat * HEAT_WEIGHT
+BASE_WEIGHT = 0.55
+HEAT_WEIGHT = 0.45
+
+# Density kernel: one Gaussian (as a fraction of the image size) matching the old
+# filled-circle-plus-blur footprint. Points are binned on a grid DENSITY_DOWNSCALE
+# times coarser than the output image, which the wide kernel makes invisible.
+DENSITY_SIGMA = 0.025
+DENSITY_DOWNSCALE = 4
+MIN_DENSITY_GRID = 64
+
+# Board layers kept for reuse; one MAX_SIZE pair is 24 MiB, a DEFAULT_SIZE pair 2.3 MiB.
+BOARD_LAYER_CACHE_BYTES = 64 * 1024 * 1024
+
+
+def draw_dartboard(size: int, theme: ThemeName = "classic") -> np.ndarray:
     """Draw a realistic dartboard background."""
-    canvas = np.full((size, size, 3), 30, dtype=np.uint8)
+    colors = THEMES[theme]
+    canvas = np.full((size, size, 3), colors.background, dtype=np.uint8)
     center = size // 2
-    radius = int(size * 0.48)  # Board radius
-
-    # Segment order (clockwise from top): 20, 1, 18, 4, 13, 6, 10, 15, 2, 17, 3, 19, 7, 16, 8, 11, 14, 9, 12, 5
-    segments = [20, 1, 18, 4, 13, 6, 10, 15, 2, 17, 3, 19, 7, 16, 8, 11, 14, 9, 12, 5]
-    segment_angle = 360 / 20
-    start_angle = -99  # Offset so 20 is at top
+    radius = int(size * BOARD_RADIUS)
 
     def get_segment_colors(idx: int) -> tuple:
         """Returns (main_color, double_triple_color) for segment index."""
         if idx % 2 == 0:
-            return WHITE, RED
+            return colors.white, colors.red
         else:
-            return BLACK, GREEN
+            return colors.black, colors.green
 
     # Draw outer black ring (outside the doubles)
-    cv2.circle(canvas, (center, center), int(radius * 1.05), BLACK, thickness=-1)
+    cv2.circle(canvas, (center, center), int(radius * 1.05), colors.black, thickness=-1)
 
     # Draw each segment
-    for i, _ in enumerate(segments):
+    for i, _ in enumerate(SEGMENTS):
         main_color, special_color = get_segment_colors(i)
-        angle_start = start_angle + i * segment_angle
-        angle_end = angle_start + segment_angle
+        angle_start = START_ANGLE + i * SEGMENT_ANGLE
+        angle_end = angle_start + SEGMENT_ANGLE
 
         # Draw double ring (outer)
         cv2.ellipse(canvas, (center, center), (int(radius * DOUBLE_OUTER), int(radius * DOUBLE_OUTER)),
@@ -64,55 +112,131 @@ def _draw_dartboard(size: int) -> np.ndarray:
                     0, angle_start, angle_end, main_color, thickness=-1)
 
     # Draw bullseye rings
-    cv2.circle(canvas, (center, center), int(radius * OUTER_BULL), GREEN, thickness=-1)
-    cv2.circle(canvas, (center, center), int(radius * INNER_BULL), RED, thickness=-1)
+    cv2.circle(canvas, (center, center), int(radius * OUTER_BULL), colors.green, thickness=-1)
+    cv2.circle(canvas, (center, center), int(radius * INNER_BULL), colors.red, thickness=-1)
 
     # Draw wire lines (segment dividers)
     for i in range(20):
-        angle_rad = math.radians(start_angle + i * segment_angle)
+        angle_rad = math.radians(START_ANGLE + i * SEGMENT_ANGLE)
         x_end = int(center + radius * DOUBLE_OUTER * math.cos(angle_rad))
         y_end = int(center + radius * DOUBLE_OUTER * math.sin(angle_rad))
-        cv2.line(canvas, (center, center), (x_end, y_end), WIRE, 1)
+        cv2.line(canvas, (center, center), (x_end, y_end), colors.wire, 1)
 
     # Draw wire rings
     for ring_frac in [DOUBLE_OUTER, DOUBLE_INNER, TRIPLE_OUTER, TRIPLE_INNER, OUTER_BULL, INNER_BULL]:
-        cv2.circle(canvas, (center, center), int(radius * ring_frac), WIRE, 1)
+        cv2.circle(canvas, (center, center), int(radius * ring_frac), colors.wire, 1)
 
     # Draw segment numbers
     number_radius = int(radius * 1.12)
     font = cv2.FONT_HERSHEY_SIMPLEX
     font_scale = size / 800
-    for i, num in enumerate(segments):
-        angle_rad = math.radians(start_angle + (i + 0.5) * segment_angle)
+    for i, num in enumerate(SEGMENTS):
+        angle_rad = math.radians(START_ANGLE + (i + 0.5) * SEGMENT_ANGLE)
         x = int(center + number_radius * math.cos(angle_rad))
         y = int(center + number_radius * math.sin(angle_rad))
         text = str(num)
         text_size = cv2.getTextSize(text, font, font_scale, 2)[0]
         cv2.putText(canvas, text, (x - text_size[0] // 2, y + text_size[1] // 2),
-                    font, font_scale, WHITE, 2, cv2.LINE_AA)
+                    font, font_scale, colors.text, 2, cv2.LINE_AA)
 
     return canvas
 
 
-def render_heatmap(points: list[tuple[float, float]], size: int = 640) -> bytes:
-    base = _draw_dartboard(size)
-    acc = np.zeros((size, size), dtype=np.float32)
-
-    for x_norm, y_norm in points:
-        x = int(np.clip(x_norm, 0.0, 1.0) * (size - 1))
-        y = int(np.clip(y_norm, 0.0, 1.0) * (size - 1))
-        cv2.circle(acc, (x, y), int(size * 0.03), 1.0, thickness=-1)
-
-    if np.max(acc) > 0:
-        acc = cv2.GaussianBlur(acc, (0, 0), sigmaX=size * 0.02, sigmaY=size * 0.02)
-        acc = acc / np.max(acc)
-        heat = cv2.applyColorMap((acc * 255).astype(np.uint8), cv2.COLORMAP_JET)
-        overlay = cv2.addWeighted(base, 0.55, heat, 0.45, 0)
+_layers: OrderedDict[tuple[int, str], tuple[np.ndarray, np.ndarray]] = OrderedDict()
+_layers_bytes = 0
+_layers_lock = threading.Lock()
+
+
+def _board_layers(size: int, theme: ThemeName = "classic") -> tuple[np.ndarray, np.ndarray]:
+    """Cached ``(board, board * BASE_WEIGHT)`` for a size and theme, shared by all users.
+
+    Both arrays are read-only; the second is the pre-blended base of the heat overlay.
+    The cache is an LRU bounded by ``BOARD_LAYER_CACHE_BYTES``, since sizes range up
+    to ``MAX_SIZE``.
+    """
+    global _layers_bytes
+    key = (size, theme)
+    with _layers_lock:
+        layers = _layers.get(key)
+        if layers is not None:
+            _layers.move_to_end(key)
+            return layers
+
+    board = draw_dartboard(size, theme)
+    blended = cv2.convertScaleAbs(board, alpha=BASE_WEIGHT)
+    board.flags.writeable = False
+    blended.flags.writeable = False
+    layers = (board, blended)
+    with _layers_lock:
+        if key not in _layers:
+            _layers[key] = layers
+            _layers_bytes += board.nbytes + blended.nbytes
+            # Always keep the newest pair, even one larger than the bound.
+            while _layers_bytes > BOARD_LAYER_CACHE_BYTES and len(_layers) > 1:
+                _, (old_board, old_blended) = _layers.popitem(last=False)
+                _layers_bytes -= old_board.nbytes + old_blended.nbytes
+        return _layers[key]
+
+
+def density_grid(
+    points: np.ndarray,
+    grid_size: int,
+    weights: np.ndarray | None = None,
+) -> np.ndarray:
+    """Bin normalized ``(x, y)`` points into a ``grid_size`` square count grid in one pass."""
+    pts = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    if len(pts) == 0:
+        return np.zeros((grid_size, grid_size), dtype=np.float32)
+    idx = (np.clip(pts, 0.0, 1.0) * (grid_size - 1)).astype(np.intp)
+    flat = idx[:, 1] * grid_size + idx[:, 0]
+    acc = np.bincount(flat, weights=weights, minlength=grid_size * grid_size)
+    return acc.reshape(grid_size, grid_size).astype(np.float32)
+
+
+def _density_image(acc: np.ndarray, size: int) -> np.ndarray | None:
+    """Blur a density grid with a separable Gaussian and scale it to ``size``, in [0, 1]."""
+    if not np.any(acc > 0):
+        return None
+    grid_size = acc.shape[0]
+    sigma = grid_size * DENSITY_SIGMA
+    blurred = cv2.GaussianBlur(acc, (0, 0), sigmaX=sigma, sigmaY=sigma)
+    if grid_size != size:
+        blurred = cv2.resize(blurred, (size, size), interpolation=cv2.INTER_LINEAR)
+    peak = float(blurred.max())
+    if peak <= 0:
+        return None
+    return blurred / peak
+
+
+def render_density(
+    acc: np.ndarray,
+    size: int = DEFAULT_SIZE,
+    theme: ThemeName = "classic",
+    image_format: ImageFormat = "png",
+) -> bytes:
+    """Render an encoded heatmap from a prebuilt density grid (see :func:`density_grid`)."""
+    base, blended_base = _board_layers(size, theme)
+    density = _density_image(acc, size)
+
+    if density is not None:
+        heat = cv2.applyColorMap((density * 255).astype(np.uint8), THEMES[theme].colormap)
+        overlay = cv2.addWeighted(heat, HEAT_WEIGHT, blended_base, 1.0, 0)
     else:
         overlay = base
 
-    success, buf = cv2.imencode(".png", overlay)
+    success, buf = cv2.imencode(f".{image_format}", overlay)
     if not success:
         raise RuntimeError("failed to encode heatmap")
 
     return io.BytesIO(buf.tobytes()).getvalue()
+
+
+def render_heatmap(
+    points: list[tuple[float, float]] | np.ndarray,
+    size: int = DEFAULT_SIZE,
+    weights: np.ndarray | None = None,
+    theme: ThemeName = "classic",
+) -> bytes:
+    """Render a heatmap PNG for normalized points, optionally weighted (e.g. by confidence)."""
+    grid_size = max(MIN_DENSITY_GRID, size // DENSITY_DOWNSCALE)
+    return render_density(density_grid(points, grid_size, weights), size, theme)
@@ -1,13 +1,31 @@
 from __future__ import annotations
 
+import re
 import threading
 import time
+from collections.abc import Callable
 from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from typing import Protocol
 
-import cv2
+import numpy as np
 
-from .cv import LiveImpactDetector
-from .storage import DartBoardStore
+from .calibration import BoardCalibration
+from .cv import MIN_MOTION_AREA, LiveImpactDetector
+from .pipeline import AdaptiveFrameRate, DropOldestQueue, RatePolicy, StageStats
+from .sources import SourceSpec, VideoSource, source_kind
+from .storage import DartBoardStore, ThrowInput
+from .streaming import FrameHub, FrameSink
+from .writebehind import ThrowWriteBuffer
+
+# Frames waiting per stage; small so stages work on fresh frames, not a backlog.
+STAGE_QUEUE_SIZE = 2
+# Detection runs on frames downscaled by this factor (see LiveImpactDetector).
+DETECT_SCALE = 1.0
+# Board used by the board-less /capture endpoints.
+DEFAULT_BOARD = "default"
+MAX_BOARDS = 32
+_BOARD_ID = re.compile(r"[A-Za-z0-9_-]{1,32}")
 
 
 @dataclass
@@ -17,33 +35,95 @@ class CaptureState:
     user_id: str | None = None
     session_id: str | None = None
     camera_index: int | None = None
+    # File path or stream URL when not reading a USB camera.
+    source: str | None = None
     fps: int = 10
     frames_processed: int = 0
     throws_detected: int = 0
     last_error: str | None = None
+    # True when hits come from the camera's board calibration rather than raw frame positions.
+    calibrated: bool = False
+
+
+class CapturePipeline(Protocol):
+    """What the API needs from a capture backend: in-process, daemon client or disabled."""
+
+    frames: FrameHub
+
+    def status(self) -> dict[str, object]: ...
+
+    def start_preview(self, camera_index: int = 0, fps: int = 10, source: str | None = None) -> dict[str, object]: ...
+
+    def start_capture(
+        self, user_id: str, session_id: str, camera_index: int = 0, fps: int = 10, source: str | None = None
+    ) -> dict[str, object]: ...
+
+    def stop_capture(self) -> dict[str, object]: ...
+
+    def get_latest_frame(self) -> bytes | None: ...
+
+    def close(self) -> None: ...
 
 
 class USBCaptureManager:
-    def __init__(self, store: DartBoardStore) -> None:
+    def __init__(
+        self,
+        store: DartBoardStore,
+        frames: FrameSink | None = None,
+        detect_scale: float = DETECT_SCALE,
+        writer: ThrowWriteBuffer | None = None,
+        board_id: str | None = None,
+        source_factory: Callable[[SourceSpec], VideoSource] = VideoSource,
+        rate_policy: RatePolicy | None = None,
+    ) -> None:
         self.store = store
+        self.detect_scale = detect_scale
+        self.rate_policy = rate_policy if rate_policy is not None else RatePolicy()
+        self.board_id = board_id
         self._lock = threading.Lock()
         self._stop_event = threading.Event()
         self._thread: threading.Thread | None = None
         self._state = CaptureState()
-        self._latest_frame: bytes | None = None
-        self._frame_lock = threading.Lock()
+        self.frames = frames if frames is not None else FrameHub()
+        # A writer passed in is shared with other pipelines and closed by its owner.
+        self._owns_writer = writer is None
+        self.writer = writer if writer is not None else ThrowWriteBuffer(store)
+        self._source_factory = source_factory
+        self._source: VideoSource | None = None
+        self._rate: AdaptiveFrameRate | None = None
+        self._stages: list[StageStats] = []
+        self._started_at = 0.0
+        self._stopped_at: float | None = None
 
     def status(self) -> dict[str, object]:
         with self._lock:
-            return asdict(self._state)
+            state = asdict(self._state)
+            stages = list(self._stages)
+            source, rate = self._source, self._rate
+            started_at, stopped_at = self._started_at, self._stopped_at
+        elapsed = (stopped_at if stopped_at is not None else time.monotonic()) - started_at
+        cpu_s = sum(stage.cpu_s for stage in stages)
+        return {
+            **state,
+            **self.writer.stats(),
+            "stages": [stage.snapshot() for stage in stages],
+            "board_id": self.board_id,
+            "video_source": source.stats() if source is not None else None,
+            "frame_rate": rate.snapshot() if rate is not None else None,
+            # Share of one core used by this pipeline's threads since it started.
+            "cpu_percent": round(100 * cpu_s / elapsed, 1) if stages and elapsed > 0 else 0.0,
+        }
 
     def get_latest_frame(self) -> bytes | None:
         """Return the latest JPEG-encoded frame, or None if no frame available."""
-        with self._frame_lock:
-            return self._latest_frame
+        return self.frames.snapshot()
+
+    def start_preview(self, camera_index: int = 0, fps: int = 10, source: str | None = None) -> dict[str, object]:
+        """Start camera preview without recording data.
 
-    def start_preview(self, camera_index: int = 0, fps: int = 10) -> dict[str, object]:
-        """Start camera preview without recording data."""
+        ``source`` reads a video file or stream URL instead of USB camera ``camera_index``.
+        """
+        camera_index, source = _resolve_source(camera_index, source)
         with self._lock:
             if self._state.running:
                 raise RuntimeError("capture already running")
@@ -52,17 +132,26 @@ class USBCaptureManager:
                 running=True,
                 preview_only=True,
                 camera_index=camera_index,
+                source=source,
                 fps=fps,
             )
+            self.frames.open()
             self._thread = threading.Thread(
                 target=self._run_loop,
-                args=(None, None, camera_index, fps, True),
+                args=(None, None, _spec(camera_index, source), fps, True),
                 daemon=True,
             )
             self._thread.start()
-            return asdict(self._state)
+            state = asdict(self._state)
+        return {**state, **self.writer.stats()}
 
-    def start_capture(self, user_id: str, session_id: str, camera_index: int = 0, fps: int = 10) -> dict[str, object]:
+    def start_capture(
+        self, user_id: str, session_id: str, camera_index: int = 0, fps: int = 10, source: str | None = None
+    ) -> dict[str, object]:
+        camera_index, source = _resolve_source(camera_index, source)
+        # Calibrations belong to USB cameras; file and stream sources are detected uncalibrated.
+        record = self.store.get_calibration(camera_index) if camera_index is not None else None
+        calibration = BoardCalibration.from_record(record) if record is not None else None
         with self._lock:
             if self._state.running:
                 raise RuntimeError("capture already running")
@@ -73,93 +162,369 @@ class USBCaptureManager:
                 user_id=user_id,
                 session_id=session_id,
                 camera_index=camera_index,
+                source=source,
                 fps=fps,
+                calibrated=calibration is not None,
             )
+            self.frames.open()
             self._thread = threading.Thread(
                 target=self._run_loop,
-                args=(user_id, session_id, camera_index, fps, False),
+                args=(user_id, session_id, _spec(camera_index, source), fps, False, calibration),
                 daemon=True,
             )
             self._thread.start()
-            return asdict(self._state)
+            state = asdict(self._state)
+        return {**state, **self.writer.stats()}
 
     def stop_capture(self) -> dict[str, object]:
         thread = None
         with self._lock:
             self._stop_event.set()
             thread = self._thread
+            if self._rate is not None:
+                self._rate.wake()
 
         if thread is not None:
             thread.join(timeout=2.0)
+        self.writer.flush(timeout=5.0, durable=True)
 
         with self._lock:
             self._state.running = False
             self._thread = None
-            return asdict(self._state)
+        return self.status()
+
+    def close(self) -> None:
+        """Stop any capture and write out buffered throws (application shutdown)."""
+        self.stop_capture()
+        if self._owns_writer:
+            self.writer.close()
 
-    def _run_loop(self, user_id: str | None, session_id: str | None, camera_index: int, fps: int, preview_only: bool = False) -> None:
-        detector = LiveImpactDetector() if not preview_only else None
-        interval_s = 1.0 / max(1, fps)
+    def _run_loop(
+        self,
+        user_id: str | None,
+        session_id: str | None,
+        spec: SourceSpec,
+        fps: int,
+        preview_only: bool = False,
+        calibration: BoardCalibration | None = None,
+    ) -> None:
+        """Grab stage; decoding, detection and encoding run in their own threads behind drop-oldest queues."""
+        recording = not preview_only and user_id is not None and session_id is not None
+        # Preview has no detector to report motion, so it always runs at the full rate.
+        rate = AdaptiveFrameRate(max(1, fps), self.rate_policy, adaptive=recording)
 
-        cap = cv2.VideoCapture(camera_index)
-        if not cap.isOpened():
+        source = self._source_factory(spec)
+        with self._lock:
+            self._source, self._rate = source, rate
+        if not source.start():
             with self._lock:
                 self._state.running = False
-                self._state.last_error = f"failed to open camera index {camera_index}"
-            cap.release()
+                self._state.last_error = source.stats()["last_error"]
+            self.frames.close()
             return
 
+        encode_queue: DropOldestQueue[np.ndarray] = DropOldestQueue(STAGE_QUEUE_SIZE)
+        detect_queue: DropOldestQueue[np.ndarray] = DropOldestQueue(STAGE_QUEUE_SIZE)
+        grab = StageStats("grab")
+        encode = StageStats("encode", encode_queue)
+        stages = [source.decode, grab, encode]
+        workers = [threading.Thread(target=self._stage, args=(self._encode_stage, encode_queue, encode), daemon=True)]
+        if recording:
+            detect_stats = StageStats("detect", detect_queue)
+            stages.append(detect_stats)
+            min_motion_area = MIN_MOTION_AREA
+            rectified = None
+            if calibration is not None:
+                rectified = np.empty((calibration.size, calibration.size), dtype=np.uint8)
+                # The rectified image is the board alone, at its own resolution.
+                min_motion_area = calibration.rectified_area(MIN_MOTION_AREA)
+            detector = LiveImpactDetector(min_motion_area=min_motion_area, scale=self.detect_scale)
+
+            def detect(frame: np.ndarray) -> None:
+                self._detect_stage(detector, frame, user_id, session_id, calibration, rectified)
+                rate.observe(detector.motion)
+
+            workers.append(
+                threading.Thread(
+                    target=self._stage,
+                    args=(detect, detect_queue, detect_stats),
+                    daemon=True,
+                )
+            )
+        with self._lock:
+            self._stages = stages
+            self._started_at, self._stopped_at = time.monotonic(), None
+        for worker in workers:
+            worker.start()
+
         try:
             next_tick = time.monotonic()
             while not self._stop_event.is_set():
-                ok, frame = cap.read()
-                if not ok:
-                    time.sleep(0.05)
-                    continue
-
-                # Crop frame to square (center crop)
-                h, w = frame.shape[:2]
-                if w > h:
-                    offset = (w - h) // 2
-                    frame = frame[:, offset:offset + h]
-                elif h > w:
-                    offset = (h - w) // 2
-                    frame = frame[offset:offset + w, :]
-
-                # Encode frame as JPEG for live streaming
-                _, jpeg = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 80])
-                with self._frame_lock:
-                    self._latest_frame = jpeg.tobytes()
-
-                # Only detect and record if not in preview mode
-                if not preview_only and detector is not None and user_id and session_id:
-                    hit = detector.detect_hit(frame)
-                    with self._lock:
-                        self._state.frames_processed += 1
-
-                    if hit is not None:
-                        self.store.add_throw(
-                            user_id=user_id,
-                            session_id=session_id,
-                            x_norm=hit.x_norm,
-                            y_norm=hit.y_norm,
-                            confidence=hit.confidence,
-                        )
-                        with self._lock:
-                            self._state.throws_detected += 1
-
-                next_tick += interval_s
+                fps_now = rate.update(sum(stage.cpu_s for stage in stages))
+                # Frames the grab stage would skip are not decoded at all.
+                source.set_max_fps(fps_now)
+                # The source decodes ahead on its own thread; this only waits when it has nothing yet.
+                frame = source.read(timeout=0.5)
+                if frame is None:
+                    if source.finished:
+                        break  # end of a file source
+                    continue  # reconnecting
+
+                # Only the grab stage's own work is timed, not the wait for the source.
+                with grab.timed():
+                    frame = square_crop(frame)
+                    # Never blocks: a lagging stage loses its oldest frame instead.
+                    encode_queue.put(frame)
+                    if recording:
+                        detect_queue.put(frame)
+
+                next_tick += 1.0 / fps_now
                 sleep_for = next_tick - time.monotonic()
-                if sleep_for > 0:
-                    time.sleep(sleep_for)
-                else:
+                if sleep_for <= 0 or rate.wait(sleep_for):
+                    # Behind schedule, or motion on an idle board: take the next frame now.
                     next_tick = time.monotonic()
         except Exception as exc:  # noqa: BLE001
             with self._lock:
                 self._state.last_error = str(exc)
         finally:
-            cap.release()
+            encode_queue.close()
+            detect_queue.close()
+            for worker in workers:
+                worker.join(timeout=2.0)
+            source.close()
             with self._lock:
                 self._state.running = False
-            with self._frame_lock:
-                self._latest_frame = None
+                self._stopped_at = time.monotonic()
+            self.frames.close()
+
+    def _stage(self, work: Callable[[np.ndarray], None], queue: DropOldestQueue[np.ndarray], stats: StageStats) -> None:
+        """Run ``work`` on every frame from ``queue`` until it is closed and drained."""
+        try:
+            while (frame := queue.get()) is not None:
+                with stats.timed():
+                    work(frame)
+        except Exception as exc:  # noqa: BLE001
+            with self._lock:
+                self._state.last_error = f"{stats.name} stage failed: {exc}"
+            self._stop_event.set()
+
+    def _encode_stage(self, frame: np.ndarray) -> None:
+        # Encoded only for the variants live viewers have subscribed to
+        self.frames.publish(frame)
+
+    def _detect_stage(
+        self,
+        detector: LiveImpactDetector,
+        frame: np.ndarray,
+        user_id: str,
+        session_id: str,
+        calibration: BoardCalibration | None = None,
+        rectified: np.ndarray | None = None,
+    ) -> None:
+        if calibration is not None:
+            # Only the board square is examined; results are already board coordinates.
+            frame = calibration.rectify(frame, dst=rectified)
+        hit = detector.detect_hit(frame)
+        with self._lock:
+            self._state.frames_processed += 1
+        if hit is None:
+            return
+        x_norm, y_norm = hit.x_norm, hit.y_norm
+        if calibration is not None:
+            x_norm, y_norm = calibration.rectified_to_board(x_norm, y_norm)
+        # Stamped now: the write-behind flush would otherwise stamp the whole batch later.
+        self.writer.put(
+            ThrowInput(
+                user_id=user_id,
+                session_id=session_id,
+                x_norm=x_norm,
+                y_norm=y_norm,
+                confidence=hit.confidence,
+                ts=datetime.now(timezone.utc).isoformat(),
+            )
+        )
+        with self._lock:
+            self._state.throws_detected += 1
+
+
+class BoardCaptureManager:
+    """Independent capture pipelines, one per board, keyed by board id.
+
+    Each board has its own camera, capture state, session, frame hub and stage
+    threads. OpenCV releases the GIL while it grabs, converts and detects, so the
+    boards' pipelines run on separate cores. In-process pipelines share one
+    write-behind buffer, so hits from every board are committed together.
+    ``factory`` builds the pipeline for a board id; the default runs it in this
+    process.
+
+    A board is registered by its first successful start and stays until
+    :meth:`remove`; once ``MAX_BOARDS`` are registered, boards that are not
+    running make room for new ones.
+    """
+
+    def __init__(
+        self,
+        store: DartBoardStore,
+        factory: Callable[[str], CapturePipeline] | None = None,
+        rate_policy: RatePolicy | None = None,
+    ) -> None:
+        self.store = store
+        self.rate_policy = rate_policy
+        self._factory = factory if factory is not None else self._local_pipeline
+        self._boards: dict[str, CapturePipeline] = {}
+        self._lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._writer: ThrowWriteBuffer | None = None
+
+    def _local_pipeline(self, board_id: str) -> CapturePipeline:
+        if self._writer is None:
+            self._writer = ThrowWriteBuffer(self.store)
+        return USBCaptureManager(self.store, writer=self._writer, board_id=board_id, rate_policy=self.rate_policy)
+
+    def board(self, board_id: str) -> CapturePipeline:
+        """The pipeline for ``board_id``, registered on first use."""
+        with self._start_lock:
+            pipeline = self.get(board_id)
+            if pipeline is None:
+                pipeline = self._new_pipeline(board_id)
+                with self._lock:
+                    self._boards[board_id] = pipeline
+            return pipeline
+
+    def get(self, board_id: str) -> CapturePipeline | None:
+        with self._lock:
+            return self._boards.get(board_id)
+
+    def _existing(self, board_id: str) -> CapturePipeline:
+        pipeline = self.get(board_id)
+        if pipeline is None:
+            raise KeyError(f"board {board_id} not found")
+        return pipeline
+
+    def _new_pipeline(self, board_id: str) -> CapturePipeline:
+        """A pipeline for a board not registered yet (caller holds ``_start_lock``)."""
+        if not _BOARD_ID.fullmatch(board_id):
+            raise ValueError("board id must be 1-32 letters, digits, '-' or '_'")
+        with self._lock:
+            full = len(self._boards) >= MAX_BOARDS
+            registered = list(self._boards.items())
+        if full:
+            idle = [other for other, pipeline in registered if not pipeline.status().get("running")]
+            if not idle:
+                raise ValueError(f"at most {MAX_BOARDS} boards")
+            self.remove(idle[0])
+        return self._factory(board_id)
+
+    def _start(
+        self, board_id: str, camera_index: int | None, start: Callable[[CapturePipeline], dict[str, object]]
+    ) -> dict[str, object]:
+        # Serialize starts so two boards cannot both claim the same camera.
+        with self._start_lock:
+            pipeline = self.get(board_id)
+            new = pipeline is None
+            if new:
+                pipeline = self._new_pipeline(board_id)
+            try:
+                self._claim_camera(board_id, camera_index)
+                status = start(pipeline)
+            except BaseException:
+                # A board that never started is not registered.
+                if new:
+                    pipeline.close()
+                raise
+            if new:
+                with self._lock:
+                    self._boards[board_id] = pipeline
+            return status
+
+    def remove(self, board_id: str) -> None:
+        """Stop ``board_id`` and forget it; raises KeyError for an unknown board."""
+        with self._lock:
+            pipeline = self._boards.pop(board_id)
+        pipeline.close()
+
+    def board_ids(self) -> list[str]:
+        with self._lock:
+            return sorted(self._boards)
+
+    def _claim_camera(self, board_id: str, camera_index: int | None) -> None:
+        """Refuse a camera another board is using (caller holds ``_start_lock``).
+
+        File and stream sources can be read by several boards at once.
+        """
+        if camera_index is None:
+            return
+        with self._lock:
+            others = [(other, pipeline) for other, pipeline in self._boards.items() if other != board_id]
+        for other, pipeline in others:
+            status = pipeline.status()
+            if status.get("running") and status.get("camera_index") == camera_index:
+                raise RuntimeError(f"camera {camera_index} is in use by board {other}")
+
+    def start_capture(
+        self,
+        board_id: str,
+        user_id: str,
+        session_id: str,
+        camera_index: int = 0,
+        fps: int = 10,
+        source: str | None = None,
+    ) -> dict[str, object]:
+        return self._start(
+            board_id,
+            _resolve_source(camera_index, source)[0],
+            lambda pipeline: pipeline.start_capture(
+                user_id=user_id, session_id=session_id, camera_index=camera_index, fps=fps, source=source
+            ),
+        )
+
+    def start_preview(
+        self, board_id: str, camera_index: int = 0, fps: int = 10, source: str | None = None
+    ) -> dict[str, object]:
+        return self._start(
+            board_id,
+            _resolve_source(camera_index, source)[0],
+            lambda pipeline: pipeline.start_preview(camera_index=camera_index, fps=fps, source=source),
+        )
+
+    def stop_capture(self, board_id: str) -> dict[str, object]:
+        return self._existing(board_id).stop_capture()
+
+    def status(self, board_id: str) -> dict[str, object]:
+        return {**self._existing(board_id).status(), "board_id": board_id}
+
+    def close(self) -> None:
+        with self._lock:
+            pipelines = list(self._boards.values())
+        for pipeline in pipelines:
+            pipeline.close()
+        if self._writer is not None:
+            self._writer.close()
+
+
+def _resolve_source(camera_index: int, source: str | None) -> tuple[int | None, str | None]:
+    """(camera_index, source) for a start request; a numeric source is a camera index.
+
+    Raises ValueError for an unsupported stream URL.
+    """
+    if source is None:
+        return camera_index, None
+    if source_kind(source) == "usb":
+        return int(source), None
+    return None, source
+
+
+def _spec(camera_index: int | None, source: str | None) -> SourceSpec:
+    return source if source is not None else camera_index
+
+
+def square_crop(frame: np.ndarray) -> np.ndarray:
+    """Centre crop to a square."""
+    h, w = frame.shape[:2]
+    if w > h:
+        offset = (w - h) // 2
+        return frame[:, offset:offset + h]
+    if h > w:
+        offset = (h - w) // 2
+        return frame[offset:offset + w, :]
+    return frame
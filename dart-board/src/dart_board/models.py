@@ -34,6 +34,28 @@ class ThrowCreate(BaseModel):
     confidence: float = Field(ge=0.0, le=1.0)
 
 
+class ThrowImport(ThrowCreate):
+    # ISO-8601 timestamp for historical imports; defaults to the time of insertion.
+    ts: str | None = None
+
+
+class ThrowRowError(BaseModel):
+    index: int
+    detail: str
+
+
+class ThrowBatchOut(BaseModel):
+    accepted: int
+    rejected: int
+    errors: list[ThrowRowError]
+
+
+class BulkThrowsOut(BaseModel):
+    accepted: int
+    rejected: int
+    batches: list[ThrowBatchOut]
+
+
 class ThrowOut(BaseModel):
     id: int
     user_id: str
@@ -46,14 +68,56 @@ class ThrowOut(BaseModel):
 
 class CheckoutSuggestion(BaseModel):
     score: int
+    darts: int = 3
+    out_rule: str = "double"
     combinations: list[list[str]]
 
 
 class FinishAdviceOut(BaseModel):
     user_id: str
     current_score: int
+    darts: int = 3
+    out_rule: str = "double"
     can_finish: bool
     combinations: list[list[str]]
+    finish_probabilities: list[float] = []
+
+
+class AimAdviceOut(BaseModel):
+    user_id: str
+    score: int
+    darts_left: int
+    scored_this_visit: int
+    out_rule: str
+    aim: str
+    expected_darts: float
+    personalised: bool
+
+
+class SegmentStatsOut(BaseModel):
+    label: str
+    hits: int
+    share: float
+
+
+class DailyThrowsOut(BaseModel):
+    day: str
+    throws: int
+
+
+class PlayerStatsOut(BaseModel):
+    user_id: str
+    session_id: str | None = None
+    since: str | None = None
+    until: str | None = None
+    throw_count: int
+    average_score: float
+    double_rate: float
+    treble_rate: float
+    bull_rate: float
+    miss_rate: float
+    segments: list[SegmentStatsOut]
+    days: list[DailyThrowsOut] = []
 
 
 class CaptureStartRequest(BaseModel):
@@ -61,11 +125,107 @@ class CaptureStartRequest(BaseModel):
     session_id: str = Field(min_length=1)
     camera_index: int = Field(default=0, ge=0)
     fps: int = Field(default=10, ge=1, le=60)
+    # Video file (relative to DARTBOARD_VIDEO_DIR) or stream URL read instead of the camera.
+    source: str | None = Field(default=None, min_length=1, max_length=2048)
 
 
 class PreviewStartRequest(BaseModel):
     camera_index: int = Field(default=0, ge=0)
     fps: int = Field(default=10, ge=1, le=60)
+    source: str | None = Field(default=None, min_length=1, max_length=2048)
+
+
+class CalibrationPoint(BaseModel):
+    image_x: float = Field(ge=0.0)
+    image_y: float = Field(ge=0.0)
+    board_x: float
+    board_y: float
+
+
+class CalibrationCreate(BaseModel):
+    """Reference points in pixels of the published (square-cropped) capture frame."""
+
+    frame_width: int = Field(gt=0)
+    frame_height: int = Field(gt=0)
+    points: list[CalibrationPoint] = Field(min_length=4)
+
+
+class CalibrationOut(BaseModel):
+    camera_index: int
+    homography: list[float]
+    frame_width: int
+    frame_height: int
+    reprojection_error: float
+    roi: tuple[int, int, int, int]  # x, y, width, height of the board in the frame
+    created_at: str
+
+
+class VideoIngestRequest(BaseModel):
+    """Video to ingest, relative to DARTBOARD_VIDEO_DIR; defaults to the session's source_ref."""
+
+    path: str | None = Field(default=None, min_length=1)
+    workers: int | None = Field(default=None, ge=1, le=64)
+    camera_index: int | None = Field(default=None, ge=0)
+
+
+class VideoIngestReportOut(BaseModel):
+    session_id: str
+    path: str
+    workers: int
+    chunks: int
+    frames: int
+    decoded: int
+    duration_s: float
+    elapsed_s: float
+    fps: float
+    realtime_factor: float
+    hits: int
+    accepted: int
+    rejected: int
+
+
+class VideoIngestJobOut(BaseModel):
+    job_id: str
+    session_id: str
+    path: str
+    state: str
+    error: str | None
+    report: VideoIngestReportOut | None
+    created_at: str
+
+
+class VideoSourceOut(BaseModel):
+    kind: str  # usb, file or url
+    target: str
+    connected: bool
+    finished: bool
+    reconnects: int
+    last_error: str | None
+
+
+class FrameRateOut(BaseModel):
+    mode: str  # active or idle
+    target_fps: float
+    effective_fps: float  # frames grabbed per second over the last second
+    active_fps: int
+    idle_fps: int
+    motion: float  # share of pixels that changed in the last detected frame
+    cpu_percent: float
+    cpu_budget_percent: float | None
+    cpu_limited: bool
+    active_s: float
+    idle_s: float
+
+
+class StageStatusOut(BaseModel):
+    name: str
+    processed: int
+    avg_ms: float
+    last_ms: float
+    max_ms: float
+    queue_depth: int
+    dropped: int
+    cpu_s: float = 0.0
 
 
 class CaptureStatusOut(BaseModel):
@@ -74,7 +234,22 @@ class CaptureStatusOut(BaseModel):
     user_id: str | None
     session_id: str | None
     camera_index: int | None
+    source: str | None = None
     fps: int
     frames_processed: int
     throws_detected: int
     last_error: str | None
+    write_queue_depth: int = 0
+    throws_written: int = 0
+    throws_dropped: int = 0
+    throws_rejected: int = 0
+    write_flushes: int = 0
+    last_flush_ms: float = 0.0
+    max_flush_ms: float = 0.0
+    write_error: str | None = None
+    stages: list[StageStatusOut] = []
+    calibrated: bool = False
+    board_id: str | None = None
+    cpu_percent: float = 0.0
+    video_source: VideoSourceOut | None = None
+    frame_rate: FrameRateOut | None = None
@@ -0,0 +1,325 @@
+"""Offline ingestion of recorded session video.
+
+A video file is split into chunks of frames that are decoded and run through
+:class:`LiveImpactDetector` in a process pool, one chunk per task. Whether a frame
+holds a candidate hit depends only on it and the frame before, so each chunk
+starts decoding one frame before the frames it owns and runs its detector without
+a cooldown. The cooldown depends on every earlier accepted hit, so it is applied
+once, by :func:`merge_hits`, over all candidates in frame order; the result is the
+same as a single pass over the whole video, whatever the number of workers or
+chunks.
+
+Hits are stored with :meth:`DartBoardStore.add_throws`, timestamped from the
+session start plus the frame's position in the video.
+"""
+from __future__ import annotations
+
+import logging
+import math
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import cv2
+
+from .calibration import BoardCalibration
+from .cv import MIN_MOTION_AREA, LiveImpactDetector
+from .ingest import square_crop
+from .sources import resolve_video_file
+from .storage import DartBoardStore, ThrowInput
+
+logger = logging.getLogger(__name__)
+
+# Frames per task: long enough that the overlap is a small share of the work.
+CHUNK_FRAMES = 900
+BULK_CHUNK_SIZE = 500
+MAX_JOBS = 100
+
+
+@dataclass(frozen=True)
+class VideoInfo:
+    frame_count: int
+    fps: float
+    width: int
+    height: int
+
+    @property
+    def duration_s(self) -> float:
+        return self.frame_count / self.fps
+
+
+@dataclass(frozen=True)
+class Chunk:
+    start: int  # first owned frame
+    end: int | None  # one past the last owned frame; None reads to the end of the file
+    warmup_start: int  # first decoded frame
+
+
+@dataclass(frozen=True)
+class VideoHit:
+    frame: int
+    x_norm: float
+    y_norm: float
+    confidence: float
+
+
+@dataclass
+class IngestReport:
+    session_id: str
+    path: str
+    workers: int
+    chunks: int
+    frames: int  # frames of video covered
+    decoded: int  # frames decoded, counting each chunk's warm-up frame
+    duration_s: float
+    elapsed_s: float
+    fps: float  # frames decoded per second of processing
+    realtime_factor: float  # seconds of video per second of processing
+    hits: int
+    accepted: int
+    rejected: int
+
+
+def probe_video(path: str | Path) -> VideoInfo:
+    cap = cv2.VideoCapture(str(path))
+    try:
+        if not cap.isOpened():
+            raise ValueError(f"cannot open video {path}")
+        fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+        return VideoInfo(
+            frame_count=int(cap.get(cv2.CAP_PROP_FRAME_COUNT)),
+            fps=fps,
+            width=int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+            height=int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+        )
+    finally:
+        cap.release()
+
+
+def plan_chunks(frame_count: int, chunk_frames: int, overlap: int) -> list[Chunk]:
+    starts = range(0, max(frame_count, 1), max(1, chunk_frames))
+    chunks = [Chunk(start, start + chunk_frames, max(0, start - overlap)) for start in starts]
+    # The container's frame count can be off; the last chunk reads until decoding stops.
+    chunks[-1] = Chunk(chunks[-1].start, None, chunks[-1].warmup_start)
+    return chunks
+
+
+def _init_worker() -> None:
+    # Parallelism comes from the pool; OpenCV's own threads would only compete with it.
+    cv2.setNumThreads(1)
+
+
+def _open_at(path: str, frame: int) -> cv2.VideoCapture:
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise ValueError(f"cannot open video {path}")
+    if frame > 0:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, frame)
+        if int(cap.get(cv2.CAP_PROP_POS_FRAMES)) != frame:
+            # Inexact seek for this container: decode up to the frame instead.
+            cap.release()
+            cap = cv2.VideoCapture(path)
+            for _ in range(frame):
+                if not cap.grab():
+                    break
+    return cap
+
+
+def detect_chunk(
+    path: str,
+    chunk: Chunk,
+    fps: float,
+    detector_options: dict[str, float],
+    calibration: BoardCalibration | None = None,
+) -> tuple[list[VideoHit], int]:
+    """Candidate hits on the chunk's owned frames and the number of frames decoded.
+
+    The detector runs without a cooldown; :func:`merge_hits` applies it.
+    """
+    options = {**detector_options, "cooldown_s": 0.0}
+    if calibration is not None:
+        options["min_motion_area"] = calibration.rectified_area(options.get("min_motion_area", MIN_MOTION_AREA))
+    detector = LiveImpactDetector(**options)
+    cap = _open_at(path, chunk.warmup_start)
+    hits: list[VideoHit] = []
+    index = chunk.warmup_start
+    try:
+        while chunk.end is None or index < chunk.end:
+            ok, frame = cap.read()
+            if not ok:
+                break
+            frame = square_crop(frame)
+            if calibration is not None:
+                frame = calibration.rectify(frame)
+            hit = detector.detect_hit(frame, ts=index / fps)
+            if hit is not None and index >= chunk.start:
+                x_norm, y_norm = hit.x_norm, hit.y_norm
+                if calibration is not None:
+                    x_norm, y_norm = calibration.rectified_to_board(x_norm, y_norm)
+                hits.append(VideoHit(index, x_norm, y_norm, hit.confidence))
+            index += 1
+    finally:
+        cap.release()
+    return hits, index - chunk.warmup_start
+
+
+def merge_hits(hits: list[VideoHit], fps: float, cooldown_s: float) -> list[VideoHit]:
+    """Frame-ordered candidates with the detector's cooldown applied, as a single pass would."""
+    merged: list[VideoHit] = []
+    for hit in sorted(hits, key=lambda h: h.frame):
+        # The same comparison LiveImpactDetector makes with ts=frame / fps.
+        if merged and hit.frame / fps - merged[-1].frame / fps < cooldown_s:
+            continue
+        merged.append(hit)
+    return merged
+
+
+def detect_video(
+    path: str | Path,
+    workers: int | None = None,
+    chunk_frames: int = CHUNK_FRAMES,
+    detector_options: dict[str, float] | None = None,
+    calibration: BoardCalibration | None = None,
+) -> tuple[list[VideoHit], VideoInfo, int, int, int]:
+    """Detect hits in a video file; returns (hits, info, frames covered, frames decoded, chunks)."""
+    path = str(path)
+    info = probe_video(path)
+    options = {"cooldown_s": 0.35, **(detector_options or {})}
+    workers = max(1, workers or os.cpu_count() or 1)
+    # Enough chunks to keep every worker busy; one warm-up frame supplies the first frame difference.
+    chunk_frames = max(1, min(chunk_frames, math.ceil(info.frame_count / workers)))
+    chunks = plan_chunks(info.frame_count, chunk_frames, overlap=1)
+
+    if workers == 1 or len(chunks) == 1:
+        results = [detect_chunk(path, chunk, info.fps, options, calibration) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(
+            max_workers=min(workers, len(chunks)),
+            # spawn: forking a threaded server process is unsafe.
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+        ) as pool:
+            futures = [pool.submit(detect_chunk, path, chunk, info.fps, options, calibration) for chunk in chunks]
+            results = [future.result() for future in futures]
+
+    hits = merge_hits([hit for chunk_hits, _ in results for hit in chunk_hits], info.fps, options["cooldown_s"])
+    decoded = sum(count for _, count in results)
+    warmups = sum(min(count, chunk.start - chunk.warmup_start) for chunk, (_, count) in zip(chunks, results))
+    return hits, info, decoded - warmups, decoded, len(chunks)
+
+
+def ingest_video(
+    store: DartBoardStore,
+    session_id: str,
+    path: str | Path,
+    workers: int | None = None,
+    chunk_frames: int = CHUNK_FRAMES,
+    camera_index: int | None = None,
+) -> IngestReport:
+    """Detect hits in ``path`` and bulk-insert them into the session."""
+    session = store.get_session(session_id)
+    if session is None:
+        raise ValueError(f"session {session_id} not found")
+    calibration = None
+    if camera_index is not None:
+        record = store.get_calibration(camera_index)
+        if record is None:
+            raise ValueError(f"camera {camera_index} is not calibrated")
+        calibration = BoardCalibration.from_record(record)
+
+    workers = max(1, workers or os.cpu_count() or 1)
+    started = time.perf_counter()
+    hits, info, frames, decoded, chunks = detect_video(path, workers, chunk_frames, calibration=calibration)
+    elapsed = time.perf_counter() - started
+
+    base = datetime.fromisoformat(session.started_at)
+    if base.tzinfo is None:
+        base = base.replace(tzinfo=timezone.utc)
+    throws = [
+        ThrowInput(
+            user_id=session.user_id,
+            session_id=session_id,
+            x_norm=min(1.0, max(0.0, hit.x_norm)),
+            y_norm=min(1.0, max(0.0, hit.y_norm)),
+            confidence=hit.confidence,
+            ts=(base + timedelta(seconds=hit.frame / info.fps)).isoformat(),
+        )
+        for hit in hits
+    ]
+    results = store.add_throws(throws, chunk_size=BULK_CHUNK_SIZE)
+    return IngestReport(
+        session_id=session_id,
+        path=str(path),
+        workers=workers,
+        chunks=chunks,
+        frames=frames,
+        decoded=decoded,
+        duration_s=round(frames / info.fps, 3),
+        elapsed_s=round(elapsed, 3),
+        fps=round(decoded / elapsed, 1) if elapsed > 0 else 0.0,
+        realtime_factor=round(frames / info.fps / elapsed, 2) if elapsed > 0 else 0.0,
+        hits=len(hits),
+        accepted=sum(r.accepted for r in results),
+        rejected=sum(r.rejected for r in results),
+    )
+
+
+@dataclass
+class IngestJob:
+    job_id: str
+    session_id: str
+    path: str
+    state: str = "running"  # running, done or failed
+    error: str | None = None
+    report: IngestReport | None = None
+    created_at: str = field(default_factory=lambda: datetime.now(timezone.utc).isoformat())
+
+
+class OfflineIngestJobs:
+    """Runs ingestion jobs in background threads and keeps their outcome for polling."""
+
+    def __init__(self, store: DartBoardStore, video_dir: str | Path = ".") -> None:
+        self.store = store
+        self.video_dir = Path(video_dir).resolve()
+        self._jobs: dict[str, IngestJob] = {}
+        self._lock = threading.Lock()
+
+    def start(
+        self,
+        session_id: str,
+        source_ref: str,
+        workers: int | None = None,
+        camera_index: int | None = None,
+    ) -> dict[str, object]:
+        path = resolve_video_file(self.video_dir, source_ref)
+        job = IngestJob(job_id=uuid.uuid4().hex, session_id=session_id, path=source_ref)
+        with self._lock:
+            self._jobs[job.job_id] = job
+            while len(self._jobs) > MAX_JOBS:
+                del self._jobs[next(iter(self._jobs))]
+        threading.Thread(
+            target=self._run, args=(job, path, workers, camera_index), name=f"ingest-{job.job_id[:8]}", daemon=True
+        ).start()
+        return self.status(job.job_id)
+
+    def _run(self, job: IngestJob, path: Path, workers: int | None, camera_index: int | None) -> None:
+        try:
+            report = ingest_video(self.store, job.session_id, path, workers=workers, camera_index=camera_index)
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("offline ingest %s failed: %s", job.job_id, exc)
+            with self._lock:
+                job.state, job.error = "failed", str(exc)
+            return
+        with self._lock:
+            job.state, job.report = "done", report
+
+    def status(self, job_id: str) -> dict[str, object] | None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return None if job is None else asdict(job)
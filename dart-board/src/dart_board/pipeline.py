@@ -0,0 +1,254 @@
+"""Building blocks for the staged capture pipeline in :mod:`ingest`.
+
+Stages run in their own threads and hand frames on through bounded
+:class:`DropOldestQueue` instances: a producer never blocks, and when a consumer
+falls behind the oldest waiting frame is discarded (and counted) so downstream
+stages always work on the freshest frame. :class:`AdaptiveFrameRate` paces the
+grab stage.
+"""
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import deque
+from collections.abc import Callable, Iterator, Mapping
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Generic, TypeVar
+
+T = TypeVar("T")
+
+
+class DropOldestQueue(Generic[T]):
+    def __init__(self, maxsize: int) -> None:
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self.maxsize = maxsize
+        self._items: deque[T] = deque()
+        self._cond = threading.Condition()
+        self._closed = False
+        self.dropped = 0
+
+    def __len__(self) -> int:
+        with self._cond:
+            return len(self._items)
+
+    def put(self, item: T) -> None:
+        """Append without blocking, evicting the oldest item when full."""
+        with self._cond:
+            if self._closed:
+                return
+            if len(self._items) >= self.maxsize:
+                self._items.popleft()
+                self.dropped += 1
+            self._items.append(item)
+            self._cond.notify()
+
+    def get(self, timeout: float | None = None) -> T | None:
+        """Next item; None on timeout or once closed and drained."""
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._items or self._closed, timeout):
+                return None
+            return self._items.popleft() if self._items else None
+
+    def close(self) -> None:
+        """Stop accepting items and release every blocked :meth:`get`."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+
+class StageStats:
+    """Per-stage timing counters, safe to update and read from different threads."""
+
+    def __init__(self, name: str, queue: DropOldestQueue | None = None) -> None:
+        self.name = name
+        self.queue = queue
+        self._lock = threading.Lock()
+        self._processed = 0
+        self._total_s = 0.0
+        self._last_s = 0.0
+        self._max_s = 0.0
+        self._cpu_s = 0.0
+
+    @contextmanager
+    def timed(self) -> Iterator[None]:
+        started = time.perf_counter()
+        # CPU time of this thread only; OpenCV's own worker threads are not included.
+        cpu_started = time.thread_time()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            cpu = time.thread_time() - cpu_started
+            with self._lock:
+                self._processed += 1
+                self._total_s += elapsed
+                self._last_s = elapsed
+                self._max_s = max(self._max_s, elapsed)
+                self._cpu_s += cpu
+
+    @property
+    def cpu_s(self) -> float:
+        with self._lock:
+            return self._cpu_s
+
+    def snapshot(self) -> dict[str, object]:
+        with self._lock:
+            processed, total, last, peak, cpu = self._processed, self._total_s, self._last_s, self._max_s, self._cpu_s
+        return {
+            "name": self.name,
+            "processed": processed,
+            "avg_ms": round(total / processed * 1000, 3) if processed else 0.0,
+            "last_ms": round(last * 1000, 3),
+            "max_ms": round(peak * 1000, 3),
+            "cpu_s": round(cpu, 3),
+            "queue_depth": len(self.queue) if self.queue is not None else 0,
+            "dropped": self.queue.dropped if self.queue is not None else 0,
+        }
+
+
+# Changed-pixel share below which the board counts as still (sensor noise stays well under it).
+MOTION_THRESHOLD = 0.002
+IDLE_FPS = 2
+IDLE_AFTER_S = 5.0
+# CPU use is measured and the rate cap adjusted over windows of this length.
+CPU_WINDOW_S = 1.0
+
+
+@dataclass(frozen=True)
+class RatePolicy:
+    """How capture slows down on a still board; the CPU budget is in percent of one core."""
+
+    idle_fps: int = IDLE_FPS
+    idle_after_s: float = IDLE_AFTER_S
+    motion_threshold: float = MOTION_THRESHOLD
+    cpu_budget_percent: float | None = None
+
+    @classmethod
+    def from_env(cls, environ: Mapping[str, str] = os.environ) -> RatePolicy:
+        """Policy from ``DARTBOARD_CAPTURE_IDLE_FPS`` and ``DARTBOARD_CAPTURE_CPU_BUDGET``."""
+        budget = environ.get("DARTBOARD_CAPTURE_CPU_BUDGET")
+        return cls(
+            idle_fps=int(environ.get("DARTBOARD_CAPTURE_IDLE_FPS", IDLE_FPS)),
+            cpu_budget_percent=float(budget) if budget else None,
+        )
+
+
+class AdaptiveFrameRate:
+    """Capture rate that idles on a still board and returns to full rate on motion.
+
+    The detect stage reports each frame's motion score with :meth:`observe`; the
+    grab stage asks :meth:`update` for the rate to run at and sleeps in
+    :meth:`wait`, which returns early when motion starts so the first frames of a
+    throw are taken at the full rate. With a CPU budget the rate is also capped,
+    never below the idle rate, so that the stages' measured CPU time stays within it.
+    Safe to use from both stages' threads.
+    """
+
+    def __init__(
+        self,
+        active_fps: int,
+        policy: RatePolicy | None = None,
+        adaptive: bool = True,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.active_fps = active_fps
+        self.policy = policy if policy is not None else RatePolicy()
+        self.idle_fps = min(self.policy.idle_fps, active_fps)
+        self.adaptive = adaptive
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        now = clock()
+        self._last_motion = now
+        self._motion = 0.0
+        self._mode = "active"
+        self._mode_since = now
+        self._mode_s = {"active": 0.0, "idle": 0.0}
+        self._cap = float(active_fps)
+        self._window_start = now
+        self._window_cpu: float | None = None
+        self._window_frames = 0
+        self._effective_fps = 0.0
+        self._cpu_percent = 0.0
+
+    def observe(self, motion: float) -> None:
+        with self._lock:
+            self._motion = motion
+            if motion < self.policy.motion_threshold:
+                return
+            self._last_motion = self._clock()
+            idle = self._mode == "idle"
+        if idle:
+            self._wake.set()
+
+    def update(self, cpu_s: float) -> float:
+        """Frame rate for the next grab, given the pipeline's total CPU seconds so far."""
+        with self._lock:
+            now = self._clock()
+            self._window_frames += 1
+            if self._window_cpu is None:
+                self._window_cpu = cpu_s
+            elif now - self._window_start >= CPU_WINDOW_S:
+                elapsed = now - self._window_start
+                self._effective_fps = self._window_frames / elapsed
+                self._cpu_percent = 100 * (cpu_s - self._window_cpu) / elapsed
+                self._apply_budget()
+                self._window_start, self._window_cpu, self._window_frames = now, cpu_s, 0
+
+            still = self.adaptive and now - self._last_motion >= self.policy.idle_after_s
+            mode = "idle" if still else "active"
+            if mode != self._mode:
+                self._mode_s[self._mode] += now - self._mode_since
+                self._mode, self._mode_since = mode, now
+            return self._target()
+
+    def _apply_budget(self) -> None:
+        budget = self.policy.cpu_budget_percent
+        if budget is None or self._mode != "active":
+            return
+        usage = self._cpu_percent
+        target = self._target()
+        if usage > budget > 0:
+            # CPU use scales roughly with the frame rate.
+            self._cap = max(self.idle_fps, target * budget / usage)
+        elif usage < 0.8 * budget and self._cap < self.active_fps:
+            self._cap = min(self.active_fps, self._cap * 1.25)
+
+    def _target(self) -> float:
+        rate = self.idle_fps if self._mode == "idle" else self.active_fps
+        return float(min(rate, max(self._cap, self.idle_fps)))
+
+    def wait(self, seconds: float) -> bool:
+        """Sleep until the next frame is due; True if woken early by motion or :meth:`wake`."""
+        woken = self._wake.wait(seconds)
+        self._wake.clear()
+        return woken
+
+    def wake(self) -> None:
+        self._wake.set()
+
+    def snapshot(self) -> dict[str, object]:
+        with self._lock:
+            now = self._clock()
+            mode_s = dict(self._mode_s)
+            mode_s[self._mode] += now - self._mode_since
+            return {
+                "mode": self._mode,
+                "target_fps": round(self._target(), 2),
+                "effective_fps": round(self._effective_fps, 2),
+                "active_fps": self.active_fps,
+                "idle_fps": self.idle_fps,
+                "motion": round(self._motion, 5),
+                "cpu_percent": round(self._cpu_percent, 1),
+                "cpu_budget_percent": self.policy.cpu_budget_percent,
+                "cpu_limited": self._cap < self.active_fps,
+                "active_s": round(mode_s["active"], 3),
+                "idle_s": round(mode_s["idle"], 3),
+            }
@@ -0,0 +1,228 @@
+"""Video sources for the capture pipeline.
+
+A source is a USB camera index, a video file or a network stream URL (RTSP,
+HLS/DASH or MJPEG over HTTP, anything OpenCV's FFmpeg backend opens).
+:class:`VideoSource` decodes on its own thread into a small
+:class:`DropOldestQueue`, so the grab stage takes an already decoded frame instead
+of waiting on the device or the network, and a reader that falls behind loses the
+oldest prefetched frame rather than building up latency.
+
+:meth:`VideoSource.set_max_fps` limits how many frames are decoded: the rest are
+still grabbed, to keep a live source from falling behind, but never converted to
+images, which is most of the cost of reading a frame.
+
+When a camera or stream stops delivering frames the source is released and
+reopened with exponential backoff; a file plays once at its own frame rate (or
+loops), which makes a recording a drop-in stand-in for a live camera.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from .pipeline import DropOldestQueue, StageStats
+
+SourceSpec = int | str
+
+# Decoded frames held ahead of the grab stage.
+PREFETCH_FRAMES = 2
+RECONNECT_BACKOFF_S = 0.25
+MAX_RECONNECT_BACKOFF_S = 8.0
+# How long start() waits for the first open before reporting failure.
+OPEN_TIMEOUT_S = 10.0
+URL_SCHEMES = ("rtsp", "rtsps", "rtmp", "http", "https", "udp", "tcp", "srt")
+
+
+def source_kind(spec: SourceSpec) -> str:
+    """``"usb"``, ``"url"`` or ``"file"``; raises ValueError for an unsupported URL scheme."""
+    if isinstance(spec, int) or spec.strip().isdigit():
+        return "usb"
+    if "://" in spec:
+        scheme = spec.split("://", 1)[0].lower()
+        if scheme not in URL_SCHEMES:
+            raise ValueError(f"unsupported stream scheme {scheme!r}")
+        return "url"
+    return "file"
+
+
+def describe_source(spec: SourceSpec) -> str:
+    if source_kind(spec) == "usb":
+        return f"camera index {int(spec)}"
+    return f"{source_kind(spec)} {spec}"
+
+
+def resolve_video_file(video_dir: str | Path, ref: str) -> Path:
+    """Path of video file ``ref`` under ``video_dir``; raises ValueError if outside it or missing."""
+    root = Path(video_dir).resolve()
+    path = (root / ref).resolve()
+    if not path.is_relative_to(root):
+        raise ValueError("video path is outside the video directory")
+    if not path.is_file():
+        raise ValueError(f"video {ref} not found")
+    return path
+
+
+def _open_capture(spec: SourceSpec) -> cv2.VideoCapture:
+    if source_kind(spec) == "usb":
+        return cv2.VideoCapture(int(spec))
+    return cv2.VideoCapture(str(spec))
+
+
+class VideoSource:
+    def __init__(
+        self,
+        spec: SourceSpec,
+        prefetch: int = PREFETCH_FRAMES,
+        backoff_s: float = RECONNECT_BACKOFF_S,
+        max_backoff_s: float = MAX_RECONNECT_BACKOFF_S,
+        loop: bool = False,
+        opener: Callable[[SourceSpec], cv2.VideoCapture] = _open_capture,
+    ) -> None:
+        self.spec = spec
+        self.kind = source_kind(spec)
+        self.loop = loop
+        self.backoff_s = backoff_s
+        self.max_backoff_s = max_backoff_s
+        self._opener = opener
+        self._queue: DropOldestQueue[np.ndarray] = DropOldestQueue(prefetch)
+        # Time per grabbed (and, unless skipped, decoded) frame; the queue's drops are frames the grab stage never took.
+        self.decode = StageStats("decode", self._queue)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._opened = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._connected = False
+        self._finished = False
+        self._reconnects = 0
+        self._last_error: str | None = None
+        self._min_interval = 0.0
+        self._last_decoded = float("-inf")
+
+    def start(self, timeout: float = OPEN_TIMEOUT_S) -> bool:
+        """Start decoding; False if the source could not be opened the first time."""
+        self._thread = threading.Thread(target=self._run, name=f"decode-{self.kind}", daemon=True)
+        self._thread.start()
+        self._opened.wait(timeout)
+        with self._lock:
+            connected = self._connected
+        if not connected:
+            self.close()
+        return connected
+
+    def read(self, timeout: float | None = None) -> np.ndarray | None:
+        """Next decoded frame; None on timeout or once the source has finished."""
+        return self._queue.get(timeout)
+
+    def set_max_fps(self, fps: float | None) -> None:
+        """Decode at most ``fps`` frames per second (None: every frame)."""
+        # A little headroom so a reader at exactly this rate is not left waiting.
+        self._min_interval = 0.0 if not fps else 0.9 / fps
+
+    def _wanted(self) -> bool:
+        now = time.monotonic()
+        if now - self._last_decoded < self._min_interval:
+            return False
+        self._last_decoded = now
+        return True
+
+    @property
+    def finished(self) -> bool:
+        """True once no more frames will come (end of a file, failed open or closed)."""
+        return self._stop.is_set() or (self._queue.closed and len(self._queue) == 0)
+
+    def stats(self) -> dict[str, object]:
+        with self._lock:
+            return {
+                "kind": self.kind,
+                "target": str(self.spec),
+                "connected": self._connected,
+                "finished": self._finished,
+                "reconnects": self._reconnects,
+                "last_error": self._last_error,
+            }
+
+    def close(self) -> None:
+        self._stop.set()
+        self._queue.close()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=2.0)
+
+    def _open(self) -> cv2.VideoCapture | None:
+        cap = self._opener(self.spec)
+        if cap.isOpened():
+            return cap
+        cap.release()
+        return None
+
+    def _set_connected(self, connected: bool, error: str | None = None) -> None:
+        with self._lock:
+            if self._connected and not connected:
+                self._reconnects += 1
+            self._connected = connected
+            if error is not None:
+                self._last_error = error
+
+    def _run(self) -> None:
+        cap: cv2.VideoCapture | None = None
+        backoff = self.backoff_s
+        interval = 0.0
+        next_frame = 0.0
+        try:
+            while not self._stop.is_set():
+                if cap is None:
+                    cap = self._open()
+                    if cap is None:
+                        self._set_connected(False, f"failed to open {describe_source(self.spec)}")
+                        if not self._opened.is_set():
+                            return
+                        self._stop.wait(backoff)
+                        backoff = min(backoff * 2, self.max_backoff_s)
+                        continue
+                    backoff = self.backoff_s
+                    self._set_connected(True)
+                    self._opened.set()
+                    if self.kind == "file":
+                        # Play files at their own rate, like the camera they stand in for.
+                        interval = 1.0 / (cap.get(cv2.CAP_PROP_FPS) or 30.0)
+                        next_frame = time.monotonic()
+
+                with self.decode.timed():
+                    ok = cap.grab()
+                    wanted = ok and self._wanted()
+                    if wanted:
+                        ok, frame = cap.retrieve()
+                if not ok:
+                    if self.kind == "file":
+                        if self.loop and cap.set(cv2.CAP_PROP_POS_FRAMES, 0):
+                            continue
+                        with self._lock:
+                            self._finished = True
+                        return
+                    # Camera unplugged or stream dropped: reopen after a backoff.
+                    cap.release()
+                    cap = None
+                    self._set_connected(False, f"lost {describe_source(self.spec)}; reconnecting")
+                    self._stop.wait(backoff)
+                    continue
+
+                if wanted:
+                    self._queue.put(frame)
+                if interval:
+                    next_frame += interval
+                    delay = next_frame - time.monotonic()
+                    if delay > 0:
+                        self._stop.wait(delay)
+                    else:
+                        next_frame = time.monotonic()
+        finally:
+            if cap is not None:
+                cap.release()
+            with self._lock:
+                self._connected = False
+            self._queue.close()
+            self._opened.set()
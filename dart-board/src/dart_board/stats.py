@@ -0,0 +1,58 @@
+"""Player accuracy summaries computed from the segment-hit rollups.
+
+Inputs are the ``{code: hits}`` maps returned by
+:meth:`DartBoardStore.segment_hits`, at most one entry per board code, so every
+summary costs the same however many throws a player has stored.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from .board import DOUBLE_BASE, DOUBLE_BULL, MISS, SINGLE_BULL, THROW_SCORES, TRIPLE_BASE, labels
+
+
+@dataclass
+class SegmentSummary:
+    label: str
+    hits: int
+    share: float
+
+
+@dataclass
+class HitSummary:
+    throw_count: int
+    average_score: float
+    double_rate: float
+    treble_rate: float
+    bull_rate: float
+    miss_rate: float
+    segments: list[SegmentSummary]
+
+
+def summarize_hits(hits: dict[int, int]) -> HitSummary:
+    """Rates over all throws and per-segment shares, most hit first."""
+    counts = np.zeros(MISS + 1, dtype=np.int64)
+    for code, n in hits.items():
+        counts[code] += n
+    total = int(counts.sum())
+    if total == 0:
+        return HitSummary(0, 0.0, 0.0, 0.0, 0.0, 0.0, [])
+
+    def rate(selected: np.ndarray | int | slice) -> float:
+        return round(float(counts[selected].sum()) / total, 4)
+
+    order = [code for code in np.argsort(-counts, kind="stable") if counts[code] > 0]
+    return HitSummary(
+        throw_count=total,
+        average_score=round(float(counts @ THROW_SCORES) / total, 2),
+        double_rate=rate(np.r_[DOUBLE_BASE:TRIPLE_BASE, DOUBLE_BULL]),
+        treble_rate=rate(slice(TRIPLE_BASE, SINGLE_BULL)),
+        bull_rate=rate([SINGLE_BULL, DOUBLE_BULL]),
+        miss_rate=rate(MISS),
+        segments=[
+            SegmentSummary(label=str(label), hits=int(counts[code]), share=rate(code))
+            for code, label in zip(order, labels(order))
+        ],
+    )
@@ -1,10 +1,17 @@
 from __future__ import annotations
 
+import json
 import sqlite3
 import threading
+from collections import Counter
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from contextlib import contextmanager
 from dataclasses import dataclass
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
+from typing import Protocol
+
+from .board import code_at, lookup
 
 
 @dataclass
@@ -34,59 +41,361 @@ class ThrowRecord:
     confidence: float
 
 
+@dataclass
+class ThrowInput:
+    user_id: str
+    session_id: str
+    x_norm: float
+    y_norm: float
+    confidence: float
+    ts: str | None = None
+
+
+@dataclass
+class ThrowBatchResult:
+    accepted: int
+    rejected: int
+    # (index into the submitted sequence, reason)
+    errors: list[tuple[int, str]]
+
+
+@dataclass
+class CalibrationRecord:
+    camera_index: int
+    # Row-major 3x3 homography from camera-frame pixels to normalized board coordinates.
+    homography: list[float]
+    frame_width: int
+    frame_height: int
+    reprojection_error: float
+    created_at: str
+
+
+class ThrowListener(Protocol):
+    """Receives throw changes after they are committed."""
+
+    def throws_added(self, throws: list[ThrowRecord]) -> None: ...
+
+    def throws_cleared(self, user_id: str) -> None: ...
+
+
+# Applied to every connection. WAL lets readers run concurrently with the writer;
+# synchronous=NORMAL is durable across application crashes in WAL mode.
+PRAGMAS: dict[str, object] = {
+    "synchronous": "NORMAL",
+    "busy_timeout": 5000,
+    "cache_size": -16000,  # KiB, i.e. 16 MiB per connection
+    "mmap_size": 256 * 1024 * 1024,
+    "temp_store": "MEMORY",
+}
+
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def to_epoch_us(ts: str) -> int:
+    """ISO-8601 timestamp (naive means UTC) to integer microseconds since the epoch."""
+    value = datetime.fromisoformat(ts)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    delta = value - _EPOCH
+    return (delta.days * 86_400 + delta.seconds) * 1_000_000 + delta.microseconds
+
+
+def from_epoch_us(us: int) -> str:
+    return (_EPOCH + timedelta(microseconds=us)).isoformat()
+
+
+# Bump SCHEMA_VERSION and append to MIGRATIONS for every schema change; SCHEMA is
+# always the latest layout and is what a new database is created with.
+SCHEMA_VERSION = 3
+US_PER_DAY = 86_400_000_000
+
+SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS users (
+        id TEXT PRIMARY KEY,
+        name TEXT NOT NULL,
+        created_at TEXT NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS sessions (
+        id TEXT PRIMARY KEY,
+        user_id TEXT NOT NULL,
+        started_at TEXT NOT NULL,
+        ended_at TEXT,
+        source_ref TEXT,
+        FOREIGN KEY(user_id) REFERENCES users(id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS throws (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id TEXT NOT NULL,
+        session_id TEXT NOT NULL,
+        ts INTEGER NOT NULL,  -- microseconds since the Unix epoch, UTC
+        x_norm REAL NOT NULL,
+        y_norm REAL NOT NULL,
+        confidence REAL NOT NULL,
+        FOREIGN KEY(user_id) REFERENCES users(id),
+        FOREIGN KEY(session_id) REFERENCES sessions(id)
+    )
+    """,
+    # (user_id) keeps per-user scans in id order without a sort; the composite
+    # indexes serve time ranges per user and chronological session reads.
+    "CREATE INDEX IF NOT EXISTS idx_throws_user ON throws(user_id)",
+    "CREATE INDEX IF NOT EXISTS idx_throws_user_ts ON throws(user_id, ts)",
+    "CREATE INDEX IF NOT EXISTS idx_throws_session_ts ON throws(session_id, ts)",
+)
+
+# Hit counts per board code (see board.THROW_LABELS, MISS included), kept in the
+# same transaction as every insert and clear so stats never scan ``throws``.
+ROLLUP_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS segment_hits (
+        user_id TEXT NOT NULL,
+        session_id TEXT NOT NULL,
+        code INTEGER NOT NULL,
+        hits INTEGER NOT NULL,
+        PRIMARY KEY (user_id, session_id, code)
+    ) WITHOUT ROWID
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS daily_segment_hits (
+        user_id TEXT NOT NULL,
+        day INTEGER NOT NULL,  -- days since the Unix epoch, UTC
+        code INTEGER NOT NULL,
+        hits INTEGER NOT NULL,
+        PRIMARY KEY (user_id, day, code)
+    ) WITHOUT ROWID
+    """,
+)
+
+SCHEMA += ROLLUP_SCHEMA
+
+# One board calibration per camera (see calibration.py).
+CALIBRATION_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS calibrations (
+        camera_index INTEGER PRIMARY KEY,
+        homography TEXT NOT NULL,  -- JSON array of 9 floats, row-major
+        frame_width INTEGER NOT NULL,
+        frame_height INTEGER NOT NULL,
+        reprojection_error REAL NOT NULL,
+        created_at TEXT NOT NULL
+    )
+"""
+
+SCHEMA += (CALIBRATION_SCHEMA,)
+
+RollupRow = tuple[str, str, int, float, float]  # user_id, session_id, ts (us), x_norm, y_norm
+
+
+_UPSERT_SESSION_HITS = """
+    INSERT INTO segment_hits (user_id, session_id, code, hits) VALUES (?, ?, ?, ?)
+    ON CONFLICT (user_id, session_id, code) DO UPDATE SET hits = hits + excluded.hits
+"""
+_UPSERT_DAILY_HITS = """
+    INSERT INTO daily_segment_hits (user_id, day, code, hits) VALUES (?, ?, ?, ?)
+    ON CONFLICT (user_id, day, code) DO UPDATE SET hits = hits + excluded.hits
+"""
+# A session's throws in time order, served by idx_throws_session_ts.
+SESSION_THROWS_QUERY = """
+    SELECT id, user_id, session_id, ts, x_norm, y_norm, confidence
+    FROM throws
+    WHERE session_id = ?
+    ORDER BY ts, id
+"""
+
+
+def _add_to_rollups(conn: sqlite3.Connection, rows: Sequence[RollupRow]) -> None:
+    if not rows:
+        return
+    if len(rows) == 1:
+        # Single live throws: skip the array and Counter setup.
+        user_id, session_id, ts_us, x_norm, y_norm = rows[0]
+        code = code_at(x_norm, y_norm)
+        conn.execute(_UPSERT_SESSION_HITS, (user_id, session_id, code, 1))
+        conn.execute(_UPSERT_DAILY_HITS, (user_id, ts_us // US_PER_DAY, code, 1))
+        return
+    user_ids, session_ids, ts_us, x_norm, y_norm = zip(*rows)
+    codes = lookup(x_norm, y_norm).tolist()
+    by_session = Counter(zip(user_ids, session_ids, codes))
+    by_day = Counter(zip(user_ids, [ts // US_PER_DAY for ts in ts_us], codes))
+    conn.executemany(_UPSERT_SESSION_HITS, [(*key, hits) for key, hits in by_session.items()])
+    conn.executemany(_UPSERT_DAILY_HITS, [(*key, hits) for key, hits in by_day.items()])
+
+
+def _migrate_integer_timestamps(conn: sqlite3.Connection) -> None:
+    """v1: ISO-8601 TEXT ``throws.ts`` to integer epoch microseconds, rebuilt in place.
+
+    Raises ValueError, leaving the database unchanged, if any timestamp does not parse.
+    """
+
+    def convert(ts: object) -> int | None:
+        try:
+            return to_epoch_us(str(ts))
+        except ValueError:
+            return None
+
+    conn.create_function("to_epoch_us", 1, convert, deterministic=True)
+    bad = [row[0] for row in conn.execute("SELECT id FROM throws WHERE to_epoch_us(ts) IS NULL ORDER BY id")]
+    if bad:
+        shown = ", ".join(map(str, bad[:10])) + (", ..." if len(bad) > 10 else "")
+        raise ValueError(f"cannot migrate {len(bad)} throws with unparseable timestamps (ids {shown})")
+    seq = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'throws'").fetchone()
+    conn.execute("ALTER TABLE throws RENAME TO throws_v0")
+    conn.execute("DROP INDEX IF EXISTS idx_throws_user")
+    conn.execute("DROP INDEX IF EXISTS idx_throws_session")
+    conn.execute(SCHEMA[2])
+    conn.execute(
+        """
+        INSERT INTO throws (id, user_id, session_id, ts, x_norm, y_norm, confidence)
+        SELECT id, user_id, session_id, to_epoch_us(ts), x_norm, y_norm, confidence
+        FROM throws_v0
+        """
+    )
+    conn.execute("DROP TABLE throws_v0")
+    if seq is not None:
+        # Keep AUTOINCREMENT from reusing ids of throws deleted before the migration.
+        conn.execute("UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = 'throws'", (seq[0],))
+
+
+def _migrate_rollups(conn: sqlite3.Connection) -> None:
+    """v2: create the hit rollups and backfill them from existing throws."""
+    for statement in ROLLUP_SCHEMA:
+        conn.execute(statement)
+    cursor = conn.execute("SELECT user_id, session_id, ts, x_norm, y_norm FROM throws")
+    while rows := cursor.fetchmany(100_000):
+        _add_to_rollups(conn, [tuple(row) for row in rows])
+
+
+def _migrate_calibrations(conn: sqlite3.Connection) -> None:
+    """v3: add the per-camera calibration table."""
+    conn.execute(CALIBRATION_SCHEMA)
+
+
+MIGRATIONS: list[tuple[int, Callable[[sqlite3.Connection], None]]] = [
+    (1, _migrate_integer_timestamps),
+    (2, _migrate_rollups),
+    (3, _migrate_calibrations),
+]
+
+
+class ConnectionPool:
+    """One shared writer connection plus one reader connection per thread.
+
+    Connections are opened once and reused. Writes are serialized on the writer
+    and run in explicit ``BEGIN IMMEDIATE`` transactions; readers are in autocommit
+    mode so each query sees the latest committed data without blocking the writer.
+    """
+
+    def __init__(self, db_path: Path, pragmas: dict[str, object] | None = None) -> None:
+        self.db_path = db_path
+        self.pragmas = PRAGMAS if pragmas is None else pragmas
+        self._write_lock = threading.Lock()
+        self._local = threading.local()
+        self._readers: list[sqlite3.Connection] = []
+        self._readers_lock = threading.Lock()
+        self._writer = self.open()
+        self._writer.execute("PRAGMA journal_mode=WAL")
+
+    def open(self) -> sqlite3.Connection:
+        """Open a new tuned connection (callers own and must close it)."""
+        conn = sqlite3.connect(self.db_path, isolation_level=None, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name}={value}")
+        return conn
+
+    @contextmanager
+    def read(self) -> Iterator[sqlite3.Connection]:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self.open()
+            self._local.conn = conn
+            with self._readers_lock:
+                self._readers.append(conn)
+        yield conn
+
+    @contextmanager
+    def write(self) -> Iterator[sqlite3.Connection]:
+        with self._write_lock:
+            conn = self._writer
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+                conn.execute("COMMIT")
+            except BaseException:
+                # A failed COMMIT (e.g. SQLITE_BUSY) can leave the transaction open.
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                raise
+
+    def executescript(self, script: str) -> None:
+        with self._write_lock:
+            self._writer.executescript(script)
+
+    def checkpoint(self) -> None:
+        """Sync the WAL and copy it into the database file.
+
+        With ``synchronous=NORMAL`` a commit is only guaranteed to survive power loss
+        once the WAL has been synced, which a checkpoint does.
+        """
+        with self._write_lock:
+            self._writer.execute("PRAGMA wal_checkpoint(PASSIVE)")
+
+    def close(self) -> None:
+        with self._readers_lock:
+            readers, self._readers = self._readers, []
+        for conn in readers:
+            conn.close()
+        with self._write_lock:
+            self._writer.close()
+
+
 class DartBoardStore:
     def __init__(self, db_path: str = "dartboard.db") -> None:
         self.db_path = Path(db_path)
-        self._lock = threading.Lock()
+        self._listeners: list[ThrowListener] = []
+        self._pool = ConnectionPool(self.db_path)
         self._init_db()
 
-    def _connect(self) -> sqlite3.Connection:
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        return conn
+    def add_listener(self, listener: ThrowListener) -> None:
+        self._listeners.append(listener)
+
+    def notify_throws_added(self, throws: list[ThrowRecord]) -> None:
+        """Tell listeners about committed throws, including ones another process stored."""
+        for listener in self._listeners:
+            listener.throws_added(throws)
+
+    def notify_throws_cleared(self, user_id: str) -> None:
+        for listener in self._listeners:
+            listener.throws_cleared(user_id)
+
+    def checkpoint(self) -> None:
+        self._pool.checkpoint()
+
+    def close(self) -> None:
+        self._pool.close()
 
     def _init_db(self) -> None:
-        with self._connect() as conn:
-            conn.executescript(
-                """
-                CREATE TABLE IF NOT EXISTS users (
-                    id TEXT PRIMARY KEY,
-                    name TEXT NOT NULL,
-                    created_at TEXT NOT NULL
-                );
-
-                CREATE TABLE IF NOT EXISTS sessions (
-                    id TEXT PRIMARY KEY,
-                    user_id TEXT NOT NULL,
-                    started_at TEXT NOT NULL,
-                    ended_at TEXT,
-                    source_ref TEXT,
-                    FOREIGN KEY(user_id) REFERENCES users(id)
-                );
-
-                CREATE TABLE IF NOT EXISTS throws (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    user_id TEXT NOT NULL,
-                    session_id TEXT NOT NULL,
-                    ts TEXT NOT NULL,
-                    x_norm REAL NOT NULL,
-                    y_norm REAL NOT NULL,
-                    confidence REAL NOT NULL,
-                    FOREIGN KEY(user_id) REFERENCES users(id),
-                    FOREIGN KEY(session_id) REFERENCES sessions(id)
-                );
-
-                CREATE INDEX IF NOT EXISTS idx_throws_user ON throws(user_id);
-                CREATE INDEX IF NOT EXISTS idx_throws_session ON throws(session_id);
-                """
-            )
+        with self._pool.write() as conn:
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            exists = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'throws'").fetchone()
+            if exists:
+                for target, migrate in MIGRATIONS:
+                    if version < target:
+                        migrate(conn)
+            for statement in SCHEMA:
+                conn.execute(statement)
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
 
     @staticmethod
     def _now_iso() -> str:
         return datetime.now(timezone.utc).isoformat()
 
     def create_user(self, user_id: str, name: str) -> UserRecord:
-        with self._lock, self._connect() as conn:
+        with self._pool.write() as conn:
             created_at = self._now_iso()
             conn.execute(
                 "INSERT INTO users (id, name, created_at) VALUES (?, ?, ?)",
@@ -95,14 +404,14 @@ class DartBoardStore:
             return UserRecord(id=user_id, name=name, created_at=created_at)
 
     def get_user(self, user_id: str) -> UserRecord | None:
-        with self._lock, self._connect() as conn:
+        with self._pool.read() as conn:
             row = conn.execute("SELECT * FROM users WHERE id = ?", (user_id,)).fetchone()
             if row is None:
                 return None
             return UserRecord(id=row["id"], name=row["name"], created_at=row["created_at"])
 
     def create_session(self, session_id: str, user_id: str, source_ref: str | None) -> SessionRecord:
-        with self._lock, self._connect() as conn:
+        with self._pool.write() as conn:
             started_at = self._now_iso()
             conn.execute(
                 "INSERT INTO sessions (id, user_id, started_at, ended_at, source_ref) VALUES (?, ?, ?, ?, ?)",
@@ -117,7 +426,7 @@ class DartBoardStore:
             )
 
     def get_session(self, session_id: str) -> SessionRecord | None:
-        with self._lock, self._connect() as conn:
+        with self._pool.read() as conn:
             row = conn.execute("SELECT * FROM sessions WHERE id = ?", (session_id,)).fetchone()
             if row is None:
                 return None
@@ -137,52 +446,363 @@ class DartBoardStore:
         y_norm: float,
         confidence: float,
     ) -> ThrowRecord:
-        with self._lock, self._connect() as conn:
-            ts = self._now_iso()
+        with self._pool.write() as conn:
+            ts_us = to_epoch_us(self._now_iso())
             cursor = conn.execute(
                 """
                 INSERT INTO throws (user_id, session_id, ts, x_norm, y_norm, confidence)
                 VALUES (?, ?, ?, ?, ?, ?)
                 """,
-                (user_id, session_id, ts, x_norm, y_norm, confidence),
+                (user_id, session_id, ts_us, x_norm, y_norm, confidence),
             )
-            throw_id = int(cursor.lastrowid)
-            return ThrowRecord(
-                id=throw_id,
+            _add_to_rollups(conn, [(user_id, session_id, ts_us, x_norm, y_norm)])
+            throw = ThrowRecord(
+                id=int(cursor.lastrowid),
                 user_id=user_id,
                 session_id=session_id,
-                ts=ts,
+                ts=from_epoch_us(ts_us),
                 x_norm=x_norm,
                 y_norm=y_norm,
                 confidence=confidence,
             )
+        self.notify_throws_added([throw])
+        return throw
+
+    def _existing_ids(self, table: str, column: str, ids: Iterable[str]) -> dict[str, str]:
+        """Map each existing ``id`` in ``table`` to ``column``, querying in chunks."""
+        found: dict[str, str] = {}
+        pending = list(ids)
+        with self._pool.read() as conn:
+            for start in range(0, len(pending), 500):
+                chunk = pending[start:start + 500]
+                placeholders = ", ".join("?" for _ in chunk)
+                rows = conn.execute(
+                    f"SELECT id, {column} FROM {table} WHERE id IN ({placeholders})", chunk
+                ).fetchall()
+                found.update({row[0]: row[1] for row in rows})
+        return found
+
+    def add_throws(self, throws: Sequence[ThrowInput], chunk_size: int = 500) -> list[ThrowBatchResult]:
+        """Insert many throws, one transaction per ``chunk_size`` rows.
+
+        Users and sessions are validated once for the whole sequence; rows with an
+        unknown user or session, or a session owned by another user, are rejected.
+        Returns one result per chunk.
+        """
+        users = self._existing_ids("users", "id", {t.user_id for t in throws})
+        session_owners = self._existing_ids("sessions", "user_id", {t.session_id for t in throws})
+
+        results: list[ThrowBatchResult] = []
+        for start in range(0, len(throws), chunk_size):
+            chunk = throws[start:start + chunk_size]
+            errors: list[tuple[int, str]] = []
+            params: list[tuple[str, str, int, float, float, float]] = []
+            now = to_epoch_us(self._now_iso())
+            for index, throw in enumerate(chunk, start=start):
+                owner = session_owners.get(throw.session_id)
+                if throw.user_id not in users:
+                    errors.append((index, "user not found"))
+                elif owner is None:
+                    errors.append((index, "session not found"))
+                elif owner != throw.user_id:
+                    errors.append((index, "session does not belong to user"))
+                else:
+                    try:
+                        ts_us = to_epoch_us(throw.ts) if throw.ts else now
+                    except ValueError:
+                        errors.append((index, "invalid timestamp"))
+                        continue
+                    params.append(
+                        (throw.user_id, throw.session_id, ts_us, throw.x_norm, throw.y_norm, throw.confidence)
+                    )
+
+            records: list[ThrowRecord] = []
+            if params:
+                with self._pool.write() as conn:
+                    conn.executemany(
+                        """
+                        INSERT INTO throws (user_id, session_id, ts, x_norm, y_norm, confidence)
+                        VALUES (?, ?, ?, ?, ?, ?)
+                        """,
+                        params,
+                    )
+                    _add_to_rollups(conn, [row[:5] for row in params])
+                    # Rows inserted in one write transaction get consecutive ids.
+                    last_id = int(conn.execute("SELECT last_insert_rowid()").fetchone()[0])
+                first_id = last_id - len(params) + 1
+                records = [
+                    ThrowRecord(
+                        id=first_id + offset,
+                        user_id=user_id,
+                        session_id=session_id,
+                        ts=from_epoch_us(ts_us),
+                        x_norm=x_norm,
+                        y_norm=y_norm,
+                        confidence=confidence,
+                    )
+                    for offset, (user_id, session_id, ts_us, x_norm, y_norm, confidence) in enumerate(params)
+                ]
+                self.notify_throws_added(records)
+            results.append(ThrowBatchResult(accepted=len(records), rejected=len(errors), errors=errors))
+        return results
+
+    @staticmethod
+    def _throw_from_row(row: sqlite3.Row | tuple) -> ThrowRecord:
+        throw_id, user_id, session_id, ts_us, x_norm, y_norm, confidence = row
+        return ThrowRecord(
+            id=throw_id,
+            user_id=user_id,
+            session_id=session_id,
+            ts=from_epoch_us(ts_us),
+            x_norm=x_norm,
+            y_norm=y_norm,
+            confidence=confidence,
+        )
+
+    @staticmethod
+    def _throw_query(
+        user_id: str,
+        after_id: int = 0,
+        session_id: str | None = None,
+        since: str | None = None,
+        until: str | None = None,
+        limit: int | None = None,
+    ) -> tuple[str, tuple[object, ...]]:
+        """Keyset query over a user's throws in id order; ``since``/``until`` bound ``ts`` as [since, until)."""
+        # A time range is the selective predicate; without statistics the planner
+        # prefers idx_throws_user for its id order and would scan the whole history.
+        index = "idx_throws_user_ts" if since is not None or until is not None else "idx_throws_user"
+        query = (
+            "SELECT id, user_id, session_id, ts, x_norm, y_norm, confidence "
+            f"FROM throws INDEXED BY {index} WHERE user_id = ? AND id > ?"
+        )
+        params: tuple[object, ...] = (user_id, after_id)
+        if session_id is not None:
+            query += " AND session_id = ?"
+            params += (session_id,)
+        if since is not None:
+            query += " AND ts >= ?"
+            params += (to_epoch_us(since),)
+        if until is not None:
+            query += " AND ts < ?"
+            params += (to_epoch_us(until),)
+        query += " ORDER BY id ASC"
+        if limit is not None:
+            query += " LIMIT ?"
+            params += (limit,)
+        return query, params
 
     def list_throws_for_user(self, user_id: str) -> list[ThrowRecord]:
-        with self._lock, self._connect() as conn:
-            rows = conn.execute(
+        return self.list_throws(user_id)
+
+    def list_throws(
+        self,
+        user_id: str,
+        after_id: int = 0,
+        limit: int | None = None,
+        session_id: str | None = None,
+        since: str | None = None,
+        until: str | None = None,
+    ) -> list[ThrowRecord]:
+        """One page of a user's throws with ``id > after_id``, oldest first."""
+        query, params = self._throw_query(user_id, after_id, session_id, since, until, limit)
+        with self._pool.read() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = None
+            return [self._throw_from_row(row) for row in cursor.execute(query, params)]
+
+    def list_session_throws(self, session_id: str) -> list[ThrowRecord]:
+        """A session's throws in chronological order."""
+        with self._pool.read() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = None
+            rows = cursor.execute(SESSION_THROWS_QUERY, (session_id,))
+            return [self._throw_from_row(row) for row in rows]
+
+    def iter_throw_batches(
+        self,
+        user_id: str,
+        after_id: int = 0,
+        session_id: str | None = None,
+        since: str | None = None,
+        until: str | None = None,
+        batch_size: int = 1000,
+    ) -> Iterator[list[ThrowRecord]]:
+        """Yield a user's throws in batches of ``batch_size`` using ``fetchmany``.
+
+        Runs on its own connection, so the generator may be resumed from any thread
+        (e.g. by a streaming response) and only one batch is held in memory.
+        """
+        query, params = self._throw_query(user_id, after_id, session_id, since, until)
+        conn = self._pool.open()
+        try:
+            cursor = conn.cursor()
+            cursor.row_factory = None
+            cursor.execute(query, params)
+            while rows := cursor.fetchmany(batch_size):
+                yield [self._throw_from_row(row) for row in rows]
+        finally:
+            conn.close()
+
+    def latest_throw(self, user_id: str, session_id: str | None = None) -> ThrowRecord | None:
+        """Most recent throw for a user (optionally within one session)."""
+        query = "SELECT id, user_id, session_id, ts, x_norm, y_norm, confidence FROM throws WHERE user_id = ?"
+        params: tuple[object, ...] = (user_id,)
+        if session_id is not None:
+            query += " AND session_id = ?"
+            params += (session_id,)
+        with self._pool.read() as conn:
+            row = conn.execute(query + " ORDER BY id DESC LIMIT 1", params).fetchone()
+            if row is None:
+                return None
+            return ThrowRecord(
+                id=row["id"],
+                user_id=row["user_id"],
+                session_id=row["session_id"],
+                ts=from_epoch_us(row["ts"]),
+                x_norm=row["x_norm"],
+                y_norm=row["y_norm"],
+                confidence=row["confidence"],
+            )
+
+    def throw_watermark(self, user_id: str, session_id: str | None = None) -> tuple[int, int]:
+        """``(highest id, count)`` of a user's throws (optionally within one session).
+
+        Caches built from stored throws compare against it to notice throws added or
+        cleared by another process; ``(0, 0)`` when there are none.
+        """
+        query = "SELECT COALESCE(MAX(id), 0), COUNT(*) FROM throws WHERE user_id = ?"
+        params: tuple[object, ...] = (user_id,)
+        if session_id is not None:
+            query += " AND session_id = ?"
+            params += (session_id,)
+        with self._pool.read() as conn:
+            max_id, count = conn.execute(query, params).fetchone()
+            return int(max_id), int(count)
+
+    def list_throw_points(
+        self,
+        user_id: str,
+        after_id: int = 0,
+        session_id: str | None = None,
+    ) -> list[tuple[int, float, float, float]]:
+        """Return ``(id, x_norm, y_norm, confidence)`` tuples with ``id > after_id``.
+
+        Skips building :class:`ThrowRecord` objects so callers can load large
+        histories straight into NumPy arrays.
+        """
+        query = "SELECT id, x_norm, y_norm, confidence FROM throws WHERE user_id = ? AND id > ?"
+        params: tuple[object, ...] = (user_id, after_id)
+        if session_id is not None:
+            query += " AND session_id = ?"
+            params += (session_id,)
+        with self._pool.read() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = None
+            return cursor.execute(query + " ORDER BY id ASC", params).fetchall()
+
+    def segment_hits(
+        self,
+        user_id: str,
+        session_id: str | None = None,
+        since_day: int | None = None,
+        until_day: int | None = None,
+    ) -> dict[int, int]:
+        """Hits per board code from the rollups.
+
+        ``since_day``/``until_day`` (days since the epoch, ``[since, until)``) read the
+        daily rollup and cannot be combined with ``session_id``.
+        """
+        if since_day is None and until_day is None:
+            query = "SELECT code, SUM(hits) FROM segment_hits WHERE user_id = ?"
+            params: tuple[object, ...] = (user_id,)
+            if session_id is not None:
+                query += " AND session_id = ?"
+                params += (session_id,)
+        elif session_id is not None:
+            raise ValueError("session and day filters cannot be combined")
+        else:
+            query = "SELECT code, SUM(hits) FROM daily_segment_hits WHERE user_id = ? AND day >= ? AND day < ?"
+            params = (user_id, since_day if since_day is not None else 0, until_day if until_day is not None else 2**62)
+        with self._pool.read() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = None
+            return dict(cursor.execute(query + " GROUP BY code", params).fetchall())
+
+    def daily_throw_counts(
+        self,
+        user_id: str,
+        since_day: int | None = None,
+        until_day: int | None = None,
+    ) -> list[tuple[int, int]]:
+        """``(day, throws)`` pairs from the daily rollup, oldest first."""
+        with self._pool.read() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = None
+            return cursor.execute(
                 """
-                SELECT id, user_id, session_id, ts, x_norm, y_norm, confidence
-                FROM throws
-                WHERE user_id = ?
-                ORDER BY id ASC
+                SELECT day, SUM(hits) FROM daily_segment_hits
+                WHERE user_id = ? AND day >= ? AND day < ?
+                GROUP BY day ORDER BY day
                 """,
-                (user_id,),
+                (user_id, since_day if since_day is not None else 0, until_day if until_day is not None else 2**62),
             ).fetchall()
-            return [
-                ThrowRecord(
-                    id=row["id"],
-                    user_id=row["user_id"],
-                    session_id=row["session_id"],
-                    ts=row["ts"],
-                    x_norm=row["x_norm"],
-                    y_norm=row["y_norm"],
-                    confidence=row["confidence"],
-                )
-                for row in rows
-            ]
+
+    def save_calibration(
+        self,
+        camera_index: int,
+        homography: Sequence[float],
+        frame_width: int,
+        frame_height: int,
+        reprojection_error: float,
+    ) -> CalibrationRecord:
+        """Store the calibration for a camera, replacing any earlier one."""
+        record = CalibrationRecord(
+            camera_index=camera_index,
+            homography=[float(v) for v in homography],
+            frame_width=frame_width,
+            frame_height=frame_height,
+            reprojection_error=reprojection_error,
+            created_at=self._now_iso(),
+        )
+        with self._pool.write() as conn:
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO calibrations
+                    (camera_index, homography, frame_width, frame_height, reprojection_error, created_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    camera_index,
+                    json.dumps(record.homography),
+                    frame_width,
+                    frame_height,
+                    reprojection_error,
+                    record.created_at,
+                ),
+            )
+        return record
+
+    def get_calibration(self, camera_index: int) -> CalibrationRecord | None:
+        with self._pool.read() as conn:
+            row = conn.execute("SELECT * FROM calibrations WHERE camera_index = ?", (camera_index,)).fetchone()
+        if row is None:
+            return None
+        return CalibrationRecord(
+            camera_index=row["camera_index"],
+            homography=json.loads(row["homography"]),
+            frame_width=row["frame_width"],
+            frame_height=row["frame_height"],
+            reprojection_error=row["reprojection_error"],
+            created_at=row["created_at"],
+        )
 
     def clear_throws_for_user(self, user_id: str) -> int:
         """Delete all throws for a user. Returns the number of rows deleted."""
-        with self._lock, self._connect() as conn:
+        with self._pool.write() as conn:
             cursor = conn.execute("DELETE FROM throws WHERE user_id = ?", (user_id,))
-            return cursor.rowcount
+            deleted = cursor.rowcount
+            conn.execute("DELETE FROM segment_hits WHERE user_id = ?", (user_id,))
+            conn.execute("DELETE FROM daily_segment_hits WHERE user_id = ?", (user_id,))
+        self.notify_throws_cleared(user_id)
+        return deleted
@@ -0,0 +1,296 @@
+"""Whole-game x01 aim strategy.
+
+Solves the Markov decision process "which target minimizes the expected number of
+darts still needed" for every score up to 501, using a player's outcome matrix from
+:mod:`accuracy`. A state is ``(visit start score, darts left in visit, points scored
+so far in visit)``; a bust returns the player to the visit start score with three
+fresh darts, which makes each visit start value depend on itself. That fixed point
+is solved per score with policy iteration on the affine form ``a + b * x``.
+"""
+from __future__ import annotations
+
+import hashlib
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from .accuracy import PRIOR_SIGMA, PlayerModelCache, outcome_matrix
+from .board import MISS, THROW_LABELS, THROW_SCORES
+from .checkout_table import OutRule, finishing_throws
+
+logger = logging.getLogger(__name__)
+
+MAX_START_SCORE = 501
+DARTS_PER_VISIT = 3
+MAX_VISIT_POINTS = 60 * (DARTS_PER_VISIT - 1)
+# A stored policy is re-solved once the player's covariance drifts by more than this.
+POLICY_REFRESH_TOLERANCE = 0.05
+_MAX_ITERATIONS = 50
+_UNREACHABLE = 1e4
+
+_OUTCOME_VALUES = THROW_SCORES.astype(np.int64)
+
+
+def _finisher_mask(out_rule: OutRule) -> np.ndarray:
+    mask = np.zeros(MISS + 1, dtype=bool)
+    mask[[THROW_LABELS.index(label) for label in finishing_throws(out_rule)]] = True
+    return mask
+
+
+@dataclass
+class StrategyPolicy:
+    """Solved aim codes and expected darts for every reachable state.
+
+    Arrays are indexed ``[visit_start_score, darts_left - 1, scored_this_visit]``.
+    """
+
+    out_rule: str
+    aims: np.ndarray  # uint8
+    values: np.ndarray  # float16, expected darts remaining
+    covariance: np.ndarray
+
+    @property
+    def max_score(self) -> int:
+        return self.aims.shape[0] - 1
+
+    def advise(self, score: int, darts_left: int = DARTS_PER_VISIT, scored_this_visit: int = 0) -> tuple[str, float]:
+        """Return ``(target label, expected darts to finish)`` for the current state."""
+        start = score + scored_this_visit
+        if not 1 <= darts_left <= DARTS_PER_VISIT:
+            raise ValueError("darts_left must be between 1 and 3")
+        if scored_this_visit < 0 or scored_this_visit > 60 * (DARTS_PER_VISIT - darts_left):
+            raise ValueError("scored_this_visit is not reachable with that many darts thrown")
+        if score < 1 or start > self.max_score:
+            raise ValueError(f"score must be between 1 and {self.max_score}")
+        value = float(self.values[start, darts_left - 1, scored_this_visit])
+        if value >= _UNREACHABLE:
+            raise ValueError("score cannot be finished under this out rule")
+        return THROW_LABELS[int(self.aims[start, darts_left - 1, scored_this_visit])], value
+
+    def save(self, path: str | Path) -> None:
+        with open(path, "wb") as fh:
+            np.savez_compressed(
+                fh,
+                out_rule=np.array(self.out_rule),
+                aims=self.aims,
+                values=self.values,
+                covariance=self.covariance,
+            )
+
+    @classmethod
+    def load(cls, path: str | Path) -> StrategyPolicy:
+        with np.load(path) as packed:
+            return cls(
+                out_rule=str(packed["out_rule"]),
+                aims=packed["aims"],
+                values=packed["values"],
+                covariance=packed["covariance"],
+            )
+
+
+def solve_policy(
+    matrix: np.ndarray,
+    out_rule: OutRule = "double",
+    max_score: int = MAX_START_SCORE,
+    covariance: np.ndarray | None = None,
+) -> StrategyPolicy:
+    """Solve the aim policy for an outcome matrix ``P[aim, outcome]``."""
+    finisher = _finisher_mask(out_rule)
+    min_left = 1 if out_rule == "straight" else 2
+    if len(THROW_LABELS) > 255:
+        raise ValueError("too many aim targets for uint8 policy storage")
+    probs_t = np.ascontiguousarray(matrix[:, : MISS + 1].T)  # (outcomes, aims)
+
+    turn_value = np.full(max_score + 1, _UNREACHABLE, dtype=np.float64)
+    turn_value[0] = 0.0
+    policy = np.zeros((max_score + 1, DARTS_PER_VISIT, MAX_VISIT_POINTS + 1), dtype=np.uint8)
+    values = np.full(policy.shape, _UNREACHABLE, dtype=np.float64)
+    u_all = np.arange(MAX_VISIT_POINTS + 1)
+
+    x = 3.0
+    for start in range(min_left, max_score + 1):
+        # Per darts-left: points already scored that leave the player on the board.
+        layers = []
+        for d in range(1, DARTS_PER_VISIT + 1):
+            u = u_all[(u_all <= 60 * (DARTS_PER_VISIT - d)) & (start - u_all >= min_left)]
+            left = start - u[:, None] - _OUTCOME_VALUES[None, :]
+            finished = (left == 0) & finisher[None, :]
+            bust = (left < 0) | ((left == 0) & ~finisher[None, :]) | ((left > 0) & (left < min_left))
+            alive = ~(finished | bust)
+            if d == 1:
+                # The visit ends: known value of a lower score, or x again after scoring nothing.
+                restart = bust | (alive & (left == start))
+                carry = np.where(alive & ~restart, turn_value[np.clip(left, 0, max_score)], 0.0)
+            else:
+                restart = bust
+                carry = np.minimum(u[:, None] + _OUTCOME_VALUES[None, :], MAX_VISIT_POINTS)
+            layers.append((u, alive & ~restart, restart, carry))
+
+        chosen: list[np.ndarray] = []
+        for _ in range(_MAX_ITERATIONS):
+            chosen = []
+            a_prev = np.zeros(MAX_VISIT_POINTS + 1)
+            b_prev = np.zeros(MAX_VISIT_POINTS + 1)
+            for d, (u, cont, restart, carry) in enumerate(layers, start=1):
+                if d == 1:
+                    a_next = carry
+                    b_next = restart.astype(np.float64)
+                else:
+                    a_next = np.where(cont, a_prev[carry], 0.0)
+                    b_next = np.where(cont, b_prev[carry], restart.astype(np.float64))
+                q_a = 1.0 + a_next @ probs_t
+                q_b = b_next @ probs_t
+                best = np.argmin(q_a + q_b * x, axis=1)
+                rows = np.arange(len(u))
+                a_prev = np.zeros(MAX_VISIT_POINTS + 1)
+                b_prev = np.zeros(MAX_VISIT_POINTS + 1)
+                a_prev[u] = q_a[rows, best]
+                b_prev[u] = q_b[rows, best]
+                chosen.append(best)
+
+            b0 = b_prev[0]
+            x_new = min(a_prev[0] / (1.0 - b0), _UNREACHABLE) if b0 < 1.0 - 1e-12 else _UNREACHABLE
+            converged = abs(x_new - x) <= 1e-9 * max(1.0, x_new)
+            x = x_new
+            if converged:
+                break
+
+        turn_value[start] = x
+        for d, ((u, cont, restart, carry), best) in enumerate(zip(layers, chosen), start=1):
+            if d == 1:
+                nxt = carry + restart * x
+            else:
+                nxt = np.where(cont, values[start, d - 2][carry], restart * x)
+            q = 1.0 + nxt @ probs_t
+            policy[start, d - 1, u] = best
+            values[start, d - 1, u] = q[np.arange(len(u)), best]
+
+    return StrategyPolicy(
+        out_rule=out_rule,
+        aims=policy,
+        values=np.minimum(values, _UNREACHABLE).astype(np.float16),
+        covariance=np.eye(2) * PRIOR_SIGMA**2 if covariance is None else covariance,
+    )
+
+
+def _covariance_changed(old: np.ndarray, new: np.ndarray) -> bool:
+    return not np.allclose(old, new, rtol=POLICY_REFRESH_TOLERANCE, atol=0)
+
+
+class StrategyCache:
+    """Per-user policies solved on a background worker.
+
+    ``get`` never blocks on a solve: it returns the best policy currently available
+    (the user's own, possibly slightly stale, else the prior-player policy) and
+    schedules a re-solve when the player's covariance has drifted past
+    ``POLICY_REFRESH_TOLERANCE``. Solved policies are written to ``policy_dir`` when
+    one is configured so restarts can reuse them.
+    """
+
+    def __init__(
+        self,
+        player_models: PlayerModelCache,
+        policy_dir: str | Path | None = None,
+        max_policies: int = 64,
+    ) -> None:
+        self.player_models = player_models
+        self.policy_dir = Path(policy_dir) if policy_dir else None
+        if self.policy_dir is not None:
+            self.policy_dir.mkdir(parents=True, exist_ok=True)
+        self.max_policies = max_policies
+        self._lock = threading.Lock()
+        self._policies: dict[tuple[str, str], StrategyPolicy] = {}
+        self._defaults: dict[str, StrategyPolicy] = {}
+        self._pending: dict[tuple[str | None, str], Future] = {}
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="strategy-solver")
+
+    def _path(self, user_id: str, out_rule: str) -> Path | None:
+        if self.policy_dir is None:
+            return None
+        digest = hashlib.sha1(user_id.encode("utf-8")).hexdigest()[:16]
+        return self.policy_dir / f"{digest}-{out_rule}.npz"
+
+    def get(self, user_id: str, out_rule: OutRule = "double") -> tuple[StrategyPolicy | None, bool]:
+        """Return ``(policy, personalised)``; ``policy`` is None until a first solve lands."""
+        covariance = self.player_models.get(user_id).stats.covariance()
+        key = (user_id, out_rule)
+        with self._lock:
+            policy = self._policies.pop(key, None)
+            if policy is not None:
+                self._policies[key] = policy
+        if policy is None:
+            path = self._path(user_id, out_rule)
+            if path is not None and path.exists():
+                try:
+                    policy = StrategyPolicy.load(path)
+                except (OSError, ValueError, KeyError):
+                    logger.warning("ignoring unreadable policy file %s", path)
+                if policy is not None:
+                    self._remember(key, policy)
+
+        if policy is None or _covariance_changed(policy.covariance, covariance):
+            self._schedule(user_id, out_rule)
+        if policy is not None:
+            return policy, True
+
+        with self._lock:
+            default = self._defaults.get(out_rule)
+        if default is None:
+            self._schedule(None, out_rule)
+        return default, False
+
+    def _remember(self, key: tuple[str, str], policy: StrategyPolicy) -> None:
+        with self._lock:
+            self._policies.pop(key, None)
+            self._policies[key] = policy
+            while len(self._policies) > self.max_policies:
+                self._policies.pop(next(iter(self._policies)))
+
+    def _schedule(self, user_id: str | None, out_rule: OutRule) -> Future:
+        key = (user_id, out_rule)
+        with self._lock:
+            pending = self._pending.get(key)
+            if pending is not None:
+                return pending
+            future = self._executor.submit(self._solve, user_id, out_rule)
+            self._pending[key] = future
+            return future
+
+    def _solve(self, user_id: str | None, out_rule: OutRule) -> StrategyPolicy | None:
+        try:
+            if user_id is None:
+                covariance = np.eye(2) * PRIOR_SIGMA**2
+                matrix = outcome_matrix(covariance)
+            else:
+                model = self.player_models.get(user_id)
+                covariance = model.stats.covariance()
+                matrix = model.outcome_matrix()
+            policy = solve_policy(matrix, out_rule=out_rule, covariance=covariance)
+            if user_id is None:
+                with self._lock:
+                    self._defaults[out_rule] = policy
+            else:
+                self._remember((user_id, out_rule), policy)
+                path = self._path(user_id, out_rule)
+                if path is not None:
+                    policy.save(path)
+            return policy
+        except Exception:  # noqa: BLE001
+            logger.exception("strategy solve failed for %s/%s", user_id, out_rule)
+            return None
+        finally:
+            with self._lock:
+                self._pending.pop((user_id, out_rule), None)
+
+    def wait(self, user_id: str | None = None, out_rule: OutRule = "double") -> StrategyPolicy | None:
+        """Block until a scheduled solve finishes (used by tests and warm-up scripts)."""
+        with self._lock:
+            future = self._pending.get((user_id, out_rule))
+        return future.result() if future is not None else None
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
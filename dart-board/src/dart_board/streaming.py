@@ -0,0 +1,193 @@
+"""Frame broadcast hub between the capture thread and async stream viewers.
+
+The capture thread publishes raw frames with a sequence number. Viewers subscribe
+with a :class:`StreamVariant` (width and JPEG quality); on each publish the hub
+encodes every subscribed variant exactly once and shares the resulting multipart
+part, header included, with all viewers of that variant. With no subscribers
+nothing is encoded.
+
+Viewers await :meth:`FrameHub.next_part` with the last sequence they sent and get
+the newest part after it, so every frame goes to a client at most once and a slow
+client (or one that asked for a lower fps) skips straight to the current frame
+instead of queueing stale ones. Waiting is an asyncio future per viewer, woken
+thread-safely by the publisher, so viewers hold no threadpool worker.
+"""
+from __future__ import annotations
+
+import asyncio
+import threading
+from collections import Counter
+from collections.abc import AsyncIterator, Callable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Protocol
+
+import cv2
+import numpy as np
+
+MJPEG_BOUNDARY = "frame"
+DEFAULT_QUALITY = 80
+_PART_HEADER = f"--{MJPEG_BOUNDARY}\r\nContent-Type: image/jpeg\r\n\r\n".encode("ascii")
+
+
+@dataclass(frozen=True)
+class StreamVariant:
+    width: int | None = None  # None keeps the captured resolution
+    quality: int = DEFAULT_QUALITY
+
+
+def encode_jpeg(frame: np.ndarray, variant: StreamVariant) -> np.ndarray:
+    if variant.width is not None and variant.width < frame.shape[1]:
+        height = max(1, round(frame.shape[0] * variant.width / frame.shape[1]))
+        frame = cv2.resize(frame, (variant.width, height), interpolation=cv2.INTER_AREA)
+    ok, jpeg = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, variant.quality])
+    if not ok:
+        raise RuntimeError("failed to encode frame")
+    return jpeg
+
+
+def _multipart(jpeg: np.ndarray) -> bytes:
+    # join reads the encoder's buffer directly: one copy into the final part.
+    return b"".join((_PART_HEADER, jpeg, b"\r\n"))
+
+
+class FrameSink(Protocol):
+    """Where the capture pipeline publishes frames: a :class:`FrameHub` or a shared-memory ring."""
+
+    def open(self) -> None: ...
+
+    def publish(self, frame: np.ndarray) -> None: ...
+
+    def close(self) -> None: ...
+
+    def snapshot(self) -> bytes | None: ...
+
+
+def _wake(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+class FrameHub:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._seq = 0
+        self._frame: np.ndarray | None = None
+        self._parts: dict[StreamVariant, bytes] = {}
+        self._subscribers: Counter[StreamVariant] = Counter()
+        self._closed = True
+        self._waiters: set[tuple[asyncio.AbstractEventLoop, asyncio.Future]] = set()
+        self.encodes = 0
+
+    @property
+    def seq(self) -> int:
+        return self._seq
+
+    @property
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return sum(self._subscribers.values())
+
+    def open(self) -> None:
+        """Accept viewers until :meth:`close` (called when capture starts)."""
+        with self._lock:
+            self._closed = False
+
+    def publish(self, frame: np.ndarray, still_valid: Callable[[], bool] | None = None) -> None:
+        """Publish a raw BGR frame, encoding it once per subscribed variant.
+
+        ``still_valid`` is checked after encoding when ``frame`` is a view into memory
+        another process may overwrite; the frame is dropped if it returns False.
+        """
+        with self._lock:
+            variants = list(self._subscribers)
+        parts = {variant: _multipart(encode_jpeg(frame, variant)) for variant in variants}
+        if still_valid is not None and not still_valid():
+            return
+        with self._lock:
+            self._seq += 1
+            self._frame = frame
+            self._parts = parts
+            self.encodes += len(parts)
+            waiters, self._waiters = self._waiters, set()
+        self._notify(waiters)
+
+    def close(self) -> None:
+        """Drop the current frame and end every waiting stream."""
+        with self._lock:
+            self._closed = True
+            self._frame = None
+            self._parts = {}
+            waiters, self._waiters = self._waiters, set()
+        self._notify(waiters)
+
+    def snapshot(self, variant: StreamVariant = StreamVariant()) -> bytes | None:
+        """JPEG of the latest frame for non-streaming callers, encoded on demand."""
+        with self._lock:
+            frame = self._frame
+        return None if frame is None else encode_jpeg(frame, variant).tobytes()
+
+    @contextmanager
+    def subscribe(self, variant: StreamVariant) -> Iterator[None]:
+        with self._lock:
+            self._subscribers[variant] += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._subscribers[variant] -= 1
+                if self._subscribers[variant] <= 0:
+                    del self._subscribers[variant]
+
+    @staticmethod
+    def _notify(waiters: set[tuple[asyncio.AbstractEventLoop, asyncio.Future]]) -> None:
+        for loop, future in waiters:
+            try:
+                loop.call_soon_threadsafe(_wake, future)
+            except RuntimeError:  # viewer's loop already closed
+                pass
+
+    async def next_part(self, after_seq: int, variant: StreamVariant) -> tuple[int, bytes] | None:
+        """Wait for a part of ``variant`` newer than ``after_seq``; None once the hub closes.
+
+        The caller must hold a :meth:`subscribe` for ``variant``; a frame published
+        before the subscription took effect has no part and is skipped.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._lock:
+                part = self._parts.get(variant)
+                if self._seq > after_seq and part is not None:
+                    return self._seq, part
+                if self._closed:
+                    return None
+                waiter = (loop, loop.create_future())
+                self._waiters.add(waiter)
+            try:
+                await waiter[1]
+            finally:
+                with self._lock:
+                    self._waiters.discard(waiter)
+
+
+async def mjpeg_stream(
+    hub: FrameHub,
+    variant: StreamVariant = StreamVariant(),
+    fps: float | None = None,
+) -> AsyncIterator[bytes]:
+    """Multipart MJPEG body, at most ``fps`` frames per second, until the hub closes."""
+    loop = asyncio.get_running_loop()
+    interval = 1.0 / fps if fps else 0.0
+    with hub.subscribe(variant):
+        seq = 0
+        next_at = 0.0
+        while True:
+            delay = next_at - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            latest = await hub.next_part(seq, variant)
+            if latest is None:
+                return
+            seq, part = latest
+            next_at = loop.time() + interval
+            yield part
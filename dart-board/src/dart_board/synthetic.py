@@ -0,0 +1,245 @@
+"""Synthetic board video with known dart impacts, for benchmarks and accuracy tests.
+
+:class:`SyntheticBoardVideo` renders what a camera facing the board would see:
+the board drawn by :mod:`heatmap` filling the centre square of a wall-coloured
+frame (the square capture keeps), darts that land at known board coordinates and
+stay until the visit's darts are pulled, slow lighting drift with a few sudden
+brightness changes, and per-pixel sensor noise. Everything derives from the
+seed, so a scene is identical on every machine.
+
+The centre square maps straight to board coordinates, so a detector run on
+square-cropped frames reports positions comparable with
+:attr:`SyntheticBoardVideo.throws`; :func:`score_detections` matches the two into
+precision and recall, and :func:`evaluate_detector` also times every frame.
+"""
+from __future__ import annotations
+
+import math
+import time
+from collections.abc import Iterator
+from dataclasses import dataclass
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from .board import BOARD_CENTER, BOARD_RADIUS
+from .cv import LiveImpactDetector
+from .heatmap import draw_dartboard
+from .ingest import square_crop
+from .offline import VideoHit
+
+WALL = (95, 100, 105)
+FLIGHT = (40, 210, 235)
+BARREL = (45, 45, 45)
+# Noise frames rendered up front and cycled; enough that no two consecutive frames repeat.
+NOISE_BANK = 8
+# A detection counts for a throw within this delay and distance (board units).
+MAX_DELAY_S = 0.5
+MAX_DISTANCE = 0.03
+
+
+@dataclass(frozen=True)
+class SceneConfig:
+    width: int = 1280
+    height: int = 720
+    fps: float = 30.0
+    seconds: float = 30.0
+    darts_per_visit: int = 3
+    throw_interval_s: float = 1.5
+    # Darts are pulled this long after the visit's last dart, and the next visit starts as long again later.
+    pull_after_s: float = 2.0
+    dart_size: float = 0.045  # flight radius as a share of the board image
+    noise_sigma: float = 3.0
+    lighting_drift: float = 0.08  # gain amplitude of the slow lighting cycle
+    lighting_period_s: float = 20.0
+    lighting_steps: int = 2  # sudden brightness changes over the clip
+    lighting_step: float = 0.06
+    seed: int = 0
+
+    @property
+    def frame_count(self) -> int:
+        return round(self.seconds * self.fps)
+
+
+@dataclass(frozen=True)
+class SyntheticThrow:
+    frame: int  # first frame the dart is visible on
+    x_norm: float
+    y_norm: float
+
+
+@dataclass(frozen=True)
+class AccuracyReport:
+    throws: int
+    detections: int
+    true_positives: int
+    precision: float
+    recall: float
+    mean_error: float  # board units, over matched detections
+
+
+@dataclass
+class DetectorRun:
+    frames: int
+    latencies_ms: np.ndarray
+    detections: list[VideoHit]
+    accuracy: AccuracyReport
+
+    @property
+    def fps(self) -> float:
+        total_s = float(self.latencies_ms.sum()) / 1000
+        return self.frames / total_s if total_s > 0 else 0.0
+
+    def percentile_ms(self, q: float) -> float:
+        return float(np.percentile(self.latencies_ms, q))
+
+
+class SyntheticBoardVideo:
+    def __init__(self, config: SceneConfig | None = None) -> None:
+        self.config = config if config is not None else SceneConfig()
+        cfg = self.config
+        rng = np.random.default_rng(cfg.seed)
+        self.board_size = min(cfg.width, cfg.height)
+        self._offset = ((cfg.width - self.board_size) // 2, (cfg.height - self.board_size) // 2)
+        self._wall = np.full((cfg.height, cfg.width, 3), WALL, dtype=np.uint8)
+        x, y = self._offset
+        self._wall[y:y + self.board_size, x:x + self.board_size] = draw_dartboard(self.board_size)
+
+        self.throws: list[SyntheticThrow] = []
+        # (frame, darts on the board from that frame on), in frame order.
+        self._scenes: list[tuple[int, tuple[SyntheticThrow, ...]]] = [(0, ())]
+        t = 1.0
+        while True:
+            visit: list[SyntheticThrow] = []
+            for _ in range(cfg.darts_per_visit):
+                frame = round(t * cfg.fps)
+                if frame >= cfg.frame_count:
+                    break
+                # Uniform over the scoring area.
+                radius = BOARD_RADIUS * math.sqrt(rng.uniform(0, 0.9))
+                angle = rng.uniform(0, 2 * math.pi)
+                dart = SyntheticThrow(
+                    frame, BOARD_CENTER + radius * math.cos(angle), BOARD_CENTER + radius * math.sin(angle)
+                )
+                visit.append(dart)
+                self._scenes.append((frame, tuple(visit)))
+                t += cfg.throw_interval_s
+            self.throws.extend(visit)
+            t += cfg.pull_after_s - cfg.throw_interval_s
+            pull = round(t * cfg.fps)
+            if not visit or pull >= cfg.frame_count:
+                break
+            self._scenes.append((pull, ()))
+            t += cfg.pull_after_s
+
+        steps = np.sort(rng.uniform(0, cfg.seconds, cfg.lighting_steps))
+        signs = rng.choice((-1.0, 1.0), cfg.lighting_steps)
+        self._lighting_steps = list(zip((steps * cfg.fps).round().astype(int), signs * cfg.lighting_step))
+        self._noise = [
+            rng.normal(0, cfg.noise_sigma, (cfg.height, cfg.width, 3)).round().astype(np.int16)
+            for _ in range(NOISE_BANK if cfg.noise_sigma > 0 else 0)
+        ]
+        self._scene_cache: tuple[int, np.ndarray] | None = None
+
+    def __len__(self) -> int:
+        return self.config.frame_count
+
+    def _scene(self, index: int) -> np.ndarray:
+        position = max(i for i, (start, _) in enumerate(self._scenes) if start <= index)
+        if self._scene_cache is not None and self._scene_cache[0] == position:
+            return self._scene_cache[1]
+        scene = self._wall.copy()
+        for dart in self._scenes[position][1]:
+            self._draw_dart(scene, dart)
+        self._scene_cache = (position, scene)
+        return scene
+
+    def _draw_dart(self, scene: np.ndarray, dart: SyntheticThrow) -> None:
+        """Seen head-on, a dart is its flight's four fins around the barrel, centred on the tip."""
+        x0, y0 = self._offset
+        side = self.board_size - 1
+        cx, cy = x0 + dart.x_norm * side, y0 + dart.y_norm * side
+        radius = self.config.dart_size * self.board_size
+        thickness = max(2, round(radius / 3))
+        for fin in range(4):
+            angle = math.pi / 4 + fin * math.pi / 2
+            tip = (round(cx + radius * math.cos(angle)), round(cy + radius * math.sin(angle)))
+            cv2.line(scene, (round(cx), round(cy)), tip, FLIGHT, thickness, cv2.LINE_AA)
+        cv2.circle(scene, (round(cx), round(cy)), max(2, round(radius / 3)), BARREL, -1, cv2.LINE_AA)
+
+    def gain(self, index: int) -> float:
+        cfg = self.config
+        gain = 1.0 + cfg.lighting_drift * math.sin(2 * math.pi * index / cfg.fps / cfg.lighting_period_s)
+        return gain + sum(step for frame, step in self._lighting_steps if frame <= index)
+
+    def frame(self, index: int) -> np.ndarray:
+        """BGR frame ``index`` of the clip."""
+        frame = cv2.convertScaleAbs(self._scene(index), alpha=self.gain(index))
+        if self._noise:
+            frame = cv2.add(frame, self._noise[index % len(self._noise)], dtype=cv2.CV_8U)
+        return frame
+
+    def frames(self) -> Iterator[np.ndarray]:
+        for index in range(len(self)):
+            yield self.frame(index)
+
+    def write(self, path: str | Path) -> Path:
+        """Write the clip as MJPG, which OpenCV can both write and seek in everywhere."""
+        cfg = self.config
+        writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"MJPG"), cfg.fps, (cfg.width, cfg.height))
+        try:
+            for frame in self.frames():
+                writer.write(frame)
+        finally:
+            writer.release()
+        return Path(path)
+
+
+def score_detections(
+    detections: list[VideoHit],
+    throws: list[SyntheticThrow],
+    fps: float,
+    max_delay_s: float = MAX_DELAY_S,
+    max_distance: float = MAX_DISTANCE,
+) -> AccuracyReport:
+    """Match detections to throws one to one, each throw taking its earliest detection in range."""
+    max_delay = round(max_delay_s * fps)
+    unmatched = sorted(detections, key=lambda hit: hit.frame)
+    errors = []
+    for throw in throws:
+        for hit in unmatched:
+            if hit.frame < throw.frame:
+                continue
+            if hit.frame > throw.frame + max_delay:
+                break
+            error = math.hypot(hit.x_norm - throw.x_norm, hit.y_norm - throw.y_norm)
+            if error <= max_distance:
+                errors.append(error)
+                unmatched.remove(hit)
+                break
+    matched = len(errors)
+    return AccuracyReport(
+        throws=len(throws),
+        detections=len(detections),
+        true_positives=matched,
+        precision=matched / len(detections) if detections else 1.0,
+        recall=matched / len(throws) if throws else 1.0,
+        mean_error=float(np.mean(errors)) if errors else 0.0,
+    )
+
+
+def evaluate_detector(video: SyntheticBoardVideo, **detector_options: float) -> DetectorRun:
+    """Run the live detector over the clip as capture would, timing each frame's detection."""
+    detector = LiveImpactDetector(**detector_options)
+    fps = video.config.fps
+    latencies = np.empty(len(video))
+    detections = []
+    for index, frame in enumerate(video.frames()):
+        frame = square_crop(frame)
+        started = time.perf_counter()
+        hit = detector.detect_hit(frame, ts=index / fps)
+        latencies[index] = (time.perf_counter() - started) * 1000
+        if hit is not None:
+            detections.append(VideoHit(index, hit.x_norm, hit.y_norm, hit.confidence))
+    return DetectorRun(len(video), latencies, detections, score_detections(detections, video.throws, fps))
@@ -0,0 +1,160 @@
+"""Write-behind buffer between the capture loop and the store.
+
+The capture thread hands detected throws to :meth:`ThrowWriteBuffer.put`, which
+only appends to an in-memory queue. A background writer commits the queue with
+:meth:`DartBoardStore.add_throws` once ``flush_rows`` throws are waiting or the
+oldest has waited ``flush_interval_s``, so a slow disk or a busy writer lock never
+stalls frame grabbing. :meth:`flush` blocks until everything queued so far is
+committed, and ``durable=True`` also checkpoints the WAL.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import deque
+
+from .storage import DartBoardStore, ThrowInput
+
+logger = logging.getLogger(__name__)
+
+FLUSH_ROWS = 64
+FLUSH_INTERVAL_S = 0.25
+# Beyond this many unwritten throws new ones are dropped (and counted) rather than
+# letting memory grow without bound while the database is unavailable.
+MAX_PENDING = 10_000
+_RETRY_DELAY_S = 0.5
+
+
+class ThrowWriteBuffer:
+    def __init__(
+        self,
+        store: DartBoardStore,
+        flush_rows: int = FLUSH_ROWS,
+        flush_interval_s: float = FLUSH_INTERVAL_S,
+        max_pending: int = MAX_PENDING,
+    ) -> None:
+        self.store = store
+        self.flush_rows = flush_rows
+        self.flush_interval_s = flush_interval_s
+        self.max_pending = max_pending
+        self._cond = threading.Condition()
+        self._pending: deque[ThrowInput] = deque()
+        self._oldest_at = 0.0
+        # Throws are numbered as they are queued; ``_written_seq`` is the number of
+        # the last one committed, which is what flush() waits on.
+        self._queued_seq = 0
+        self._written_seq = 0
+        self._flush_requested = False
+        self._closed = False
+        self._written = 0
+        self._dropped = 0
+        # Rows the store refused (e.g. an unknown session); unlike dropped throws they reached the writer.
+        self._rejected = 0
+        self._flushes = 0
+        self._last_flush_ms = 0.0
+        self._max_flush_ms = 0.0
+        self._last_error: str | None = None
+        self._thread = threading.Thread(target=self._run, name="throw-writer", daemon=True)
+        self._thread.start()
+
+    def put(self, throw: ThrowInput) -> bool:
+        """Queue a throw without blocking; returns False if it was dropped."""
+        with self._cond:
+            if self._closed or len(self._pending) >= self.max_pending:
+                self._dropped += 1
+                return False
+            if not self._pending:
+                self._oldest_at = time.monotonic()
+            self._pending.append(throw)
+            self._queued_seq += 1
+            # Wake the writer when its deadline starts (first throw) or the size threshold is hit.
+            if len(self._pending) == 1 or len(self._pending) >= self.flush_rows:
+                self._cond.notify_all()
+            return True
+
+    def flush(self, timeout: float | None = None, durable: bool = False) -> bool:
+        """Wait until every throw queued before this call is committed."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            target = self._queued_seq
+            self._flush_requested = True
+            self._cond.notify_all()
+            while self._written_seq < target:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        if durable:
+            self.store.checkpoint()
+        return True
+
+    def close(self, timeout: float | None = 5.0) -> bool:
+        """Flush durably and stop the writer thread."""
+        flushed = self.flush(timeout=timeout, durable=True)
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+        return flushed
+
+    def stats(self) -> dict[str, object]:
+        with self._cond:
+            return {
+                "write_queue_depth": len(self._pending),
+                "throws_written": self._written,
+                "throws_dropped": self._dropped,
+                "throws_rejected": self._rejected,
+                "write_flushes": self._flushes,
+                "last_flush_ms": round(self._last_flush_ms, 3),
+                "max_flush_ms": round(self._max_flush_ms, 3),
+                "write_error": self._last_error,
+            }
+
+    def _take_batch(self) -> list[ThrowInput] | None:
+        """Wait for a flush threshold and pop the pending throws (None once closed)."""
+        with self._cond:
+            while True:
+                if self._pending:
+                    due = self._oldest_at + self.flush_interval_s - time.monotonic()
+                    if self._flush_requested or self._closed or len(self._pending) >= self.flush_rows or due <= 0:
+                        break
+                    self._cond.wait(due)
+                elif self._closed:
+                    return None
+                else:
+                    self._flush_requested = False
+                    self._cond.wait()
+            batch = list(self._pending)
+            self._pending.clear()
+            return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._take_batch()
+            if batch is None:
+                return
+            started = time.perf_counter()
+            try:
+                results = self.store.add_throws(batch, chunk_size=len(batch))
+            except Exception as exc:  # noqa: BLE001
+                logger.warning("throw write failed, retrying: %s", exc)
+                with self._cond:
+                    self._last_error = str(exc)
+                    self._pending.extendleft(reversed(batch))
+                    self._oldest_at = time.monotonic()
+                    if self._closed:
+                        return
+                time.sleep(_RETRY_DELAY_S)
+                continue
+
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            with self._cond:
+                self._written += sum(result.accepted for result in results)
+                self._rejected += sum(result.rejected for result in results)
+                self._written_seq += len(batch)
+                self._flushes += 1
+                self._last_flush_ms = elapsed_ms
+                self._max_flush_ms = max(self._max_flush_ms, elapsed_ms)
+                self._last_error = None
+                self._cond.notify_all()
@@ -0,0 +1,63 @@
+import numpy as np
+
+from src.dart_board.accuracy import PlayerModel, PlayerModelCache
+from src.dart_board.board import THROW_LABELS, aim_points, classify
+from src.dart_board.checkout_table import CheckoutTable
+from src.dart_board.storage import DartBoardStore
+
+
+def test_classify_aim_points_hit_their_own_target():
+    points = aim_points()
+    codes = classify(points[:, 0], points[:, 1])
+    assert [THROW_LABELS[c] for c in codes] == list(THROW_LABELS)
+
+
+def test_tighter_player_has_higher_double_probability():
+    rng = np.random.default_rng(0)
+    tight, loose = PlayerModel(), PlayerModel()
+    for model, sigma in ((tight, 0.01), (loose, 0.08)):
+        x = 0.5 + rng.normal(0, sigma, 500)
+        y = 0.5 + rng.normal(0, sigma, 500)
+        model.stats.add(np.arange(1, 501), x, y, np.ones(500))
+    d20 = THROW_LABELS.index("D20")
+    assert tight.hit_probabilities()[d20] > loose.hit_probabilities()[d20]
+
+    combos, probs = tight.rank_checkouts(CheckoutTable.build(), 40)
+    assert combos[0] == ["D20"]
+    rounded = [round(p, 2) for p in probs]
+    assert rounded == sorted(rounded, reverse=True)
+
+
+def test_cache_updates_incrementally_and_resets_on_clear(tmp_path):
+    store = DartBoardStore(str(tmp_path / "acc.db"))
+    cache = PlayerModelCache(store)
+    store.add_listener(cache)
+    store.create_user("u1", "Matt")
+    store.create_session("s1", "u1", None)
+    store.add_throw("u1", "s1", 0.5, 0.2, 1.0)
+
+    model = cache.get("u1")
+    assert model.stats.count == 1
+    store.add_throw("u1", "s1", 0.52, 0.21, 1.0)
+    assert cache.get("u1").stats.count == 2
+
+    store.clear_throws_for_user("u1")
+    assert cache.get("u1").stats.count == 0
+
+
+def test_cache_follows_throws_from_another_process(tmp_path):
+    store = DartBoardStore(str(tmp_path / "acc.db"))
+    cache = PlayerModelCache(store)
+    store.add_listener(cache)
+    store.create_user("u1", "Matt")
+    store.create_session("s1", "u1", None)
+    store.add_throw("u1", "s1", 0.5, 0.2, 1.0)
+    assert cache.get("u1").stats.count == 1
+
+    other = DartBoardStore(str(tmp_path / "acc.db"))
+    other.add_throw("u1", "s1", 0.52, 0.21, 1.0)
+    store.add_throw("u1", "s1", 0.48, 0.19, 1.0)
+    assert cache.get("u1").stats.count == 3
+
+    other.clear_throws_for_user("u1")
+    assert cache.get("u1").stats.count == 0
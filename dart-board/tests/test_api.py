@@ -1,7 +1,11 @@
 import importlib
+import json
 
+import pytest
 from fastapi.testclient import TestClient
 
+from src.dart_board.storage import DartBoardStore, ThrowInput
+
 
 def test_user_session_throw_advice_flow(tmp_path, monkeypatch):
     monkeypatch.setenv("DARTBOARD_DB_PATH", str(tmp_path / "api.db"))
@@ -38,6 +42,10 @@ def test_user_session_throw_advice_flow(tmp_path, monkeypatch):
     assert r.status_code == 200
     assert r.headers["content-type"] == "image/png"
 
+    r = client.get("/heatmap/u1.png?size=256&theme=mono&weighted=true")
+    assert r.status_code == 200
+    assert r.headers["content-type"] == "image/png"
+
     r = client.get("/")
     assert r.status_code == 200
     assert "text/html" in r.headers["content-type"]
@@ -62,3 +70,181 @@ def test_capture_disabled_mode(tmp_path, monkeypatch):
     r = client.get("/capture/status")
     assert r.status_code == 200
     assert r.json()["last_error"] == "capture disabled in current deployment"
+
+
+def test_calibration_endpoints(tmp_path, monkeypatch):
+    monkeypatch.setenv("DARTBOARD_DB_PATH", str(tmp_path / "api-calibration.db"))
+    api = importlib.import_module("src.dart_board.api")
+    api = importlib.reload(api)
+
+    client = TestClient(api.app)
+    assert client.get("/calibration/0").status_code == 404
+
+    # Board square mapped onto pixels 100..600 of a 720x720 frame.
+    points = [
+        {"image_x": 100 + 500 * bx, "image_y": 100 + 500 * by, "board_x": bx, "board_y": by}
+        for bx, by in [(0.5, 0.02), (0.98, 0.5), (0.5, 0.98), (0.02, 0.5), (0.5, 0.5)]
+    ]
+    r = client.put("/calibration/0", json={"frame_width": 720, "frame_height": 720, "points": points[:3]})
+    assert r.status_code == 422
+    r = client.put("/calibration/0", json={"frame_width": 720, "frame_height": 720, "points": points})
+    assert r.status_code == 200
+    body = r.json()
+    assert body["roi"] == [100, 100, 500, 500]
+    assert body["reprojection_error"] < 1e-6
+    assert client.get("/calibration/0").json()["homography"] == pytest.approx(body["homography"])
+
+
+def test_board_capture_endpoints(tmp_path, monkeypatch):
+    monkeypatch.setenv("DARTBOARD_DB_PATH", str(tmp_path / "api-boards.db"))
+    api = importlib.import_module("src.dart_board.api")
+    api = importlib.reload(api)
+
+    client = TestClient(api.app)
+    assert client.get("/capture/status").json()["board_id"] == "default"
+    assert [board["board_id"] for board in client.get("/boards").json()] == ["default"]
+    assert client.get("/boards/oche-2/capture/status").status_code == 404
+    assert client.get("/boards/oche-2/capture/stream").status_code == 404
+    assert client.delete("/boards/oche-2").status_code == 404
+    assert client.post("/boards/bad%20id/capture/preview", json={}).status_code == 400
+    assert client.post("/capture/preview", json={"source": "../../etc/passwd"}).status_code == 400
+    assert client.post("/capture/preview", json={"source": "ftp://cam/live"}).status_code == 400
+
+
+def test_heatmap_conditional_get_and_render_cache(tmp_path, monkeypatch):
+    monkeypatch.setenv("DARTBOARD_DB_PATH", str(tmp_path / "api-etag.db"))
+    api = importlib.import_module("src.dart_board.api")
+    api = importlib.reload(api)
+
+    client = TestClient(api.app)
+    client.post("/users", json={"user_id": "u1", "name": "Matt"})
+    client.post("/sessions", json={"session_id": "s1", "user_id": "u1"})
+    throw = {"user_id": "u1", "session_id": "s1", "x_norm": 0.5, "y_norm": 0.5, "confidence": 1.0}
+    client.post("/throws", json=throw)
+
+    r = client.get("/heatmap/u1.png")
+    etag = r.headers["etag"]
+    assert r.headers["last-modified"]
+
+    r = client.get("/heatmap/u1.png", headers={"If-None-Match": etag})
+    assert r.status_code == 304
+    assert api.heatmap_images.misses == 1
+
+    r = client.get("/heatmap/u1.png?t=123")
+    assert r.status_code == 200
+    assert api.heatmap_images.hits == 1
+
+    client.post("/throws", json=throw)
+    r = client.get("/heatmap/u1.png", headers={"If-None-Match": etag})
+    assert r.status_code == 200
+    assert r.headers["etag"] != etag
+
+    r = client.get("/heatmap/u1.jpg")
+    assert r.headers["content-type"] == "image/jpeg"
+
+    # Throws stored or cleared by another worker change the ETag too.
+    etag = r.headers["etag"]
+    other = DartBoardStore(str(tmp_path / "api-etag.db"))
+    other.add_throw("u1", "s1", 0.2, 0.2, 1.0)
+    r = client.get("/heatmap/u1.jpg", headers={"If-None-Match": etag})
+    assert r.status_code == 200
+    assert r.headers["etag"] != etag
+    other.clear_throws_for_user("u1")
+    assert api.density_grids.get("u1").throw_count == 0
+
+
+def test_bulk_throws_json_and_ndjson(tmp_path, monkeypatch):
+    monkeypatch.setenv("DARTBOARD_DB_PATH", str(tmp_path / "api-bulk.db"))
+    api = importlib.import_module("src.dart_board.api")
+    api = importlib.reload(api)
+
+    client = TestClient(api.app)
+    client.post("/users", json={"user_id": "u1", "name": "Matt"})
+    client.post("/sessions", json={"session_id": "s1", "user_id": "u1"})
+    throw = {"user_id": "u1", "session_id": "s1", "x_norm": 0.5, "y_norm": 0.5, "confidence": 1.0}
+
+    r = client.post("/throws/bulk", json=[throw, {**throw, "session_id": "missing"}, {**throw, "x_norm": 2}])
+    assert r.status_code == 200
+    body = r.json()
+    assert (body["accepted"], body["rejected"]) == (1, 2)
+    assert [err["index"] for err in body["batches"][0]["errors"]] == [1, 2]
+
+    lines = "\n".join([json.dumps(throw)] * 3 + ["not json", json.dumps({**throw, "ts": "2024-01-01T00:00:00+00:00"})])
+    r = client.post("/throws/bulk", content=lines, headers={"Content-Type": "application/x-ndjson"})
+    assert (r.json()["accepted"], r.json()["rejected"]) == (4, 1)
+    assert r.json()["batches"][0]["errors"] == [{"index": 3, "detail": "invalid JSON"}]
+    assert len(client.get("/heatmap/u1").json()["points"]) == 5
+
+    assert client.post("/throws/bulk", json={"not": "a list"}).status_code == 400
+
+
+def test_heatmap_points_pagination_filters_and_stream(tmp_path, monkeypatch):
+    monkeypatch.setenv("DARTBOARD_DB_PATH", str(tmp_path / "api-pages.db"))
+    api = importlib.import_module("src.dart_board.api")
+    api = importlib.reload(api)
+
+    client = TestClient(api.app)
+    client.post("/users", json={"user_id": "u1", "name": "Matt"})
+    client.post("/sessions", json={"session_id": "s1", "user_id": "u1"})
+    client.post("/sessions", json={"session_id": "s2", "user_id": "u1"})
+    throw = {"user_id": "u1", "x_norm": 0.5, "y_norm": 0.5, "confidence": 1.0}
+    rows = [{**throw, "session_id": "s1", "ts": f"2024-01-0{day}T12:00:00+00:00"} for day in range(1, 6)]
+    rows.append({**throw, "session_id": "s2"})
+    client.post("/throws/bulk", json=rows)
+
+    page = client.get("/heatmap/u1?limit=4").json()
+    assert page["throw_count"] == 4
+    rest = client.get(f"/heatmap/u1?limit=4&after_id={page['next_after_id']}").json()
+    assert rest["throw_count"] == 2 and rest["next_after_id"] is None
+    assert [p["id"] for p in page["points"] + rest["points"]] == sorted({p["id"] for p in page["points"] + rest["points"]})
+
+    assert client.get("/heatmap/u1?session_id=s2").json()["throw_count"] == 1
+    assert client.get("/heatmap/u1?limit=100000").status_code == 422
+
+    # Without a limit a page is still capped at MAX_PAGE_SIZE.
+    api.store.add_throws([ThrowInput("u1", "s2", 0.5, 0.5, 1.0)] * api.MAX_PAGE_SIZE)
+    page = client.get("/heatmap/u1").json()
+    assert page["throw_count"] == api.MAX_PAGE_SIZE
+    rest = client.get(f"/heatmap/u1?after_id={page['next_after_id']}").json()
+    assert rest["throw_count"] == 6 and rest["next_after_id"] is None
+    window = client.get("/heatmap/u1", params={"since": "2024-01-02T00:00:00Z", "until": "2024-01-04T00:00:00Z"})
+    assert [p["ts"][:10] for p in window.json()["points"]] == ["2024-01-02", "2024-01-03"]
+
+    r = client.get("/heatmap/u1?stream=true&session_id=s1")
+    assert r.headers["content-type"].startswith("application/x-ndjson")
+    streamed = [json.loads(line) for line in r.text.splitlines()]
+    assert [p["ts"][:10] for p in streamed] == [f"2024-01-0{day}" for day in range(1, 6)]
+
+
+def test_player_stats_from_rollups(tmp_path, monkeypatch):
+    monkeypatch.setenv("DARTBOARD_DB_PATH", str(tmp_path / "api-stats.db"))
+    api = importlib.import_module("src.dart_board.api")
+    api = importlib.reload(api)
+
+    client = TestClient(api.app)
+    client.post("/users", json={"user_id": "u1", "name": "Matt"})
+    client.post("/sessions", json={"session_id": "s1", "user_id": "u1"})
+    client.post("/sessions", json={"session_id": "s2", "user_id": "u1"})
+    t20 = {"user_id": "u1", "x_norm": 0.5, "y_norm": 0.5 - 0.48 * 0.6, "confidence": 1.0}
+    miss = {**t20, "y_norm": 0.01}
+    rows = [
+        {**t20, "session_id": "s1", "ts": "2024-01-01T10:00:00Z"},
+        {**t20, "session_id": "s1", "ts": "2024-01-01T11:00:00Z"},
+        {**miss, "session_id": "s2", "ts": "2024-01-03T10:00:00Z"},
+    ]
+    client.post("/throws/bulk", json=rows)
+    client.post("/throws", json={**t20, "session_id": "s2"})
+
+    stats = client.get("/stats/u1").json()
+    assert stats["throw_count"] == 4
+    assert stats["segments"][0] == {"label": "T20", "hits": 3, "share": 0.75}
+    assert (stats["treble_rate"], stats["miss_rate"], stats["average_score"]) == (0.75, 0.25, 45.0)
+
+    assert client.get("/stats/u1?session_id=s2").json()["throw_count"] == 2
+    dated = client.get("/stats/u1?since=2024-01-01&until=2024-01-04").json()
+    assert dated["throw_count"] == 3
+    assert dated["days"] == [{"day": "2024-01-01", "throws": 2}, {"day": "2024-01-03", "throws": 1}]
+    assert client.get("/stats/u1?session_id=s1&since=2024-01-01").status_code == 422
+
+    client.delete("/throws/u1")
+    assert client.get("/stats/u1").json()["throw_count"] == 0
@@ -0,0 +1,21 @@
+import numpy as np
+
+from src.dart_board.board import aim_points, classify, code_at, labels, lookup, scores
+
+
+def test_lookup_matches_exact_classifier_away_from_wires():
+    points = aim_points()
+    assert (lookup(points[:, 0], points[:, 1]) == classify(points[:, 0], points[:, 1])).all()
+
+    rng = np.random.default_rng(0)
+    x, y = rng.random(200_000), rng.random(200_000)
+    assert (lookup(x, y) == classify(x, y)).mean() > 0.995
+
+
+def test_labels_and_scores():
+    x = np.array([0.5, 0.5, 0.5, 0.5, 0.0])
+    y = np.array([0.5, 0.5 - 0.48 * 0.6, 0.5 - 0.48 * 0.97, 0.5 + 0.48 * 0.8, 0.0])
+    codes = lookup(x, y)
+    assert labels(codes).tolist() == ["DB", "T20", "D20", "S3", "MISS"]
+    assert scores(codes).tolist() == [50, 60, 40, 3, 0]
+    assert [code_at(px, py) for px, py in zip(x, y)] == codes.tolist()
@@ -0,0 +1,74 @@
+import cv2
+import numpy as np
+import pytest
+
+from src.dart_board.calibration import REFERENCE_POINTS, BoardCalibration, fit_homography
+from src.dart_board.cv import LiveImpactDetector
+from src.dart_board.storage import DartBoardStore
+
+FRAME_SIZE = (720, 720)
+# Board coordinates to frame pixels for a camera looking at the board from low left.
+BOARD_TO_IMAGE = np.array([[420.0, 60.0, 150.0], [-30.0, 380.0, 170.0], [0.15, 0.1, 1.0]])
+
+
+def _to_image(points):
+    return cv2.perspectiveTransform(np.asarray(points, np.float64).reshape(-1, 1, 2), BOARD_TO_IMAGE).reshape(-1, 2)
+
+
+def _calibration() -> BoardCalibration:
+    board = list(REFERENCE_POINTS.values())
+    return BoardCalibration.fit(_to_image(board), board, FRAME_SIZE)
+
+
+def test_fit_recovers_board_coordinates():
+    calibration = _calibration()
+    assert calibration.reprojection_error < 1e-6
+    bull = _to_image([(0.5, 0.5)])[0]
+    assert calibration.to_board(*bull) == pytest.approx((0.5, 0.5), abs=1e-6)
+
+    x, y, w, h = calibration.roi
+    assert 0 <= x and 0 <= y and x + w <= FRAME_SIZE[0] and y + h <= FRAME_SIZE[1]
+    assert w * h < FRAME_SIZE[0] * FRAME_SIZE[1]
+
+
+def test_fit_rejects_too_few_or_degenerate_points():
+    with pytest.raises(ValueError):
+        fit_homography([(0, 0), (1, 0), (0, 1)], [(0, 0), (1, 0), (0, 1)])
+    with pytest.raises(ValueError):
+        fit_homography([(0, 0), (1, 1), (2, 2), (3, 3)], [(0, 0), (1, 0), (1, 1), (0, 1)])
+
+
+def test_detection_on_rectified_frames_reports_board_coordinates():
+    calibration = _calibration()
+    base = np.full((*FRAME_SIZE, 3), 120, dtype=np.uint8)
+    hit = base.copy()
+    target = (0.62, 0.41)
+    outline = _to_image([(target[0] + 0.02 * np.cos(a), target[1] + 0.02 * np.sin(a)) for a in np.linspace(0, 2 * np.pi, 64)])
+    cv2.fillPoly(hit, [np.round(outline).astype(np.int32)], (20, 20, 20))
+
+    detector = LiveImpactDetector(cooldown_s=0, min_motion_area=50)
+    out = np.empty((calibration.size, calibration.size), np.uint8)
+    assert detector.detect_hit(calibration.rectify(base, dst=out)) is None
+    point = detector.detect_hit(calibration.rectify(hit, dst=out))
+    assert calibration.rectified_to_board(point.x_norm, point.y_norm) == pytest.approx(target, abs=0.005)
+
+    with pytest.raises(ValueError):
+        calibration.rectify(np.zeros((480, 480, 3), np.uint8))
+
+
+def test_rectified_area_scales_camera_pixels_to_the_board_image():
+    calibration = _calibration()
+    corners = _to_image([(0, 0), (1, 0), (1, 1), (0, 1)]).astype(np.float32)
+    board_px = cv2.contourArea(corners)
+    assert calibration.rectified_area(board_px) == calibration.size ** 2
+    assert calibration.rectified_area(board_px / 100) == pytest.approx(calibration.size ** 2 / 100, abs=1)
+
+
+def test_calibration_round_trips_through_store(tmp_path):
+    store = DartBoardStore(str(tmp_path / "calib.db"))
+    assert store.get_calibration(0) is None
+    calibration = _calibration()
+    store.save_calibration(0, calibration.homography.ravel().tolist(), *FRAME_SIZE, calibration.reprojection_error)
+    loaded = BoardCalibration.from_record(store.get_calibration(0))
+    np.testing.assert_allclose(loaded.homography, calibration.homography)
+    assert loaded.roi == calibration.roi
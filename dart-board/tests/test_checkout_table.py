@@ -0,0 +1,29 @@
+from src.dart_board.checkout import suggest_checkout
+from src.dart_board.checkout_table import CheckoutTable
+
+
+def test_table_matches_bruteforce_double_out():
+    table = CheckoutTable.build()
+    for score in range(0, 181):
+        for darts in (1, 2, 3):
+            assert table.suggest(score, darts) == suggest_checkout(score, darts)
+
+
+def test_out_rules():
+    table = CheckoutTable.build()
+    assert table.suggest(3, 1, "double") == []
+    assert ["T1"] in table.suggest(3, 1, "master")
+    assert ["S1"] in table.suggest(1, 1, "straight")
+    assert ["T20", "T20", "T20"] in table.suggest(180, 3, "straight")
+    assert not table.can_finish(169)
+    assert table.can_finish(170)
+
+
+def test_packed_roundtrip(tmp_path):
+    table = CheckoutTable.build()
+    path = tmp_path / "checkout.npz"
+    table.save(path)
+    loaded = CheckoutTable.load(path)
+    for rule in ("double", "master", "straight"):
+        assert (loaded.combination_codes(100, 3, rule) == table.combination_codes(100, 3, rule)).all()
+    assert loaded.suggest(170) == [["T20", "T20", "DB"]]
@@ -0,0 +1,65 @@
+import cv2
+import numpy as np
+import pytest
+
+from src.dart_board.cv import LiveImpactDetector
+
+
+def _frames(shape=(720, 1280), center=(700, 300), radius=30):
+    rng = np.random.default_rng(0)
+    base = np.full((*shape, 3), 120, dtype=np.uint8)
+    base += rng.integers(0, 6, base.shape, dtype=np.uint8)
+    hit = base.copy()
+    cv2.circle(hit, center, radius, (20, 20, 20), -1)
+    return base, hit
+
+
+def _reference(prev, frame):
+    """The detector as it was before buffer reuse and downscaling."""
+    grays = [cv2.GaussianBlur(cv2.cvtColor(f, cv2.COLOR_BGR2GRAY), (9, 9), 0) for f in (prev, frame)]
+    _, thresh = cv2.threshold(cv2.absdiff(*grays), 28, 255, cv2.THRESH_BINARY)
+    thresh = cv2.dilate(thresh, None, iterations=2)
+    contours, _ = cv2.findContours(thresh, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    contour = max(contours, key=cv2.contourArea)
+    area = cv2.contourArea(contour)
+    m = cv2.moments(contour)
+    h, w = grays[1].shape
+    return m["m10"] / m["m00"] / (w - 1), m["m01"] / m["m00"] / (h - 1), min(1.0, area / (w * h * 0.02))
+
+
+def _detect(detector, frames):
+    results = [detector.detect_hit(frame) for frame in frames]
+    return results[-1]
+
+
+def test_buffered_detector_matches_reference_exactly():
+    base, hit = _frames()
+    expected = _reference(base, hit)
+    for reuse in (True, False):
+        point = _detect(LiveImpactDetector(cooldown_s=0, reuse_buffers=reuse), [base, hit])
+        assert (point.x_norm, point.y_norm, point.confidence) == expected
+
+
+@pytest.mark.parametrize("scale", [0.5, 0.25])
+def test_downscaled_detector_matches_within_tolerance(scale):
+    base, hit = _frames()
+    x, y, confidence = _reference(base, hit)
+    point = _detect(LiveImpactDetector(cooldown_s=0, scale=scale), [base, hit])
+    assert point.x_norm == pytest.approx(x, abs=2 / 1280)
+    assert point.y_norm == pytest.approx(y, abs=2 / 720)
+    if scale >= 0.5:
+        assert point.confidence == pytest.approx(confidence, rel=0.05)
+
+
+def test_buffers_are_reused_across_frames_and_reset_on_resize():
+    base, hit = _frames()
+    detector = LiveImpactDetector(cooldown_s=0, scale=0.5)
+    detector.detect_hit(base)
+    buffers = [id(b) for b in detector._blurred]
+    for frame in (hit, base, hit):
+        assert detector.detect_hit(frame) is not None
+    assert [id(b) for b in detector._blurred] == buffers
+
+    small_base, small_hit = _frames(shape=(480, 640), center=(320, 240))
+    assert detector.detect_hit(small_hit) is None  # new size: no previous frame yet
+    assert detector.detect_hit(small_base) is not None
@@ -0,0 +1,104 @@
+import time
+
+from src.dart_board.density import DensityGrid, DensityGridCache
+from src.dart_board.storage import DartBoardStore
+
+
+def _store(tmp_path):
+    store = DartBoardStore(str(tmp_path / "density.db"))
+    store.create_user("u1", "Matt")
+    store.create_session("s1", "u1", None)
+    store.create_session("s2", "u1", None)
+    return store
+
+
+def test_grids_update_on_insert_per_user_and_session(tmp_path):
+    store = _store(tmp_path)
+    cache = DensityGridCache(store, grid_dir=tmp_path / "grids")
+    store.add_listener(cache)
+    store.add_throw("u1", "s1", 0.5, 0.5, 0.5)
+
+    assert cache.get("u1").throw_count == 1
+    assert cache.get("u1", "s2").throw_count == 0
+
+    store.add_throw("u1", "s2", 0.25, 0.75, 1.0)
+    user_grid = cache.get("u1")
+    assert user_grid.throw_count == 2
+    assert user_grid.counts.sum() == 2
+    assert abs(float(user_grid.weighted.sum()) - 1.5) < 1e-6
+    assert cache.get("u1", "s2").throw_count == 1
+
+
+def test_grids_persist_and_catch_up_after_restart(tmp_path):
+    store = _store(tmp_path)
+    cache = DensityGridCache(store, grid_dir=tmp_path / "grids")
+    store.add_listener(cache)
+    store.add_throw("u1", "s1", 0.5, 0.5, 1.0)
+    cache.get("u1")
+    cache.flush()
+
+    # Throw stored while no cache was listening; the restarted cache catches up from last_id.
+    store._listeners.clear()
+    store.add_throw("u1", "s1", 0.1, 0.1, 1.0)
+    restarted = DensityGridCache(store, grid_dir=tmp_path / "grids")
+    grid = restarted.get("u1")
+    assert grid.throw_count == 2
+
+
+def test_lru_eviction_and_clear(tmp_path):
+    store = _store(tmp_path)
+    cache = DensityGridCache(store, grid_dir=tmp_path / "grids", max_grids=1)
+    store.add_listener(cache)
+    store.add_throw("u1", "s1", 0.5, 0.5, 1.0)
+    cache.get("u1")
+    cache.get("u1", "s1")
+    assert list(cache._grids) == [("u1", "s1")]
+    assert list((tmp_path / "grids").glob("*-all.npz"))
+
+    store.clear_throws_for_user("u1")
+    assert not list((tmp_path / "grids").glob("*.npz"))
+    assert cache.get("u1").throw_count == 0
+
+
+def test_grids_follow_throws_written_and_cleared_by_another_process(tmp_path):
+    store = _store(tmp_path)
+    cache = DensityGridCache(store, grid_dir=tmp_path / "grids")
+    store.add_listener(cache)
+    store.add_throw("u1", "s1", 0.5, 0.5, 1.0)
+    assert cache.get("u1").throw_count == 1
+
+    # A second store on the same database stands in for another API worker.
+    other = DartBoardStore(str(tmp_path / "density.db"))
+    other.add_throw("u1", "s1", 0.2, 0.2, 1.0)
+    store.add_throw("u1", "s2", 0.8, 0.8, 1.0)
+    grid = cache.get("u1")
+    assert grid.throw_count == 3
+    assert grid.counts.sum() == 3
+    assert cache.get("u1", "s1").throw_count == 2
+
+    other.clear_throws_for_user("u1")
+    other.add_throw("u1", "s1", 0.3, 0.3, 1.0)
+    other.add_throw("u1", "s1", 0.4, 0.4, 1.0)
+    other.add_throw("u1", "s1", 0.6, 0.6, 1.0)
+    other.add_throw("u1", "s1", 0.7, 0.7, 1.0)
+    grid = cache.get("u1")
+    assert grid.throw_count == 4
+    assert grid.counts.sum() == 4
+
+
+def test_dirty_grids_are_flushed_periodically(tmp_path):
+    store = _store(tmp_path)
+    cache = DensityGridCache(store, grid_dir=tmp_path / "grids", flush_interval_s=0.05)
+    store.add_listener(cache)
+    store.add_throw("u1", "s1", 0.5, 0.5, 1.0)
+    cache.get("u1")
+    store.add_throw("u1", "s1", 0.2, 0.2, 1.0)
+
+    # No close(): a restart after a crash still finds the grid written by the timer.
+    deadline = time.monotonic() + 5
+    path = cache._path(("u1", None))
+    while time.monotonic() < deadline and not (path.exists() and DensityGrid.load(path).throw_count == 2):
+        time.sleep(0.01)
+    assert DensityGrid.load(path).throw_count == 2
+    assert not cache._grids[("u1", None)].dirty
+    cache.close()
@@ -0,0 +1,140 @@
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+import uuid
+
+import numpy as np
+
+from src.dart_board import capture_daemon
+from src.dart_board.capture_daemon import CaptureClient, CaptureDaemon
+from src.dart_board.framering import FrameRing
+from src.dart_board.storage import DartBoardStore
+from src.dart_board.streaming import StreamVariant
+
+
+# A separate interpreter, like an API worker started independently of the daemon.
+READER = """
+import sys
+from src.dart_board.framering import FrameRing
+ring = FrameRing.attach(sys.argv[1])
+view = ring.view(1)
+print(int(view[0, 0, 0]), view.shape, ring.is_valid(1))
+del view
+ring.release()
+"""
+
+
+def _ring_name() -> str:
+    return f"dartboard-test-{uuid.uuid4().hex[:12]}"
+
+
+def test_ring_frames_are_visible_across_processes_and_invalidated_when_lapped():
+    ring = FrameRing.create(name=_ring_name(), slots=2, height=64, width=64)
+    try:
+        ring.open()
+        ring.publish(np.full((48, 64, 3), 7, dtype=np.uint8))
+        assert ring.latest_seq() == 1 and ring.is_open
+
+        reader = subprocess.run(
+            [sys.executable, "-c", READER, ring.name], capture_output=True, text=True, timeout=60, check=True
+        )
+        assert reader.stdout.strip() == "7 (48, 64, 3) True"
+
+        view = ring.view(1)
+        ring.publish(np.zeros((64, 64, 3), dtype=np.uint8))
+        assert ring.is_valid(1)
+        ring.publish(np.zeros((64, 64, 3), dtype=np.uint8))  # overwrites slot of seq 1
+        assert not ring.is_valid(1) and ring.view(1) is None
+        del view
+
+        # Oversize frames are scaled down to fit a slot.
+        ring.publish(np.zeros((128, 96, 3), dtype=np.uint8))
+        assert ring.view(ring.latest_seq()).shape == (64, 48, 3)
+    finally:
+        ring.release()
+
+
+class Recorder:
+    def __init__(self) -> None:
+        self.added = threading.Event()
+        self.throws = []
+
+    def throws_added(self, throws) -> None:
+        self.throws.extend(throws)
+        self.added.set()
+
+    def throws_cleared(self, user_id: str) -> None:
+        pass
+
+
+def test_client_mirrors_daemon_status_frames_and_hits(tmp_path):
+    socket_path = str(tmp_path / "capture.sock")
+    ring = FrameRing.create(name=_ring_name(), slots=4, height=64, width=64)
+    daemon = CaptureDaemon(socket_path, str(tmp_path / "daemon.db"), ring)
+    server = threading.Thread(target=daemon.serve_forever, daemon=True)
+    server.start()
+
+    worker_store = DartBoardStore(str(tmp_path / "daemon.db"))
+    recorder = Recorder()
+    worker_store.add_listener(recorder)
+    client = CaptureClient(socket_path, worker_store)
+    try:
+        assert client.status()["running"] is False
+
+        # Hits stored by the daemon reach this worker's listeners.
+        daemon.store.create_user("u1", "Matt")
+        daemon.store.create_session("s1", "u1", None)
+        deadline = time.monotonic() + 5
+        while not recorder.added.is_set() and time.monotonic() < deadline:
+            daemon.store.add_throw("u1", "s1", 0.5, 0.5, 1.0)
+            recorder.added.wait(0.2)
+        assert recorder.throws and recorder.throws[0].user_id == "u1"
+
+        # Frames written to the ring are re-published to local stream viewers.
+        async def first_part():
+            variant = StreamVariant()
+            with client.frames.subscribe(variant):
+                ring.open()
+                for _ in range(200):
+                    ring.publish(np.zeros((64, 64, 3), dtype=np.uint8))
+                    latest = await asyncio.wait_for(client.frames.next_part(0, variant), 2)
+                    if latest is not None:
+                        return latest
+                    await asyncio.sleep(0.01)  # the poller has not opened the local hub yet
+
+        seq, part = asyncio.run(first_part())
+        assert seq >= 1 and part.startswith(b"--frame\r\n")
+        assert client.get_latest_frame().startswith(b"\xff\xd8")
+    finally:
+        client.close()
+        daemon.server.shutdown()
+        daemon.close()
+        worker_store.close()
+    assert not os.path.exists(socket_path)
+
+
+def test_stuck_subscriber_is_dropped_without_blocking_the_commit_path(tmp_path, monkeypatch):
+    monkeypatch.setattr(capture_daemon, "SUBSCRIBER_OUTBOX", 4)
+    socket_path = str(tmp_path / "capture.sock")
+    daemon = CaptureDaemon(socket_path, str(tmp_path / "daemon.db"), FrameRing.create(name=_ring_name(), slots=2))
+    threading.Thread(target=daemon.serve_forever, daemon=True).start()
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.connect(socket_path)
+            sock.sendall(json.dumps({"cmd": "subscribe"}).encode() + b"\n")
+            assert json.loads(sock.makefile("rb").readline())["ok"]
+
+            # The worker never reads: its socket buffer fills, then its outbox.
+            started = time.monotonic()
+            for _ in range(200):
+                daemon.throws_cleared("u" * 100_000)
+            assert time.monotonic() - started < 1.0
+            assert not daemon._subscribers
+    finally:
+        daemon.server.shutdown()
+        daemon.close()
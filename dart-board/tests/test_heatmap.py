@@ -5,3 +5,39 @@ def test_render_heatmap_png_signature():
     png = render_heatmap([(0.5, 0.5), (0.55, 0.45)])
     assert png[:8] == b"\x89PNG\r\n\x1a\n"
     assert len(png) > 1000
+
+
+def test_density_grid_bins_and_weights():
+    import numpy as np
+
+    from src.dart_board.heatmap import density_grid
+
+    points = np.array([[0.0, 0.0], [0.0, 0.0], [1.0, 1.0]])
+    grid = density_grid(points, 8)
+    assert grid[0, 0] == 2 and grid[7, 7] == 1 and grid.sum() == 3
+
+    weighted = density_grid(points, 8, weights=np.array([0.5, 0.25, 1.0]))
+    assert weighted[0, 0] == 0.75
+
+
+def test_board_layers_cached_per_size_and_theme():
+    from src.dart_board.heatmap import _board_layers
+
+    board, blended = _board_layers(200, "classic")
+    assert _board_layers(200, "classic")[0] is board
+    assert _board_layers(200, "mono")[0] is not board
+    assert not board.flags.writeable and not blended.flags.writeable
+
+    png = render_heatmap([(0.5, 0.5)], size=200, theme="mono")
+    assert png[:8] == b"\x89PNG\r\n\x1a\n"
+
+
+def test_board_layer_cache_is_bounded_by_bytes(monkeypatch):
+    from src.dart_board import heatmap
+
+    monkeypatch.setattr(heatmap, "BOARD_LAYER_CACHE_BYTES", 2 * 2 * 100 * 100 * 3 + 1000)
+    first = heatmap._board_layers(100)[0]
+    heatmap._board_layers(99)
+    heatmap._board_layers(98)
+    assert heatmap._layers_bytes <= heatmap.BOARD_LAYER_CACHE_BYTES
+    assert heatmap._board_layers(100)[0] is not first  # evicted, drawn again
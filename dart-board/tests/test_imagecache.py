@@ -0,0 +1,31 @@
+import threading
+import time
+
+from src.dart_board.imagecache import EncodedImageCache
+
+
+def test_single_flight_renders_once():
+    cache = EncodedImageCache()
+    calls = []
+
+    def render():
+        calls.append(1)
+        time.sleep(0.05)
+        return b"png"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_render("k", render))) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert results == [b"png"] * 8
+    assert len(calls) == 1
+
+
+def test_evicts_by_total_bytes():
+    cache = EncodedImageCache(max_bytes=10)
+    cache.get_or_render("a", lambda: b"12345")
+    cache.get_or_render("b", lambda: b"12345")
+    cache.get_or_render("c", lambda: b"12345")
+    assert list(cache._entries) == ["b", "c"]
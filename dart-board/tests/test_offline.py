@@ -0,0 +1,124 @@
+import importlib
+import time
+
+import cv2
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from src.dart_board.offline import Chunk, VideoHit, detect_video, ingest_video, merge_hits, plan_chunks
+from src.dart_board.storage import DartBoardStore
+
+FPS = 30
+# Darts land on these frames; 29 and 59 sit right at chunk boundaries below.
+HIT_FRAMES = (12, 29, 59, 75, 110)
+
+
+def _write_video(path, frames=140, size=(160, 120), radius=12):
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"MJPG"), FPS, size)
+    board = np.full((size[1], size[0], 3), 120, dtype=np.uint8)
+    for index in range(frames):
+        if index in HIT_FRAMES:
+            # Spread across the centre square that capture keeps of the frame.
+            x = size[0] // 2 + (HIT_FRAMES.index(index) - 2) * size[1] // 6
+            cv2.circle(board, (x, size[1] // 2), radius, (20, 20, 20), -1)
+        writer.write(board)
+    writer.release()
+    return path
+
+
+def _write_moving_blob(path, frames=200, size=(160, 120)):
+    """A blob that moves on every frame, so the detector has a candidate on every frame."""
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"MJPG"), FPS, size)
+    for index in range(frames):
+        board = np.full((size[1], size[0], 3), 120, dtype=np.uint8)
+        x = 20 + index * 3 % (size[0] - 40)
+        cv2.circle(board, (x, size[1] // 2), 12, (20, 20, 20), -1)
+        writer.write(board)
+    writer.release()
+    return path
+
+
+def test_plan_chunks_overlaps_and_reads_last_chunk_to_the_end():
+    assert plan_chunks(100, 40, 5) == [Chunk(0, 40, 0), Chunk(40, 80, 35), Chunk(80, None, 75)]
+
+
+def test_merge_applies_cooldown_across_chunks():
+    hits = [VideoHit(30, 0.5, 0.5, 1.0), VideoHit(10, 0.1, 0.1, 1.0), VideoHit(33, 0.5, 0.5, 1.0)]
+    assert [h.frame for h in merge_hits(hits, fps=30, cooldown_s=0.35)] == [10, 30]
+
+
+def test_chunked_detection_matches_a_single_pass(tmp_path):
+    video = _write_video(tmp_path / "session.avi")
+    options = {"min_motion_area": 100}
+    single, info, frames, decoded, chunks = detect_video(
+        video, workers=1, chunk_frames=10_000, detector_options=options
+    )
+    assert (frames, decoded, chunks, info.fps) == (140, 140, 1, FPS)
+    assert [hit.frame for hit in single] == list(HIT_FRAMES)
+
+    for chunk_frames in (15, 30):
+        parallel, _, frames, decoded, chunks = detect_video(
+            video, workers=2, chunk_frames=chunk_frames, detector_options=options
+        )
+        assert chunks > 2
+        assert parallel == single
+        assert frames == 140
+        assert decoded == 140 + chunks - 1  # each later chunk decodes one warm-up frame
+
+
+def test_chunked_detection_matches_a_single_pass_under_continuous_motion(tmp_path):
+    video = _write_moving_blob(tmp_path / "motion.avi")
+    options = {"min_motion_area": 100}
+    single, *_ = detect_video(video, workers=1, chunk_frames=10_000, detector_options=options)
+    assert len(single) == 19  # a hit on every frame past the cooldown
+
+    for chunk_frames in (15, 30, 45):
+        parallel, *_ = detect_video(video, workers=2, chunk_frames=chunk_frames, detector_options=options)
+        assert parallel == single
+
+
+def test_ingest_video_bulk_inserts_timestamped_hits(tmp_path):
+    video = _write_video(tmp_path / "session.avi", size=(640, 480), radius=25)
+    store = DartBoardStore(str(tmp_path / "offline.db"))
+    store.create_user("u1", "Matt")
+    session = store.create_session("s1", "u1", "session.avi")
+
+    report = ingest_video(store, "s1", video, workers=1)
+    assert (report.frames, report.hits, report.accepted) == (140, len(HIT_FRAMES), len(HIT_FRAMES))
+    assert report.duration_s == pytest.approx(140 / FPS, abs=0.001)
+    assert report.fps > 0 and report.realtime_factor > 0
+
+    throws = store.list_session_throws("s1")
+    assert len(throws) == len(HIT_FRAMES)
+    offset = (np.datetime64(throws[1].ts[:26]) - np.datetime64(session.started_at[:26])) / np.timedelta64(1, "ms")
+    assert offset == pytest.approx(HIT_FRAMES[1] / FPS * 1000, abs=1)
+
+    with pytest.raises(ValueError):
+        ingest_video(store, "missing", video)
+
+
+def test_ingest_endpoint_runs_a_background_job(tmp_path, monkeypatch):
+    _write_video(tmp_path / "file.avi", size=(640, 480), radius=25)
+    monkeypatch.setenv("DARTBOARD_DB_PATH", str(tmp_path / "api-offline.db"))
+    monkeypatch.setenv("DARTBOARD_VIDEO_DIR", str(tmp_path))
+    api = importlib.reload(importlib.import_module("src.dart_board.api"))
+    client = TestClient(api.app)
+    client.post("/users", json={"user_id": "u1", "name": "Matt"})
+    client.post("/sessions", json={"session_id": "s1", "user_id": "u1", "source_ref": "file.avi"})
+    client.post("/sessions", json={"session_id": "s2", "user_id": "u1"})
+
+    assert client.post("/sessions/missing/ingest").status_code == 404
+    assert client.post("/sessions/s2/ingest").status_code == 400
+    assert client.post("/sessions/s1/ingest", json={"path": "../outside.avi"}).status_code == 400
+    assert client.get("/ingest/unknown").status_code == 404
+
+    r = client.post("/sessions/s1/ingest", json={"workers": 1})
+    assert r.status_code == 202
+    job_id = r.json()["job_id"]
+    deadline = time.monotonic() + 30
+    while (job := client.get(f"/ingest/{job_id}").json())["state"] == "running" and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert job["state"] == "done"
+    assert job["report"]["accepted"] == len(HIT_FRAMES)
+    assert len(client.get("/heatmap/u1", params={"session_id": "s1"}).json()["points"]) == len(HIT_FRAMES)
@@ -0,0 +1,281 @@
+import threading
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+import pytest
+
+from src.dart_board import ingest, sources
+from src.dart_board.cv import HitPoint
+from src.dart_board.pipeline import AdaptiveFrameRate, DropOldestQueue, RatePolicy, StageStats
+from src.dart_board.storage import DartBoardStore
+from src.dart_board.writebehind import ThrowWriteBuffer
+
+
+def test_drop_oldest_queue_never_blocks_and_counts_drops():
+    queue = DropOldestQueue(2)
+    for i in range(5):
+        queue.put(i)
+    assert (len(queue), queue.dropped) == (2, 3)
+    assert [queue.get(), queue.get()] == [3, 4]
+    assert queue.get(timeout=0.01) is None
+
+    waiter = threading.Thread(target=lambda: queue.get())
+    waiter.start()
+    queue.close()
+    waiter.join(1)
+    assert not waiter.is_alive()
+
+    stats = StageStats("detect", queue)
+    with stats.timed():
+        pass
+    snapshot = stats.snapshot()
+    assert (snapshot["name"], snapshot["processed"], snapshot["dropped"]) == ("detect", 1, 3)
+
+
+class FakeCapture:
+    def __init__(self, _index):
+        self.frames = 0
+
+    def isOpened(self):
+        return True
+
+    def grab(self):
+        # A real camera blocks until its next frame.
+        time.sleep(1 / 120)
+        self.frames += 1
+        return True
+
+    def retrieve(self):
+        return True, np.zeros((48, 64, 3), dtype=np.uint8)
+
+    def release(self):
+        pass
+
+
+class SlowDetector:
+    motion = 0.0
+
+    def __init__(self, **_options) -> None:
+        pass
+
+    def detect_hit(self, frame):
+        assert frame.shape == (48, 48, 3)
+        time.sleep(0.05)
+        return None
+
+
+def test_slow_detection_does_not_hold_back_grabbing(tmp_path, monkeypatch):
+    monkeypatch.setattr(sources.cv2, "VideoCapture", FakeCapture)
+    monkeypatch.setattr(ingest, "LiveImpactDetector", SlowDetector)
+    store = DartBoardStore(str(tmp_path / "pipe.db"))
+    manager = ingest.USBCaptureManager(store)
+
+    manager.start_capture("u1", "s1", fps=60)
+    time.sleep(0.5)
+    status = manager.stop_capture()
+    stages = {stage["name"]: stage for stage in status["stages"]}
+    assert set(stages) == {"decode", "grab", "encode", "detect"}
+    assert stages["decode"]["processed"] >= stages["grab"]["processed"] - 1
+    # Detection manages ~20 fps, so grabbing at 60 fps has to drop detector input.
+    assert stages["grab"]["processed"] > 2 * stages["detect"]["processed"]
+    assert stages["detect"]["dropped"] > 0
+    assert status["frames_processed"] == stages["detect"]["processed"]
+    manager.close()
+    store.close()
+
+
+class HitDetector:
+    def detect_hit(self, frame):
+        return HitPoint(0.5, 0.5, 0.9)
+
+
+def test_detected_hits_are_stamped_before_the_flush(tmp_path):
+    store = DartBoardStore(str(tmp_path / "stamp.db"))
+    store.create_user("u1", "Matt")
+    store.create_session("s1", "u1", None)
+    writer = ThrowWriteBuffer(store, flush_rows=1000, flush_interval_s=60)
+    manager = ingest.USBCaptureManager(store, writer=writer)
+    frame = np.zeros((48, 48, 3), dtype=np.uint8)
+
+    manager._detect_stage(HitDetector(), frame, "u1", "s1")
+    time.sleep(0.05)
+    manager._detect_stage(HitDetector(), frame, "u1", "s1")
+    time.sleep(0.05)
+    flushed_at = datetime.now(timezone.utc)
+    assert writer.flush(timeout=5)
+
+    stamps = [datetime.fromisoformat(throw.ts) for throw in store.list_throws("u1")]
+    assert len(stamps) == 2
+    assert stamps[0] < stamps[1] < flushed_at
+    manager.close()
+    writer.close()
+    store.close()
+
+
+class BusyDetector(SlowDetector):
+    def detect_hit(self, frame):
+        deadline = time.thread_time() + 0.005
+        while time.thread_time() < deadline:
+            pass
+        return None
+
+
+def test_boards_run_independent_pipelines(tmp_path, monkeypatch):
+    monkeypatch.setattr(sources.cv2, "VideoCapture", FakeCapture)
+    monkeypatch.setattr(ingest, "LiveImpactDetector", BusyDetector)
+    store = DartBoardStore(str(tmp_path / "boards.db"))
+    boards = ingest.BoardCaptureManager(store)
+
+    boards.start_capture("oche-1", "u1", "s1", camera_index=0, fps=30)
+    boards.start_capture("oche-2", "u2", "s2", camera_index=1, fps=30)
+    with pytest.raises(RuntimeError, match="in use by board oche-2"):
+        boards.start_capture("oche-3", "u3", "s3", camera_index=1)
+    time.sleep(0.4)
+
+    assert boards.board_ids() == ["oche-1", "oche-2"]  # the failed start registered nothing
+    one, two = boards.status("oche-1"), boards.status("oche-2")
+    assert (one["board_id"], one["session_id"], one["running"]) == ("oche-1", "s1", True)
+    assert (two["board_id"], two["session_id"], two["camera_index"]) == ("oche-2", "s2", 1)
+    assert boards.board("oche-1").frames is not boards.board("oche-2").frames
+    assert boards.board("oche-1").writer is boards.board("oche-2").writer
+    assert one["cpu_percent"] > 0
+    assert sum(stage["cpu_s"] for stage in one["stages"]) > 0
+
+    boards.stop_capture("oche-1")
+    assert boards.status("oche-1")["running"] is False
+    assert boards.status("oche-2")["running"] is True
+    with pytest.raises(ValueError):
+        boards.start_preview("not a board id")
+    with pytest.raises(KeyError):
+        boards.status("oche-3")
+    boards.remove("oche-1")
+    assert boards.board_ids() == ["oche-2"]
+    boards.close()
+    assert boards.status("oche-2")["running"] is False
+    store.close()
+
+
+class FakePipeline:
+    def __init__(self, board_id) -> None:
+        self.board_id = board_id
+        self.running = False
+        self.closed = False
+
+    def start_preview(self, camera_index=0, fps=10, source=None):
+        if source == "unreachable":
+            raise RuntimeError("capture daemon unreachable")
+        self.running = True
+        return self.status()
+
+    def stop_capture(self):
+        self.running = False
+        return self.status()
+
+    def status(self):
+        return {"running": self.running, "camera_index": None}
+
+    def close(self) -> None:
+        self.closed = True
+
+
+def test_rate_policy_from_env():
+    assert RatePolicy.from_env({}) == RatePolicy()
+    policy = RatePolicy.from_env({"DARTBOARD_CAPTURE_IDLE_FPS": "5", "DARTBOARD_CAPTURE_CPU_BUDGET": "50"})
+    assert (policy.idle_fps, policy.cpu_budget_percent) == (5, 50.0)
+
+
+def test_boards_are_registered_by_a_successful_start(tmp_path, monkeypatch):
+    monkeypatch.setattr(ingest, "MAX_BOARDS", 2)
+    created = []
+
+    def factory(board_id):
+        created.append(FakePipeline(board_id))
+        return created[-1]
+
+    boards = ingest.BoardCaptureManager(None, factory=factory)
+    with pytest.raises(RuntimeError):
+        boards.start_preview("oche-1", source="unreachable")
+    assert boards.board_ids() == [] and created[0].closed
+
+    boards.start_preview("oche-1", source="a.avi")
+    boards.start_preview("oche-2", source="a.avi")
+    with pytest.raises(ValueError, match="at most 2 boards"):
+        boards.start_preview("oche-3", source="a.avi")
+
+    # A stopped board makes room for a new one.
+    boards.stop_capture("oche-1")
+    boards.start_preview("oche-3", source="a.avi")
+    assert boards.board_ids() == ["oche-2", "oche-3"]
+    evicted = created[1]
+    assert (evicted.board_id, evicted.closed) == ("oche-1", True)
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_frame_rate_idles_on_a_still_board_and_wakes_on_motion():
+    clock = FakeClock()
+    rate = AdaptiveFrameRate(30, RatePolicy(idle_fps=2, idle_after_s=5.0), clock=clock)
+    assert rate.update(0.0) == 30
+    rate.observe(0.0001)  # sensor noise
+    clock.now += 6
+    assert rate.update(0.0) == 2
+    assert rate.snapshot()["mode"] == "idle"
+
+    clock.now += 10
+    rate.observe(0.05)
+    assert rate.wait(1.0) is True  # woken straight away, not after the idle interval
+    assert rate.update(0.0) == 30
+    snapshot = rate.snapshot()
+    assert (snapshot["mode"], snapshot["active_s"], snapshot["idle_s"]) == ("active", 6.0, 10.0)
+
+    preview = AdaptiveFrameRate(30, RatePolicy(idle_after_s=1.0), adaptive=False, clock=clock)
+    clock.now += 60
+    assert preview.update(0.0) == 30
+
+
+def test_frame_rate_is_capped_to_the_cpu_budget():
+    clock = FakeClock()
+    rate = AdaptiveFrameRate(30, RatePolicy(idle_after_s=60, cpu_budget_percent=40), clock=clock)
+    cpu = 0.0
+    target = 30.0
+    while clock.now < 105:
+        target = rate.update(cpu)
+        clock.now += 1 / target
+        cpu += 0.8 / 30  # 80% of a core at 30 fps
+    assert target == pytest.approx(15, abs=0.5)
+    snapshot = rate.snapshot()
+    assert snapshot["cpu_limited"] and snapshot["cpu_percent"] == pytest.approx(40, abs=3)
+
+    for _ in range(10):
+        clock.now += 1.0
+        cpu += 0.1
+        target = rate.update(cpu)
+    assert target == 30 and not rate.snapshot()["cpu_limited"]
+
+
+def test_capture_idles_without_motion(tmp_path, monkeypatch):
+    monkeypatch.setattr(sources.cv2, "VideoCapture", FakeCapture)
+    monkeypatch.setattr(ingest, "LiveImpactDetector", SlowDetector)
+    store = DartBoardStore(str(tmp_path / "idle.db"))
+    manager = ingest.USBCaptureManager(store, rate_policy=RatePolicy(idle_fps=4, idle_after_s=0.2))
+
+    manager.start_capture("u1", "s1", fps=60)
+    time.sleep(2.3)
+    status = manager.stop_capture()
+    frame_rate = status["frame_rate"]
+    assert (frame_rate["mode"], frame_rate["target_fps"]) == ("idle", 4)
+    assert frame_rate["effective_fps"] < 20  # down from 60
+    assert frame_rate["idle_s"] > 1.5 and 0.1 < frame_rate["active_s"] < 0.5
+    stages = {stage["name"]: stage for stage in status["stages"]}
+    # The camera is still drained at its own rate, but idle frames are not decoded.
+    assert stages["grab"]["processed"] < 30
+    assert stages["decode"]["processed"] > 100
+    manager.close()
+    store.close()
@@ -0,0 +1,135 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import cv2
+import numpy as np
+import pytest
+
+from src.dart_board.ingest import USBCaptureManager
+from src.dart_board.sources import VideoSource, resolve_video_file, source_kind
+from src.dart_board.storage import DartBoardStore
+
+
+def _write_video(path, frames=20, fps=100):
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"MJPG"), fps, (160, 120))
+    for index in range(frames):
+        writer.write(np.full((120, 160, 3), index * 10, dtype=np.uint8))
+    writer.release()
+    return str(path)
+
+
+def _drain(source, timeout=5.0):
+    frames = []
+    deadline = time.monotonic() + timeout
+    while not source.finished and time.monotonic() < deadline:
+        frame = source.read(timeout=0.1)
+        if frame is not None:
+            frames.append(frame)
+    return frames
+
+
+def test_source_kind():
+    assert [source_kind(spec) for spec in (0, "2", "rtsp://cam/1", "clips/a.mp4")] == ["usb", "usb", "url", "file"]
+    with pytest.raises(ValueError):
+        source_kind("javascript://alert")
+
+
+def test_resolve_video_file_stays_inside_the_video_dir(tmp_path):
+    clip = _write_video(tmp_path / "clip.avi")
+    assert str(resolve_video_file(tmp_path, "clip.avi")) == clip
+    with pytest.raises(ValueError, match="outside"):
+        resolve_video_file(tmp_path / "videos", "../clip.avi")
+    with pytest.raises(ValueError, match="not found"):
+        resolve_video_file(tmp_path, "missing.avi")
+
+
+def test_file_source_plays_at_its_frame_rate_then_finishes(tmp_path):
+    source = VideoSource(_write_video(tmp_path / "clip.avi"), prefetch=32)
+    started = time.monotonic()
+    assert source.start()
+    frames = _drain(source)
+    assert len(frames) == 20
+    assert time.monotonic() - started >= 0.15  # 20 frames at 100 fps
+    stats = source.stats()
+    assert (stats["kind"], stats["finished"], stats["connected"], stats["reconnects"]) == ("file", True, False, 0)
+    assert source.decode.snapshot()["processed"] == 21  # the last read reports end of file
+
+
+def test_slow_reader_drops_oldest_prefetched_frames(tmp_path):
+    source = VideoSource(_write_video(tmp_path / "clip.avi"), prefetch=2)
+    assert source.start()
+    time.sleep(0.4)
+    assert source.finished is False
+    assert [int(frame[0, 0, 0]) for frame in _drain(source)] == [180, 190]
+    assert source.decode.snapshot()["dropped"] == 18
+
+
+def test_failed_open_is_reported(tmp_path):
+    source = VideoSource(str(tmp_path / "missing.avi"))
+    assert source.start() is False
+    assert source.finished
+    assert source.stats()["last_error"].startswith("failed to open file")
+
+
+class _MJPEGStream(BaseHTTPRequestHandler):
+    """Serves a short MJPEG stream per request, so every stream ends and must be reopened."""
+
+    jpeg = cv2.imencode(".jpg", np.full((120, 160, 3), 100, np.uint8))[1].tobytes()
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "multipart/x-mixed-replace; boundary=frame")
+        self.end_headers()
+        try:
+            for _ in range(10):
+                self.wfile.write(b"--frame\r\nContent-Type: image/jpeg\r\nContent-Length: %d\r\n\r\n" % len(self.jpeg))
+                self.wfile.write(self.jpeg + b"\r\n")
+                time.sleep(0.01)
+        except OSError:
+            pass
+
+    def log_message(self, *args):
+        pass
+
+
+def test_stream_source_reconnects_with_backoff():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _MJPEGStream)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    source = VideoSource(f"http://127.0.0.1:{server.server_port}/stream", backoff_s=0.05)
+    try:
+        assert source.start()
+        frames = 0
+        deadline = time.monotonic() + 10
+        while source.stats()["reconnects"] < 2 and time.monotonic() < deadline:
+            frames += source.read(timeout=0.1) is not None
+        stats = source.stats()
+        assert stats["kind"] == "url" and stats["reconnects"] >= 2
+        # A reopen can also fail while the server is busy, which reports "failed to open".
+        assert "url http://127.0.0.1" in stats["last_error"]
+        # Frames keep coming after each reconnect; a reader slowed by other work loses some to the prefetch queue.
+        assert frames > 0 and source.decode.snapshot()["processed"] > 10
+    finally:
+        source.close()
+        server.shutdown()
+    assert source.finished
+
+
+def test_capture_from_a_file_source_runs_to_the_end(tmp_path):
+    store = DartBoardStore(str(tmp_path / "sources.db"))
+    manager = USBCaptureManager(store)
+    status = manager.start_capture("u1", "s1", fps=60, source=_write_video(tmp_path / "clip.avi"))
+    assert (status["camera_index"], status["source"]) == (None, str(tmp_path / "clip.avi"))
+
+    deadline = time.monotonic() + 5
+    while manager.status()["running"] and time.monotonic() < deadline:
+        time.sleep(0.05)
+    status = manager.status()
+    assert status["running"] is False and status["last_error"] is None
+    assert status["video_source"]["finished"] is True
+    stages = {stage["name"]: stage for stage in status["stages"]}
+    assert stages["decode"]["processed"] == 21
+    assert 0 < stages["grab"]["processed"] <= 20  # waits for the source are not grabs
+    assert 0 < status["frames_processed"] <= 20
+    manager.close()
+    store.close()
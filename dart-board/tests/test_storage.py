@@ -1,4 +1,8 @@
-from src.dart_board.storage import DartBoardStore
+import sqlite3
+
+import pytest
+
+from src.dart_board.storage import SCHEMA_VERSION, ConnectionPool, SESSION_THROWS_QUERY, DartBoardStore, ThrowInput, to_epoch_us
 
 
 def test_store_user_session_throw_roundtrip(tmp_path):
@@ -17,3 +21,162 @@ def test_store_user_session_throw_roundtrip(tmp_path):
     throws = store.list_throws_for_user("u1")
     assert len(throws) == 1
     assert throws[0].x_norm == 0.5
+
+
+def test_wal_readers_not_blocked_by_open_write(tmp_path):
+    store = DartBoardStore(str(tmp_path / "wal.db"))
+    store.create_user("u1", "Matt")
+    store.create_session("s1", "u1", None)
+    with store._pool.read() as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+    with store._pool.write() as conn:
+        conn.execute(
+            "INSERT INTO throws (user_id, session_id, ts, x_norm, y_norm, confidence) VALUES ('u1', 's1', 0, 0, 0, 1)"
+        )
+        # Uncommitted write is invisible to readers, and reading does not block.
+        assert store.list_throw_points("u1") == []
+    assert len(store.list_throw_points("u1")) == 1
+    store.close()
+
+
+def test_failed_commit_is_rolled_back(tmp_path):
+    pool = ConnectionPool(tmp_path / "pool.db", {"foreign_keys": "ON"})
+    pool.executescript(
+        "CREATE TABLE parent (id INTEGER PRIMARY KEY);"
+        "CREATE TABLE child (parent_id INTEGER REFERENCES parent(id) DEFERRABLE INITIALLY DEFERRED);"
+    )
+    with pytest.raises(sqlite3.IntegrityError):
+        with pool.write() as conn:
+            conn.execute("INSERT INTO child VALUES (1)")  # only checked at COMMIT
+    with pool.write() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM child").fetchone()[0] == 0
+    pool.close()
+
+
+def test_add_throws_chunks_and_rejects_bad_ids(tmp_path):
+    store = DartBoardStore(str(tmp_path / "bulk.db"))
+    store.create_user("u1", "Matt")
+    store.create_user("u2", "Sam")
+    store.create_session("s1", "u1", None)
+    store.create_session("s2", "u2", None)
+    seen = []
+
+    class Listener:
+        def throws_added(self, throws):
+            seen.append([t.id for t in throws])
+
+        def throws_cleared(self, user_id):
+            pass
+
+    store.add_listener(Listener())
+    rows = [ThrowInput("u1", "s1", 0.1 * i, 0.5, 0.9) for i in range(5)]
+    rows[1] = ThrowInput("nobody", "s1", 0.5, 0.5, 0.9)
+    rows[3] = ThrowInput("u1", "s2", 0.5, 0.5, 0.9, ts="2024-01-01T00:00:00+00:00")
+
+    results = store.add_throws(rows, chunk_size=2)
+    assert [(r.accepted, r.rejected) for r in results] == [(1, 1), (1, 1), (1, 0)]
+    assert results[0].errors == [(1, "user not found")]
+    assert results[1].errors == [(3, "session does not belong to user")]
+
+    stored = store.list_throws_for_user("u1")
+    assert [t.id for t in stored] == [ids[0] for ids in seen]
+    assert [round(t.x_norm, 1) for t in stored] == [0.0, 0.2, 0.4]
+    store.close()
+
+
+def test_iter_throw_batches_streams_in_fixed_batches(tmp_path):
+    store = DartBoardStore(str(tmp_path / "iter.db"))
+    store.create_user("u1", "Matt")
+    store.create_session("s1", "u1", None)
+    store.add_throws([ThrowInput("u1", "s1", i / 10, 0.5, 0.9) for i in range(7)])
+
+    batches = list(store.iter_throw_batches("u1", batch_size=3))
+    assert [len(batch) for batch in batches] == [3, 3, 1]
+    first_page = store.list_throws("u1", limit=3)
+    assert [t.id for t in first_page] == [t.id for t in batches[0]]
+    assert [t.id for t in store.list_throws("u1", after_id=first_page[-1].id, limit=3)] == [t.id for t in batches[1]]
+    store.close()
+
+
+# Schema version 0, with TEXT timestamps.
+LEGACY_SCHEMA = """
+    CREATE TABLE users (id TEXT PRIMARY KEY, name TEXT NOT NULL, created_at TEXT NOT NULL);
+    CREATE TABLE sessions (
+        id TEXT PRIMARY KEY, user_id TEXT NOT NULL, started_at TEXT NOT NULL, ended_at TEXT, source_ref TEXT
+    );
+    CREATE TABLE throws (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, user_id TEXT NOT NULL, session_id TEXT NOT NULL,
+        ts TEXT NOT NULL, x_norm REAL NOT NULL, y_norm REAL NOT NULL, confidence REAL NOT NULL
+    );
+    CREATE INDEX idx_throws_user ON throws(user_id);
+    CREATE INDEX idx_throws_session ON throws(session_id);
+    INSERT INTO users VALUES ('u1', 'Matt', '2024-01-01T00:00:00+00:00');
+    INSERT INTO sessions VALUES ('s1', 'u1', '2024-01-01T00:00:00+00:00', NULL, NULL);
+"""
+
+
+def test_migrates_text_timestamps_in_place(tmp_path):
+    db = tmp_path / "legacy.db"
+    conn = sqlite3.connect(db)
+    conn.executescript(
+        LEGACY_SCHEMA
+        + """
+        INSERT INTO throws (user_id, session_id, ts, x_norm, y_norm, confidence)
+        VALUES ('u1', 's1', '2024-01-02T03:04:05.123456+00:00', 0.1, 0.2, 0.9),
+               ('u1', 's1', '2024-01-02T05:04:05+02:00', 0.3, 0.4, 0.8),
+               ('u1', 's1', '2024-01-03T00:00:00+00:00', 0.5, 0.5, 0.7);
+        DELETE FROM throws WHERE id = 3;
+        """
+    )
+    conn.close()
+
+    store = DartBoardStore(str(db))
+    with store._pool.read() as conn:
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION
+        assert {row[0] for row in conn.execute("SELECT typeof(ts) FROM throws")} == {"integer"}
+    throws = store.list_throws_for_user("u1")
+    assert [t.ts for t in throws] == ["2024-01-02T03:04:05.123456+00:00", "2024-01-02T03:04:05+00:00"]
+    assert sum(store.segment_hits("u1").values()) == 2
+    # Deleted ids are not reused after the table rebuild.
+    assert store.add_throw("u1", "s1", 0.5, 0.5, 1.0).id == 4
+    store.close()
+    assert DartBoardStore(str(db)).list_throws_for_user("u1")[0].ts == throws[0].ts
+
+
+def test_migration_refuses_unparseable_timestamps(tmp_path):
+    db = tmp_path / "legacy.db"
+    conn = sqlite3.connect(db)
+    conn.executescript(
+        LEGACY_SCHEMA
+        + """
+        INSERT INTO throws (user_id, session_id, ts, x_norm, y_norm, confidence)
+        VALUES ('u1', 's1', '2024-01-02T03:04:05+00:00', 0.1, 0.2, 0.9), ('u1', 's1', 'yesterday', 0.3, 0.4, 0.8);
+        """
+    )
+    conn.close()
+
+    with pytest.raises(ValueError, match=r"1 throws with unparseable timestamps \(ids 2\)"):
+        DartBoardStore(str(db))
+    conn = sqlite3.connect(db)
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == 0
+    assert conn.execute("SELECT ts FROM throws ORDER BY id").fetchall() == [("2024-01-02T03:04:05+00:00",), ("yesterday",)]
+    conn.close()
+
+
+def test_time_range_and_session_queries_use_composite_indexes(tmp_path):
+    store = DartBoardStore(str(tmp_path / "plan.db"))
+    query, params = store._throw_query("u1", since="2024-01-01T00:00:00+00:00", until="2024-01-08T00:00:00+00:00")
+    assert params[2:] == (to_epoch_us("2024-01-01T00:00:00+00:00"), to_epoch_us("2024-01-08T00:00:00+00:00"))
+    with store._pool.read() as conn:
+        plan = " ".join(row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + query, params))
+        assert "idx_throws_user_ts (user_id=? AND ts>? AND ts<?)" in plan
+
+        plan = " ".join(row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + SESSION_THROWS_QUERY, ("s1",)))
+        assert "idx_throws_session_ts (session_id=?)" in plan
+        assert "TEMP B-TREE" not in plan
+
+        query, params = store._throw_query("u1")
+        plan = " ".join(row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + query, params))
+        assert "TEMP B-TREE" not in plan
+    store.close()
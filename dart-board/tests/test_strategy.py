@@ -0,0 +1,42 @@
+import numpy as np
+
+from src.dart_board.accuracy import PlayerModelCache, outcome_matrix
+from src.dart_board.storage import DartBoardStore
+from src.dart_board.strategy import StrategyCache, StrategyPolicy, solve_policy
+
+
+def test_policy_finishes_on_doubles_and_respects_bust():
+    policy = solve_policy(outcome_matrix(np.eye(2) * 0.01**2), max_score=170)
+    assert policy.advise(40)[0] == "D20"
+    assert policy.advise(50)[0] in {"DB", "S10", "S18"}
+    # With 20 scored this visit from 60, the player is on 40 and must still finish on a double.
+    assert policy.advise(40, darts_left=2, scored_this_visit=20)[0] == "D20"
+    assert policy.advise(170)[1] > policy.advise(40)[1]
+
+
+def test_straight_out_allows_single_finish():
+    policy = solve_policy(outcome_matrix(np.eye(2) * 0.01**2), out_rule="straight", max_score=60)
+    assert policy.advise(1)[0] == "S1"
+
+
+def test_policy_roundtrip(tmp_path):
+    policy = solve_policy(outcome_matrix(np.eye(2) * 0.02**2), max_score=100)
+    path = tmp_path / "policy.npz"
+    policy.save(path)
+    loaded = StrategyPolicy.load(path)
+    assert loaded.advise(100) == policy.advise(100)
+
+
+def test_cache_solves_in_background(tmp_path):
+    store = DartBoardStore(str(tmp_path / "strategy.db"))
+    store.create_user("u1", "Matt")
+    cache = StrategyCache(PlayerModelCache(store), policy_dir=tmp_path / "policies")
+
+    policy, personalised = cache.get("u1")
+    assert policy is None and not personalised
+    cache.wait("u1")
+    policy, personalised = cache.get("u1")
+    assert personalised
+    assert policy.advise(501)[1] > 0
+    assert list((tmp_path / "policies").glob("*.npz"))
+    cache.shutdown()
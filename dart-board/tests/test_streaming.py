@@ -0,0 +1,71 @@
+import asyncio
+import threading
+
+import cv2
+import numpy as np
+
+from src.dart_board.streaming import FrameHub, StreamVariant, mjpeg_stream
+
+FRAME = np.zeros((240, 240, 3), dtype=np.uint8)
+
+
+def _decode(part: bytes) -> np.ndarray:
+    jpeg = part.split(b"\r\n\r\n", 1)[1][:-2]
+    return cv2.imdecode(np.frombuffer(jpeg, np.uint8), cv2.IMREAD_COLOR)
+
+
+def test_viewers_get_each_frame_once_and_skip_stale_frames():
+    async def scenario():
+        hub = FrameHub()
+        hub.open()
+        hub.publish(FRAME)
+        assert hub.encodes == 0  # nobody watching
+
+        variant = StreamVariant()
+        with hub.subscribe(variant):
+            hub.publish(FRAME)
+            seq, part = await hub.next_part(0, variant)
+            assert seq == 2 and part.startswith(b"--frame\r\nContent-Type: image/jpeg")
+
+            # A waiting viewer is woken by a publish from another thread.
+            waiter = asyncio.create_task(hub.next_part(seq, variant))
+            await asyncio.sleep(0)
+            threading.Thread(target=hub.publish, args=(FRAME,)).start()
+            assert (await asyncio.wait_for(waiter, 1))[0] == 3
+
+            # A slow viewer that fell behind jumps to the newest frame.
+            hub.publish(FRAME)
+            hub.publish(FRAME)
+            assert (await hub.next_part(3, variant))[0] == 5
+
+        # A new viewer starts from the current frame.
+        stream = mjpeg_stream(hub)
+        assert (await asyncio.wait_for(stream.__anext__(), 1)).endswith(b"\r\n")
+        pending = asyncio.ensure_future(stream.__anext__())
+        await asyncio.sleep(0)
+        hub.close()
+        try:
+            await asyncio.wait_for(pending, 1)
+            raise AssertionError("stream should end when the hub closes")
+        except StopAsyncIteration:
+            pass
+        assert hub.subscriber_count == 0
+
+    asyncio.run(scenario())
+
+
+def test_variants_encode_once_per_frame_and_are_shared():
+    async def scenario():
+        hub = FrameHub()
+        hub.open()
+        small = StreamVariant(width=120, quality=50)
+        with hub.subscribe(StreamVariant()), hub.subscribe(StreamVariant()), hub.subscribe(small):
+            hub.publish(FRAME)
+            assert hub.encodes == 2
+            full_a = await hub.next_part(0, StreamVariant())
+            full_b = await hub.next_part(0, StreamVariant())
+            assert full_a[1] is full_b[1]
+            assert _decode((await hub.next_part(0, small))[1]).shape == (120, 120, 3)
+        assert hub.snapshot() is not None
+
+    asyncio.run(scenario())
@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+from src.dart_board.offline import VideoHit
+from src.dart_board.synthetic import SceneConfig, SyntheticBoardVideo, SyntheticThrow, evaluate_detector, score_detections
+
+CLIP = SceneConfig(seconds=8)
+
+
+def test_clips_are_reproducible_from_the_seed():
+    one, two = SyntheticBoardVideo(CLIP), SyntheticBoardVideo(CLIP)
+    assert one.throws == two.throws and len(one.throws) == 3
+    np.testing.assert_array_equal(one.frame(100), two.frame(100))
+    assert SyntheticBoardVideo(SceneConfig(seconds=8, seed=1)).throws != one.throws
+
+    first = one.throws[0]
+    assert [t.frame for t in one.throws] == [30, 75, 120]
+    assert all(np.hypot(t.x_norm - 0.5, t.y_norm - 0.5) < 0.48 for t in one.throws)
+    # The dart appears on its frame and is gone once the visit's darts are pulled.
+    x, y = 280 + round(first.x_norm * 719), round(first.y_norm * 719)
+    clean = SyntheticBoardVideo(SceneConfig(seconds=8, noise_sigma=0, lighting_drift=0, lighting_steps=0))
+    before, during, after = (clean.frame(i)[y, x].astype(int) for i in (29, 30, 180))
+    assert np.abs(during - before).max() > 40
+    np.testing.assert_array_equal(after, before)
+
+
+def test_scoring_matches_each_throw_once_within_delay_and_distance():
+    throws = [SyntheticThrow(30, 0.3, 0.3), SyntheticThrow(75, 0.6, 0.6)]
+    detections = [
+        VideoHit(31, 0.31, 0.3, 1.0),  # first throw
+        VideoHit(32, 0.3, 0.3, 1.0),  # duplicate
+        VideoHit(76, 0.7, 0.6, 1.0),  # too far from the second throw
+        VideoHit(200, 0.6, 0.6, 1.0),  # too late
+    ]
+    report = score_detections(detections, throws, fps=30)
+    assert (report.true_positives, report.precision, report.recall) == (1, 0.25, 0.5)
+    assert report.mean_error == pytest.approx(0.01)
+
+
+def test_detector_finds_every_synthetic_throw():
+    run = evaluate_detector(SyntheticBoardVideo(CLIP))
+    assert run.frames == len(run.latencies_ms) == 240 and run.fps > 0
+    assert run.accuracy.recall == 1.0
+    assert run.accuracy.mean_error < 0.02
+    # Pulling the darts is motion too, and the only false positive.
+    assert run.accuracy.detections == run.accuracy.true_positives + 1
@@ -0,0 +1,57 @@
+import time
+
+from src.dart_board.storage import DartBoardStore, ThrowInput
+from src.dart_board.writebehind import ThrowWriteBuffer
+
+
+def _store(tmp_path):
+    store = DartBoardStore(str(tmp_path / "wb.db"))
+    store.create_user("u1", "Matt")
+    store.create_session("s1", "u1", None)
+    return store
+
+
+def test_flush_commits_queued_throws_in_one_batch(tmp_path):
+    store = _store(tmp_path)
+    buffer = ThrowWriteBuffer(store, flush_rows=1000, flush_interval_s=60)
+    for i in range(10):
+        assert buffer.put(ThrowInput("u1", "s1", i / 10, 0.5, 0.9))
+    assert buffer.stats()["write_queue_depth"] == 10
+    assert store.list_throw_points("u1") == []
+
+    assert buffer.flush(timeout=5, durable=True)
+    stats = buffer.stats()
+    assert len(store.list_throw_points("u1")) == 10
+    assert (stats["write_queue_depth"], stats["throws_written"], stats["write_flushes"]) == (0, 10, 1)
+    buffer.close()
+    store.close()
+
+
+def test_time_threshold_and_overflow(tmp_path):
+    store = _store(tmp_path)
+    buffer = ThrowWriteBuffer(store, flush_rows=1000, flush_interval_s=0.05, max_pending=2)
+    assert buffer.put(ThrowInput("u1", "s1", 0.5, 0.5, 0.9))
+    assert buffer.put(ThrowInput("u1", "s1", 0.5, 0.5, 0.9))
+    assert not buffer.put(ThrowInput("u1", "s1", 0.5, 0.5, 0.9))
+
+    deadline = time.monotonic() + 5
+    while buffer.stats()["throws_written"] < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert buffer.stats()["throws_written"] == 2
+    assert buffer.stats()["throws_dropped"] == 1
+    assert buffer.stats()["throws_rejected"] == 0
+    buffer.close()
+    assert not buffer.put(ThrowInput("u1", "s1", 0.5, 0.5, 0.9))
+    store.close()
+
+
+def test_rows_the_store_rejects_are_counted_apart_from_drops(tmp_path):
+    store = _store(tmp_path)
+    buffer = ThrowWriteBuffer(store, flush_rows=1000, flush_interval_s=60)
+    assert buffer.put(ThrowInput("u1", "s1", 0.5, 0.5, 0.9))
+    assert buffer.put(ThrowInput("u1", "missing", 0.5, 0.5, 0.9))
+    assert buffer.flush(timeout=5)
+    stats = buffer.stats()
+    assert (stats["throws_written"], stats["throws_rejected"], stats["throws_dropped"]) == (1, 1, 0)
+    buffer.close()
+    store.close()